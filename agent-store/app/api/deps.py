@@ -1,6 +1,5 @@
 from fastapi import Depends, Request
 from sqlmodel import Session
-from chromadb import ClientAPI
 
 from app.internal.store import db
 from app.internal.store import db_vector
@@ -10,15 +9,17 @@ from app.internal.services.service_agents import AgentService
 from app.internal.services.service_chats import ChatService
 from app.internal.services.service_messages import MessageService
 from app.internal.services.service_vectors import VectorService
+from app.internal.services.service_vectors_async import AsyncVectorService
 
 from app.internal.store.repository_vectors import VectorRepository
+from app.internal.store.vector_backend import VectorBackend
 
 
 def get_session():
     with Session(db.engine) as s:
         yield s
 
-def get_vector_client(request: Request) -> ClientAPI:
+def get_vector_client(request: Request) -> VectorBackend:
     """
     Tries to get the vector client from app state; falls back to default client.
     """
@@ -26,17 +27,26 @@ def get_vector_client(request: Request) -> ClientAPI:
     return client or db_vector.get_client()
 
 def get_vector_repository(
-    client: ClientAPI = Depends(get_vector_client),
+    client: VectorBackend = Depends(get_vector_client),
 ) -> VectorRepository:
     """
-    Creates a VectorRepository instance.
+    Creates a VectorRepository instance backed by the process-wide
+    collection handle registry.
     
     :param client: The client of the vector database
-    :type client: ClientAPI
+    :type client: VectorBackend
     :return: The repository for vector operations
     :rtype: VectorRepository
     """
-    return VectorRepository(client)
+    return VectorRepository(
+        client,
+        registry=db_vector.get_collection_registry(client),
+        query_cache=db_vector.get_query_cache(),
+    )
+
+def get_snapshot_path() -> str:
+    """Directory of the collection snapshots ([tool.vectors] snapshot-path)."""
+    return db_vector.get_snapshot_path()
 
 def get_vector_service(
     repo: VectorRepository = Depends(get_vector_repository),
@@ -51,6 +61,19 @@ def get_vector_service(
     """
     return VectorService(repo)
 
+def get_async_vector_service(
+    svc: VectorService = Depends(get_vector_service),
+) -> AsyncVectorService:
+    """
+    Creates an AsyncVectorService running on the shared vector executor.
+
+    :param svc: The synchronous vector service to wrap
+    :type svc: VectorService
+    :return: A service for vector operations from async code
+    :rtype: AsyncVectorService
+    """
+    return AsyncVectorService(svc)
+
 def get_tool_service(
     request: Request,
     session: Session = Depends(get_session),
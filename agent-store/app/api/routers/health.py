@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+@router.get("/live")
+def live():
+    return {"status": "ok"}
+
+@router.get("/ready")
+def ready(request: Request):
+    """
+    200 once startup (including the vector warmup) has finished, 503 before.
+    """
+    warmup = getattr(request.app.state, "vector_warmup", None)
+    if warmup is None or not warmup.ready:
+        status = warmup.status() if warmup is not None else None
+        return JSONResponse(status_code=503, content={"status": "starting", "warmup": status})
+    return {"status": "ready", "warmup": warmup.status()}
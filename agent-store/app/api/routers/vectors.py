@@ -1,26 +1,306 @@
-from fastapi import APIRouter, Depends
-from app.api.deps import get_vector_service
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.requests import ClientDisconnect
+from starlette.types import Receive, Scope, Send
+from app.api.deps import get_snapshot_path, get_vector_service, get_async_vector_service
 from app.internal.services.service_vectors import VectorService
-from app.contracts.contract_vectors import VectorQueryRequest, VectorCreate, VectorUpdate
+from app.internal.services.service_vectors_async import AsyncVectorService
+from app.internal.services.errors import ConflictError, NotFoundError, ValidationError
+from app.internal.services.service_vector_ingest import VectorIngestPipeline, DEFAULT_MAX_PENDING_BATCHES
+from app.internal.services.service_vector_migration import get_vector_migrations
+from app.internal.services.vector_export import MEDIA_TYPES, export_stream
+from app.internal.store.repository_vectors import DEFAULT_BATCH_SIZE, SCAN_PAGE_SIZE
+from app.contracts.contract_vectors import (
+    VectorQueryRequest,
+    VectorMultiQueryRequest,
+    VectorCreate,
+    VectorDedup,
+    VectorDedupMode,
+    VectorUpdate,
+    VectorBulkCreateResponse,
+    VectorBulkUpdate,
+    VectorBulkUpdateResponse,
+    VectorCollectionCreate,
+    VectorCollectionRead,
+    VectorIndexConfig,
+    VectorDeleteRequest,
+    VectorDeleteResponse,
+    VectorDocumentIngest,
+    VectorDocumentIngestResponse,
+    VectorExportFormat,
+    VectorMigrationCreate,
+    VectorMigrationRead,
+    VectorSnapshotCreate,
+    VectorSnapshotRead,
+    VectorSnapshotRestore,
+)
 
 router = APIRouter(prefix="/vectors", tags=["vectors"])
 
-@router.post("/create")
-def create_vectors(payload: list[VectorCreate], svc: VectorService = Depends(get_vector_service)):
-    for item in payload:
-        svc.create(item.collection, item)
-    return {"ok": True}
+
+def _dedup(mode: Optional[VectorDedupMode], threshold: float) -> Optional[VectorDedup]:
+    return VectorDedup(mode=mode, threshold=threshold) if mode else None
+
+
+def _raise_http(err: Exception) -> None:
+    if isinstance(err, NotFoundError):
+        raise HTTPException(status_code=404, detail=str(err))
+    if isinstance(err, ConflictError):
+        raise HTTPException(status_code=409, detail=str(err))
+    if isinstance(err, ValidationError):
+        raise HTTPException(status_code=422, detail=str(err))
+    raise err
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that keeps the request body readable while streaming.
+
+    For ASGI servers below spec 2.4 Starlette listens for disconnects by
+    draining `receive`, which would swallow the upload the stream still
+    consumes. The body reader sees the disconnect itself, so skip that.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+@router.post("/create", response_model=VectorBulkCreateResponse, response_model_exclude_unset=True)
+def create_vectors(
+    payload: list[VectorCreate],
+    upsert: bool = False,
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1),
+    dedup: Optional[VectorDedupMode] = None,
+    dedup_threshold: float = Query(0.9, gt=0.0, le=1.0),
+    svc: VectorService = Depends(get_vector_service),
+):
+    """
+    Bulk ingest. With `dedup`, near-duplicate documents are rejected or
+    merged into the record they duplicate, and listed in `collapsed`.
+    """
+    return svc.create_many(payload, upsert=upsert, batch_size=batch_size, dedup=_dedup(dedup, dedup_threshold))
+
+@router.post("/documents", response_model=VectorDocumentIngestResponse)
+async def ingest_documents(
+    payload: VectorDocumentIngest,
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1),
+    svc: AsyncVectorService = Depends(get_async_vector_service),
+):
+    """
+    Whole-document ingest: documents are chunked on the chunk worker pool and
+    the chunks upserted in batches.
+    """
+    try:
+        return await svc.create_documents(payload, batch_size=batch_size)
+    except Exception as e:
+        _raise_http(e)
+
+@router.post("/ingest")
+async def ingest_vectors(
+    request: Request,
+    upsert: bool = False,
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1),
+    max_pending_batches: int = Query(DEFAULT_MAX_PENDING_BATCHES, ge=1, le=64),
+    dedup: Optional[VectorDedupMode] = None,
+    dedup_threshold: float = Query(0.9, gt=0.0, le=1.0),
+    svc: AsyncVectorService = Depends(get_async_vector_service),
+):
+    """
+    Streaming ingest: the body is NDJSON, one `VectorCreate` per line.
+    The response streams NDJSON `error`/`duplicate`/`progress` events and a final `done` event.
+    """
+    pipeline = VectorIngestPipeline(
+        svc,
+        upsert=upsert,
+        batch_size=batch_size,
+        max_pending_batches=max_pending_batches,
+        dedup=_dedup(dedup, dedup_threshold),
+    )
+    return DuplexStreamingResponse(pipeline.run(request.stream()), media_type="application/x-ndjson")
 
 @router.post("/query")
 def query_vectors(payload: VectorQueryRequest, svc: VectorService = Depends(get_vector_service)):
-    return svc.query(payload)
+    try:
+        result = svc.query(payload)
+    except Exception as e:
+        _raise_http(e)
+    if payload.shape is None:
+        return result
+    # Shaped responses only carry what was asked for.
+    return Response(result.model_dump_json(exclude_defaults=True), media_type="application/json")
+
+@router.post("/query/multi")
+async def query_many_vectors(
+    payload: VectorMultiQueryRequest,
+    svc: AsyncVectorService = Depends(get_async_vector_service),
+):
+    """
+    Query several collections concurrently; hits are merged into one global
+    top `n_results` by distance and keep their source collection.
+    """
+    try:
+        result = await svc.query_many(payload)
+    except Exception as e:
+        _raise_http(e)
+    if payload.shape is None:
+        return result
+    return Response(result.model_dump_json(exclude_defaults=True), media_type="application/json")
 
 @router.patch("")
 def update_vector(payload: VectorUpdate, svc: VectorService = Depends(get_vector_service)):
-    svc.update(payload, merge_metadata=True)
+    try:
+        svc.update(payload)
+    except Exception as e:
+        _raise_http(e)
     return {"ok": True}
 
-@router.delete("")
-def delete_vectors(collection: str, ids: list[str], svc: VectorService = Depends(get_vector_service)):
-    svc.delete(collection, ids=ids)
-    return {"ok": True}
+@router.patch("/bulk", response_model=VectorBulkUpdateResponse)
+def update_vectors(payload: VectorBulkUpdate, svc: VectorService = Depends(get_vector_service)):
+    try:
+        return svc.update_many(payload)
+    except Exception as e:
+        _raise_http(e)
+
+@router.delete("", response_model=VectorDeleteResponse)
+def delete_vectors(payload: VectorDeleteRequest, svc: VectorService = Depends(get_vector_service)):
+    try:
+        return svc.delete_many(payload)
+    except Exception as e:
+        _raise_http(e)
+
+@router.get("/stats")
+def vector_stats(svc: AsyncVectorService = Depends(get_async_vector_service)):
+    return svc.stats()
+
+@router.post("/collections", status_code=201, response_model=VectorCollectionRead)
+def create_collection(payload: VectorCollectionCreate, svc: VectorService = Depends(get_vector_service)):
+    try:
+        return svc.create_collection(payload)
+    except Exception as e:
+        _raise_http(e)
+
+@router.patch("/collections/{collection}", response_model=VectorCollectionRead)
+def configure_collection(
+    collection: str,
+    payload: VectorIndexConfig,
+    svc: VectorService = Depends(get_vector_service),
+):
+    try:
+        return svc.configure_collection(collection, payload)
+    except Exception as e:
+        _raise_http(e)
+
+@router.get("/collections/{collection}", response_model=VectorCollectionRead)
+def get_collection(collection: str, svc: VectorService = Depends(get_vector_service)):
+    try:
+        return svc.collection_info(collection)
+    except Exception as e:
+        _raise_http(e)
+
+@router.get("/collections/{collection}/records")
+async def scan_collection(
+    collection: str,
+    format: VectorExportFormat = "ndjson",
+    embeddings: bool = False,
+    page_size: int = Query(SCAN_PAGE_SIZE, ge=1, le=10_000),
+    svc: AsyncVectorService = Depends(get_async_vector_service),
+):
+    """
+    Stream every record of a collection, read `page_size` at a time: NDJSON
+    `VectorRecord` lines, or an Arrow IPC stream with one batch per page.
+    """
+    try:
+        pages = await svc.scan(collection, embeddings=embeddings, page_size=page_size)
+        body = export_stream(collection, pages, format, embeddings=embeddings)
+    except Exception as e:
+        _raise_http(e)
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format])
+
+@router.post("/collections/{collection}/snapshots", status_code=201, response_model=VectorSnapshotRead)
+def snapshot_collection(
+    collection: str,
+    payload: VectorSnapshotCreate = VectorSnapshotCreate(),
+    root: str = Depends(get_snapshot_path),
+    svc: VectorService = Depends(get_vector_service),
+):
+    """
+    Save the collection, embeddings included, as a binary snapshot in the
+    snapshot directory.
+    """
+    try:
+        return svc.snapshot_collection(collection, payload, root=root)
+    except Exception as e:
+        _raise_http(e)
+
+@router.get("/snapshots", response_model=list[VectorSnapshotRead])
+def list_snapshots(root: str = Depends(get_snapshot_path), svc: VectorService = Depends(get_vector_service)):
+    return svc.list_snapshots(root=root)
+
+@router.post("/snapshots/{name}/restore", status_code=201, response_model=VectorCollectionRead)
+def restore_snapshot(
+    name: str,
+    payload: VectorSnapshotRestore = VectorSnapshotRestore(),
+    root: str = Depends(get_snapshot_path),
+    svc: VectorService = Depends(get_vector_service),
+):
+    """
+    Recreate a collection from a snapshot; stored embeddings are loaded as
+    they are, nothing is re-embedded.
+    """
+    try:
+        return svc.restore_snapshot(name, payload, root=root)
+    except Exception as e:
+        _raise_http(e)
+
+@router.post("/collections/{collection}/migrations", status_code=202, response_model=VectorMigrationRead)
+async def start_migration(
+    collection: str,
+    payload: VectorMigrationCreate = VectorMigrationCreate(),
+    svc: AsyncVectorService = Depends(get_async_vector_service),
+):
+    """
+    Re-embed the collection into a new one in the background, then swap the
+    name over to it (an alias) without downtime. Poll `/vectors/migrations/{id}`.
+    """
+    try:
+        return await get_vector_migrations().start(svc, collection, payload)
+    except Exception as e:
+        _raise_http(e)
+
+@router.get("/migrations", response_model=list[VectorMigrationRead])
+def list_migrations():
+    return get_vector_migrations().list()
+
+@router.get("/migrations/{id}", response_model=VectorMigrationRead)
+def get_migration(id: str):
+    try:
+        return get_vector_migrations().get(id)
+    except Exception as e:
+        _raise_http(e)
+
+@router.delete("/migrations/{id}", response_model=VectorMigrationRead)
+async def cancel_migration(id: str):
+    """Stop a migration that hasn't swapped yet and drop its new collection."""
+    try:
+        return await get_vector_migrations().cancel(id)
+    except Exception as e:
+        _raise_http(e)
+
+@router.get("/aliases")
+def list_aliases(svc: VectorService = Depends(get_vector_service)):
+    return svc.aliases()
+
+@router.delete("/collections/{collection}", status_code=204)
+def delete_collection(collection: str, svc: VectorService = Depends(get_vector_service)):
+    try:
+        svc.delete_collection(collection)
+    except Exception as e:
+        _raise_http(e)
+    return None
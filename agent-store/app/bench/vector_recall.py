@@ -0,0 +1,270 @@
+# app/bench/vector_recall.py
+"""
+Exact vs. ANN benchmark for a vector collection.
+
+Exact top-k is computed by NumPy brute force over the stored embeddings and
+compared with what `VectorRepository.query` (HNSW) returns: recall@k plus
+latency percentiles and throughput at several concurrency levels.
+
+Runs offline: queries are embeddings (sampled from the collection with
+noise, or read from a JSONL file), never sent through a model unless the
+file contains texts. Use `--synthetic` for a generated collection.
+
+    agent-store-bench --synthetic 20000 --dim 384 -k 10 --concurrency 1 4 16
+    agent-store-bench --path ./data/chroma --collection support --queries queries.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, cast
+
+import chromadb
+import numpy as np
+from chromadb import ClientAPI
+
+from app.contracts.contract_vectors import VectorCreate, VectorIndexConfig, VectorQueryRequest
+from app.internal.store import db_vector
+from app.internal.store.collection_aliases import CollectionAliases
+from app.internal.store.collection_registry import CollectionRegistry
+from app.internal.store.repository_vectors import VectorRepository
+
+DEFAULT_K = 10
+DEFAULT_CONCURRENCY = (1, 4, 16)
+LOAD_PAGE = 5000
+
+
+@dataclass
+class LevelResult:
+    concurrency: int
+    queries: int
+    recall_at_k: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    qps: float
+
+
+def load_embeddings(repo: VectorRepository, collection: str) -> Tuple[List[str], np.ndarray]:
+    """All ids and embeddings of the collection, paged."""
+    # The registry would create a missing (e.g. misspelled) collection.
+    if not repo.collection_exists(collection):
+        raise ValueError(f"no collection '{collection}'")
+    col = repo.registry.get(collection)
+    ids: List[str] = []
+    rows: List[np.ndarray] = []
+    offset = 0
+    while True:
+        page = col.get(include=cast(Any, ["embeddings"]), limit=LOAD_PAGE, offset=offset)
+        page_ids = cast(List[str], page.get("ids") or [])
+        if not page_ids:
+            break
+        ids.extend(page_ids)
+        rows.append(np.asarray(page["embeddings"], dtype=np.float32))
+        offset += len(page_ids)
+    if not rows:
+        raise ValueError(f"collection '{collection}' has no embeddings")
+    return ids, np.concatenate(rows)
+
+
+def exact_top_k(matrix: np.ndarray, queries: np.ndarray, k: int, space: str = "l2") -> np.ndarray:
+    """
+    Brute-force top-k row indices per query (queries x k), best first, in
+    the collection's distance space.
+    """
+    if space == "cosine":
+        m = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        q = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        scores = -(q @ m.T)
+    elif space == "ip":
+        scores = -(queries @ matrix.T)
+    else:
+        # Squared L2 without materializing the differences.
+        scores = (queries ** 2).sum(1)[:, None] - 2.0 * (queries @ matrix.T) + (matrix ** 2).sum(1)[None, :]
+    k = min(k, matrix.shape[0])
+    top = np.argpartition(scores, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def recall_at_k(exact: Sequence[Sequence[str]], approximate: Sequence[Sequence[str]]) -> float:
+    hits = sum(len(set(e) & set(a)) for e, a in zip(exact, approximate))
+    total = sum(len(e) for e in exact)
+    return hits / total if total else 1.0
+
+
+def sample_queries(matrix: np.ndarray, count: int, noise: float = 0.05, seed: int = 0) -> np.ndarray:
+    """Stored vectors plus Gaussian noise, scaled to the vectors' norm."""
+    rng = np.random.default_rng(seed)
+    picks = matrix[rng.integers(0, matrix.shape[0], size=count)]
+    scale = noise * float(np.linalg.norm(picks, axis=1).mean()) / np.sqrt(matrix.shape[1])
+    return (picks + rng.normal(0.0, scale, size=picks.shape)).astype(np.float32)
+
+
+def read_queries(repo: VectorRepository, collection: str, path: str) -> np.ndarray:
+    """
+    JSONL with {"embedding": [...]} or {"query": "..."} per line; texts are
+    embedded once with the collection's embedding function.
+    """
+    vectors: List[Any] = []
+    texts: List[str] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if "embedding" in row:
+                vectors.append(row["embedding"])
+            else:
+                texts.append(row["query"])
+    if texts:
+        vectors.extend(repo.registry.embed_queries(collection, texts))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def build_synthetic_collection(
+    repo: VectorRepository,
+    collection: str,
+    count: int,
+    dim: int,
+    *,
+    clusters: int = 32,
+    seed: int = 0,
+    index: Optional[VectorIndexConfig] = None,
+) -> None:
+    """Clustered random vectors (closer to real embeddings than uniform noise)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, size=count)] + 0.3 * rng.normal(size=(count, dim))
+    repo.create_collection(collection, index or VectorIndexConfig())
+    items = [
+        VectorCreate(id=f"syn_{i}", collection=collection, document=f"synthetic {i}", embedding=vectors[i].tolist())
+        for i in range(count)
+    ]
+    failures = repo.create_vectors(collection, items, batch_size=2048)
+    if failures:
+        raise RuntimeError(f"synthetic ingest failed: {failures[0][1]}")
+
+
+def collection_space(repo: VectorRepository, collection: str) -> str:
+    configuration = repo.registry.get(collection).configuration or {}
+    return (configuration.get("hnsw") or {}).get("space") or "l2"
+
+
+def run_benchmark(
+    repo: VectorRepository,
+    collection: str,
+    queries: np.ndarray,
+    *,
+    k: int = DEFAULT_K,
+    concurrency: Sequence[int] = DEFAULT_CONCURRENCY,
+) -> Dict[str, Any]:
+    ids, matrix = load_embeddings(repo, collection)
+    if queries.shape[1] != matrix.shape[1]:
+        raise ValueError(f"queries have dimension {queries.shape[1]}, collection has {matrix.shape[1]}")
+    space = collection_space(repo, collection)
+
+    start = time.perf_counter()
+    exact = [[ids[i] for i in row] for row in exact_top_k(matrix, queries, k, space)]
+    exact_ms = (time.perf_counter() - start) * 1000.0
+
+    def one(vector: np.ndarray) -> Tuple[List[str], float]:
+        req = VectorQueryRequest(
+            collection=collection, query_embeddings=[vector.tolist()], n_results=k, include=["ids"]
+        )
+        t0 = time.perf_counter()
+        res = repo.query(req)
+        return [hit.id for hit in res.hits], (time.perf_counter() - t0) * 1000.0
+
+    levels: List[LevelResult] = []
+    for workers in concurrency:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            t0 = time.perf_counter()
+            results = list(pool.map(one, queries))
+            wall = time.perf_counter() - t0
+        latencies = np.array([ms for _, ms in results])
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        levels.append(LevelResult(
+            concurrency=workers,
+            queries=len(results),
+            recall_at_k=round(recall_at_k(exact, [found for found, _ in results]), 4),
+            p50_ms=round(float(p50), 3),
+            p95_ms=round(float(p95), 3),
+            p99_ms=round(float(p99), 3),
+            qps=round(len(results) / wall, 1),
+        ))
+
+    return {
+        "collection": collection,
+        "records": len(ids),
+        "dim": int(matrix.shape[1]),
+        "space": space,
+        "k": k,
+        "exact_ms_per_query": round(exact_ms / len(queries), 3),
+        "index": repo.collection_info(collection).metadata,
+        "levels": [asdict(level) for level in levels],
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{report['collection']}: {report['records']} x {report['dim']} ({report['space']}), k={report['k']}, "
+        f"exact {report['exact_ms_per_query']} ms/query",
+        f"{'conc':>5} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'qps':>9}",
+    ]
+    for level in report["levels"]:
+        lines.append(
+            f"{level['concurrency']:>5} {level['recall_at_k']:>9.4f} {level['p50_ms']:>8.2f} "
+            f"{level['p95_ms']:>8.2f} {level['p99_ms']:>8.2f} {level['qps']:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="agent-store-bench", description="Exact vs. ANN recall/latency benchmark")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--collection", help="existing collection to benchmark")
+    source.add_argument("--synthetic", type=int, metavar="N", help="generate an in-memory collection of N vectors")
+    parser.add_argument("--path", help="persistent Chroma directory (default: in-memory)")
+    parser.add_argument("--dim", type=int, default=384, help="synthetic vector dimension")
+    parser.add_argument("--space", choices=["cosine", "l2", "ip"], help="synthetic collection distance space")
+    parser.add_argument("--search-ef", type=int, help="synthetic collection search_ef")
+    parser.add_argument("--queries", help="JSONL query set ({'embedding': [...]} or {'query': '...'})")
+    parser.add_argument("--sample", type=int, default=200, help="queries sampled from the collection")
+    parser.add_argument("-k", type=int, default=DEFAULT_K)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=list(DEFAULT_CONCURRENCY))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    client: ClientAPI = chromadb.PersistentClient(path=args.path) if args.path else chromadb.EphemeralClient()
+    aliases = CollectionAliases(Path(args.path) / db_vector.ALIASES_FILE if args.path else None)
+    repo = VectorRepository(client, registry=CollectionRegistry(client, aliases=aliases))
+    collection = args.collection
+    if args.synthetic:
+        collection = f"bench_{args.synthetic}_{args.dim}"
+        if repo.collection_exists(collection):
+            client.delete_collection(collection)
+        index = VectorIndexConfig(space=args.space, search_ef=args.search_ef)
+        build_synthetic_collection(repo, collection, args.synthetic, args.dim, seed=args.seed, index=index)
+    elif not repo.collection_exists(collection):
+        parser.error(f"no collection '{collection}'" + (f" in {args.path}" if args.path else ""))
+
+    if args.queries:
+        queries = read_queries(repo, collection, args.queries)
+    else:
+        _, matrix = load_embeddings(repo, collection)
+        queries = sample_queries(matrix, args.sample, seed=args.seed)
+
+    report = run_benchmark(repo, collection, queries, k=args.k, concurrency=args.concurrency)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# app/cli/vector_snapshot.py
+"""
+Binary snapshots of vector collections, offline.
+
+A snapshot is a directory: embeddings as a raw float32 `.npy` array plus
+ids, documents and metadata as one JSONL column file each and a manifest
+with the HNSW settings. Restoring memory-maps the array and bulk-loads the
+stored embeddings, so nothing is re-embedded.
+
+    agent-store-snapshot save support ./backups/support
+    agent-store-snapshot restore ./backups/support --collection support_v2
+    agent-store-snapshot info ./backups/support
+
+Works on the persistent store at `--path` (default: [tool.vectors]
+persist-path); stop the server first or use the snapshot API instead.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional, Sequence
+
+import chromadb
+
+from app.config.vector_config import vector_config
+from app.internal.store import db_vector
+from app.internal.store.collection_aliases import CollectionAliases
+from app.internal.store.collection_registry import CollectionRegistry
+from app.internal.store.repository_vectors import DEFAULT_BATCH_SIZE, SCAN_PAGE_SIZE, VectorRepository
+from app.internal.store.vector_snapshot import read_manifest
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="agent-store-snapshot", description="Snapshot and restore vector collections")
+    parser.add_argument(
+        "--path",
+        default=vector_config.get("persist-path", db_vector.CHROMA_PATH),
+        help="persistent Chroma directory",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    save = commands.add_parser("save", help="write a collection to a snapshot directory")
+    save.add_argument("collection")
+    save.add_argument("dest", type=Path, help="snapshot directory to create")
+    save.add_argument("--page-size", type=int, default=SCAN_PAGE_SIZE)
+
+    restore = commands.add_parser("restore", help="create a collection from a snapshot")
+    restore.add_argument("source", type=Path)
+    restore.add_argument("--collection", help="collection name (default: the snapshotted one)")
+    restore.add_argument("--replace", action="store_true", help="replace an existing collection of that name once restored")
+    restore.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    info = commands.add_parser("info", help="print a snapshot's manifest")
+    info.add_argument("source", type=Path)
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        print(json.dumps(asdict(read_manifest(args.source)), indent=2))
+        return 0
+
+    client = chromadb.PersistentClient(path=args.path)
+    aliases = CollectionAliases(Path(args.path) / db_vector.ALIASES_FILE)
+    repo = VectorRepository(client, registry=CollectionRegistry(client, aliases=aliases))
+    if args.command == "save":
+        if not repo.collection_exists(args.collection):
+            parser.error(f"no collection '{args.collection}' in {args.path}")
+        manifest = repo.snapshot_collection(args.collection, args.dest, page_size=args.page_size)
+        print(f"saved {manifest.count} records of '{args.collection}' to {args.dest}")
+        return 0
+
+    collection = args.collection or read_manifest(args.source).collection
+    if not args.replace and repo.collection_exists(collection):
+        parser.error(f"collection '{collection}' exists; pass --replace to overwrite it")
+    restored = repo.restore_collection(args.source, collection, batch_size=args.batch_size, replace=args.replace)
+    print(f"restored {restored.count} records into '{collection}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
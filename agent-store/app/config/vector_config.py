@@ -0,0 +1,18 @@
+# app/config/vector_config.py
+import os
+import tomllib
+from pathlib import Path
+
+CONFIG_PATH = Path(__file__).resolve().parents[2] / "pyproject.toml"
+
+with open(CONFIG_PATH, "rb") as f:
+    config = tomllib.load(f)
+
+_vectors = config["tool"].get("vectors", {})
+
+# AGENT_STORE_VECTOR_PROFILE=<name> overlays [tool.vectors.profiles.<name>].
+vector_profile = os.environ.get("AGENT_STORE_VECTOR_PROFILE")
+vector_config = {
+    **{k: v for k, v in _vectors.items() if k != "profiles"},
+    **_vectors.get("profiles", {}).get(vector_profile or "", {}),
+}
@@ -1,16 +1,91 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Union
-from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, List, Literal, Optional, Union
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 Metadata = Dict[str, Any]
 
+# None (default) returns both `hits` and `grouped`.
+VectorQueryShape = Literal["flat", "grouped", "columnar"]
+VectorQueryField = Literal["ids", "documents", "metadatas", "distances"]
+VectorSpace = Literal["cosine", "l2", "ip"]
+# "lexical" ranks by BM25 only; "hybrid" fuses BM25 and embedding rankings (RRF).
+VectorRetrievalMode = Literal["vector", "lexical", "hybrid"]
+
 
 class VectorCreate(BaseModel):
     id: str
     collection: str
     document: str
     metadata: Metadata = Field(default_factory=dict)
+    # Precomputed embedding; skips the embedding function for this item.
+    embedding: Optional[List[float]] = None
+
+
+class VectorItemError(BaseModel):
+    index: int  # position of the item in the submitted payload
+    collection: Optional[str] = None
+    id: Optional[str] = None
+    error: str
+
+
+VectorDedupMode = Literal["reject", "merge"]
+
+
+class VectorDedup(BaseModel):
+    """
+    Opt-in near-duplicate check on ingest. Items whose document is at least
+    `threshold` similar (estimated Jaccard of word 3-shingles) to a stored
+    record or an earlier item are either dropped ("reject") or written over
+    that record's id ("merge": the newer content wins).
+    """
+    mode: VectorDedupMode = "reject"
+    threshold: float = Field(0.9, gt=0.0, le=1.0)
+
+
+class VectorDuplicate(BaseModel):
+    index: int  # position of the item in the submitted payload
+    collection: str
+    id: str
+    duplicate_of: str
+    similarity: float
+
+
+class VectorBulkCreateResponse(BaseModel):
+    ok: bool
+    created: int
+    failed: List[VectorItemError] = Field(default_factory=list)
+    collapsed: Optional[List[VectorDuplicate]] = None  # only with dedup
+
+
+class VectorChunking(BaseModel):
+    unit: Literal["chars", "tokens"] = "chars"  # tokens needs tiktoken
+    size: int = Field(1000, gt=0)
+    overlap: int = Field(200, ge=0)
+    encoding: str = "cl100k_base"  # tiktoken encoding, tokens only
+
+    @model_validator(mode="after")
+    def _overlap_below_size(self) -> "VectorChunking":
+        if self.overlap >= self.size:
+            raise ValueError("'overlap' must be smaller than 'size'")
+        return self
+
+
+class VectorDocumentIngest(BaseModel):
+    """
+    Whole documents, chunked server-side. Chunk i of document `id` is stored
+    as `<id>#<i>` with the document metadata plus parent_id, chunk_index,
+    chunk_count, chunk_start and chunk_end (character offsets).
+    """
+    documents: List[VectorCreate]
+    chunking: VectorChunking = Field(default_factory=VectorChunking)
+
+
+class VectorDocumentIngestResponse(BaseModel):
+    ok: bool
+    documents: int
+    chunks: int
+    failed: List[VectorItemError] = Field(default_factory=list)  # index = document position
 
 
 class VectorUpdate(BaseModel):
@@ -20,6 +95,40 @@ class VectorUpdate(BaseModel):
     metadata: Optional[Metadata] = None  # patch semantics (merge in repo)
 
 
+class VectorPatchItem(BaseModel):
+    id: str
+    document: Optional[str] = None
+    metadata: Optional[Metadata] = None  # patch semantics, None values delete keys
+
+
+class VectorBulkUpdate(BaseModel):
+    collection: str
+    items: List[VectorPatchItem]
+
+
+class VectorBulkUpdateResponse(BaseModel):
+    ok: bool
+    updated: int
+    missing: List[str] = Field(default_factory=list)
+    failed: List[VectorItemError] = Field(default_factory=list)
+
+
+class VectorDeleteRequest(BaseModel):
+    """
+    Delete by ids and/or Chroma filters, e.g. purge stale docs with
+    where={"$and": [{"type": "known_issues"}, {"updated_at": {"$lt": 1736467200}}]}
+    (range operators need numeric metadata such as unix timestamps).
+    """
+    collection: str
+    ids: Optional[List[str]] = None
+    where: Optional[Metadata] = None
+    where_document: Optional[Dict[str, Any]] = None
+
+
+class VectorDeleteResponse(BaseModel):
+    deleted: int
+
+
 class VectorRead(BaseModel):
     collection: str
     id: str
@@ -28,24 +137,153 @@ class VectorRead(BaseModel):
     metadata: Metadata = Field(default_factory=dict)
 
 
+# A collection scan streams NDJSON `VectorRecord` lines or one Arrow IPC stream.
+VectorExportFormat = Literal["ndjson", "arrow"]
+
+
+class VectorRecord(VectorRead):
+    embedding: Optional[List[float]] = None  # only when requested
+
+
 class VectorCollectionRead(BaseModel):
     collection: str
     count: int
+    # User metadata plus the active index settings as hnsw:* keys.
+    metadata: Metadata = Field(default_factory=dict)
+
+
+class VectorSnapshotCreate(BaseModel):
+    name: Optional[str] = None  # default: <collection>-<UTC timestamp>
+
+
+class VectorSnapshotRestore(BaseModel):
+    collection: Optional[str] = None  # default: the snapshotted collection's name
+    replace: bool = False  # replace an existing collection of that name once restored
+
+
+class VectorSnapshotRead(BaseModel):
+    name: str
+    collection: str
+    count: int
+    dimension: Optional[int] = None
+    created_at: float
+
+
+class VectorIndexConfig(BaseModel):
+    """
+    HNSW settings of a collection. `space`, `construction_ef` and `M` are
+    fixed at creation; the others can be changed later. Unset fields keep
+    Chroma's defaults (or the current value).
+    """
+    space: Optional[VectorSpace] = None  # hnsw:space
+    construction_ef: Optional[int] = Field(None, gt=0)
+    search_ef: Optional[int] = Field(None, gt=0)
+    M: Optional[int] = Field(None, gt=0)
+    batch_size: Optional[int] = Field(None, gt=0)
+    sync_threshold: Optional[int] = Field(None, gt=0)
+
+
+class VectorCollectionCreate(BaseModel):
+    collection: str
+    index: VectorIndexConfig = Field(default_factory=VectorIndexConfig)
     metadata: Metadata = Field(default_factory=dict)
 
 
+# copying -> catching_up -> swapping -> swapped -> completed (old collection
+# dropped); failed / cancelled drop the new collection instead.
+VectorMigrationStatus = Literal["copying", "catching_up", "swapping", "swapped", "completed", "failed", "cancelled"]
+
+
+class VectorMigrationCreate(BaseModel):
+    """
+    Re-embed a collection into a new physical collection, then point the
+    collection's name at it.
+    """
+    # Settings of the new collection; unset ones are copied from the current one.
+    index: VectorIndexConfig = Field(default_factory=VectorIndexConfig)
+    # Id of a configured embedding model ([tool.vectors.embedding-models]) to
+    # re-embed with; None keeps the collection's own embedding function.
+    embedding_model: Optional[str] = None
+    batch_size: int = Field(256, ge=1)
+    max_records_per_second: Optional[float] = Field(None, gt=0)  # throttle; None copies flat out
+    grace_seconds: float = Field(300.0, ge=0)  # before the old collection is deleted
+
+
+class VectorMigrationRead(BaseModel):
+    id: str
+    collection: str  # the name (alias) being migrated
+    source: str  # physical collections
+    target: str
+    embedding_model: Optional[str] = None  # of the target; None: same as the source
+    status: VectorMigrationStatus
+    total: int  # records in the source when the copy started
+    copied: int = 0
+    caught_up: int = 0  # re-copied or deleted because of writes during the copy
+    error: Optional[str] = None
+    started_at: float
+    swapped_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
 class VectorQueryRequest(BaseModel):
     collection: str
-    query: Union[str, List[str]]
+    # Exactly one of `query` (texts) and `query_embeddings` (precomputed vectors).
+    query: Optional[Union[str, List[str]]] = None
+    query_embeddings: Optional[List[List[float]]] = None
     n_results: int = 5
     where: Optional[Metadata] = None
     where_document: Optional[Dict[str, Any]] = None
+    shape: Optional[VectorQueryShape] = None
+    retrieval: VectorRetrievalMode = "vector"
+    # MMR re-ranking: lambda in [0, 1] (1 = pure relevance, lower = more
+    # diverse hits), chosen from n_results * mmr_fetch_factor candidates.
+    mmr: Optional[float] = Field(None, ge=0.0, le=1.0)
+    mmr_fetch_factor: int = Field(4, ge=1, le=20)
+    include: List[VectorQueryField] = Field(default_factory=lambda: ["ids", "documents", "metadatas", "distances"])
+
+
+class VectorMultiQueryRequest(BaseModel):
+    """
+    One query fanned out over several collections; hits are merged into a
+    global top `n_results` by distance (comparable only when the collections
+    share an embedding model and distance space).
+    """
+    collections: List[str] = Field(min_length=1, max_length=32)
+    query: Optional[Union[str, List[str]]] = None
+    query_embeddings: Optional[List[List[float]]] = None
+    n_results: int = 5
+    where: Optional[Metadata] = None
+    where_document: Optional[Dict[str, Any]] = None
+    shape: Optional[VectorQueryShape] = None
+    include: List[VectorQueryField] = Field(default_factory=lambda: ["ids", "documents", "metadatas", "distances"])
+
+    def for_collection(self, collection: str) -> VectorQueryRequest:
+        """The per-collection query; always grouped hits with distances, for merging."""
+        return VectorQueryRequest(
+            collection=collection,
+            query=self.query,
+            query_embeddings=self.query_embeddings,
+            n_results=self.n_results,
+            where=self.where,
+            where_document=self.where_document,
+            include=list(dict.fromkeys([*self.include, "distances"])),
+        )
 
 
 class VectorQueryHit(VectorRead):
-    distance: Optional[float] = None
+    distance: Optional[float] = None  # None for hits found by BM25 only
+
+
+class VectorQueryColumns(BaseModel):
+    """Parallel arrays, one inner list per query text."""
+    ids: Optional[List[List[str]]] = None
+    documents: Optional[List[List[Optional[str]]]] = None
+    metadatas: Optional[List[List[Optional[Metadata]]]] = None
+    distances: Optional[List[List[Optional[float]]]] = None
+    collections: Optional[List[List[str]]] = None  # multi-collection queries only
 
 
 class VectorQueryResponse(BaseModel):
-    hits: List[VectorQueryHit]
+    hits: List[VectorQueryHit] = Field(default_factory=list)
     grouped: List[List[VectorQueryHit]] = Field(default_factory=list)
+    columns: Optional[VectorQueryColumns] = None
@@ -0,0 +1,112 @@
+# app/internal/services/query_coalescer.py
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from app.contracts.contract_vectors import VectorQueryRequest, VectorQueryResponse
+
+DEFAULT_WINDOW_MS = 3.0
+DEFAULT_MAX_BATCH = 32
+
+RunBatch = Callable[[VectorQueryRequest], Awaitable[VectorQueryResponse]]
+
+
+@dataclass
+class _PendingBatch:
+    template: VectorQueryRequest
+    run: RunBatch
+    queries: List[str] = field(default_factory=list)
+    positions: Dict[str, int] = field(default_factory=dict)
+    # (caller future, index into queries, caller's n_results)
+    waiters: List[Tuple["asyncio.Future[VectorQueryResponse]", int, int]] = field(default_factory=list)
+    n_results: int = 0
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class QueryCoalescer:
+    """
+    Micro-batches concurrent single-text queries.
+
+    Queries sharing a key (collection + filters) that arrive within
+    `window_ms` of the first one, or until `max_batch` distinct texts are
+    collected, are sent as one multi-text query: one embedding pass and one
+    ANN call. Each caller gets back its own group of hits, cut to the
+    `n_results` it asked for (the batch uses the largest one, so callers
+    must put `n_results` in the key when it changes more than the cut).
+    """
+
+    def __init__(self, window_ms: float = DEFAULT_WINDOW_MS, max_batch: int = DEFAULT_MAX_BATCH):
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._pending: Dict[Hashable, _PendingBatch] = {}
+        # The loop only keeps weak references to tasks.
+        self._running: Set["asyncio.Task[None]"] = set()
+        self.batches = 0
+        self.queries = 0
+
+    async def submit(self, key: Hashable, req: VectorQueryRequest, run: RunBatch) -> VectorQueryResponse:
+        if not isinstance(req.query, str):
+            raise ValueError("only single-text queries can be coalesced")
+
+        loop = asyncio.get_running_loop()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _PendingBatch(template=req, run=run)
+            batch.timer = loop.call_later(self.window, self._flush, key, batch)
+            self._pending[key] = batch
+
+        position = batch.positions.get(req.query)
+        if position is None:
+            position = len(batch.queries)
+            batch.positions[req.query] = position
+            batch.queries.append(req.query)
+
+        future: asyncio.Future[VectorQueryResponse] = loop.create_future()
+        batch.waiters.append((future, position, req.n_results))
+        batch.n_results = max(batch.n_results, req.n_results)
+        self.queries += 1
+
+        if len(batch.queries) >= self.max_batch:
+            self._flush(key, batch)
+
+        return await future
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch": self.max_batch,
+            "queries": self.queries,
+            "batches": self.batches,
+            "pending": sum(len(b.waiters) for b in self._pending.values()),
+        }
+
+    def _flush(self, key: Hashable, batch: _PendingBatch) -> None:
+        # The timer and a full batch can both trigger; only flush once.
+        if self._pending.get(key) is not batch:
+            return
+        del self._pending[key]
+        if batch.timer is not None:
+            batch.timer.cancel()
+        self.batches += 1
+        task = asyncio.get_running_loop().create_task(self._execute(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    @staticmethod
+    async def _execute(batch: _PendingBatch) -> None:
+        req = batch.template.model_copy(update={"query": list(batch.queries), "n_results": batch.n_results})
+        try:
+            res = await batch.run(req)
+        except Exception as e:
+            for future, _, _ in batch.waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, position, n_results in batch.waiters:
+            if future.done():
+                continue
+            hits = res.grouped[position][:n_results] if position < len(res.grouped) else []
+            future.set_result(VectorQueryResponse(hits=hits, grouped=[hits]))
@@ -0,0 +1,235 @@
+# app/internal/services/service_vector_ingest.py
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError as PydanticValidationError
+from app.contracts.contract_vectors import VectorCreate, VectorDedup
+from app.internal.services.service_vectors_async import AsyncVectorService
+from app.internal.store.repository_vectors import DEFAULT_BATCH_SIZE
+
+# Number of parsed batches allowed to wait for the writer. Once full, the
+# parser stops pulling the request body, so memory is bounded by
+# roughly (max_pending_batches + 1) * batch_size items.
+DEFAULT_MAX_PENDING_BATCHES = 4
+
+# A single NDJSON line may never grow past this, even without a newline.
+MAX_LINE_BYTES = 8 * 1024 * 1024
+
+_DONE = object()
+
+
+@dataclass
+class _Batch:
+    lines: List[int] = field(default_factory=list)
+    items: List[VectorCreate] = field(default_factory=list)
+
+
+@dataclass
+class _Counters:
+    received: int = 0
+    created: int = 0
+    failed: int = 0
+    collapsed: int = 0
+    batches: int = 0
+
+
+class VectorIngestPipeline:
+    """
+    Streaming NDJSON ingest.
+
+    Two stages connected by a bounded queue:
+    - parse: reads the request body line by line and validates each line
+      into a `VectorCreate`, grouping them into batches;
+    - write: hands each batch to `AsyncVectorService.create_many`, which
+      embeds and writes it on the vector executor.
+
+    Progress and per-line errors are emitted as NDJSON events while the
+    upload is still being read.
+    """
+
+    def __init__(
+        self,
+        svc: AsyncVectorService,
+        *,
+        upsert: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_pending_batches: int = DEFAULT_MAX_PENDING_BATCHES,
+        dedup: Optional[VectorDedup] = None,
+    ):
+        self.svc = svc
+        self.upsert = upsert
+        self.batch_size = batch_size
+        self.dedup = dedup
+        self.max_pending_batches = max_pending_batches
+
+    async def run(self, body: AsyncIterator[bytes]) -> AsyncIterator[str]:
+        """
+        Consume `body` and yield NDJSON event lines.
+        """
+        batches: asyncio.Queue[Any] = asyncio.Queue(maxsize=self.max_pending_batches)
+        events: asyncio.Queue[Any] = asyncio.Queue()
+        counters = _Counters()
+
+        parser = asyncio.create_task(self._parse(body, batches, events, counters))
+        writer = asyncio.create_task(self._write(batches, events, counters))
+
+        async def supervise() -> None:
+            try:
+                await asyncio.gather(parser, writer)
+            except Exception as e:
+                # A failing stage stops the other one; report instead of
+                # breaking an already started response.
+                parser.cancel()
+                writer.cancel()
+                await events.put({"event": "aborted", "error": str(e)})
+            finally:
+                await events.put(_DONE)
+
+        supervisor = asyncio.create_task(supervise())
+
+        try:
+            while True:
+                event = await events.get()
+                if event is _DONE:
+                    break
+                yield self._dump(event)
+
+            yield self._dump(
+                {
+                    "event": "done",
+                    "received": counters.received,
+                    "created": counters.created,
+                    "failed": counters.failed,
+                    **({"collapsed": counters.collapsed} if self.dedup else {}),
+                }
+            )
+        finally:
+            for task in (parser, writer, supervisor):
+                task.cancel()
+
+    # -------------------------
+    # Stages
+    # -------------------------
+
+    async def _parse(
+        self,
+        body: AsyncIterator[bytes],
+        batches: asyncio.Queue[Any],
+        events: asyncio.Queue[Any],
+        counters: _Counters,
+    ) -> None:
+        batch = _Batch()
+        try:
+            async for line_no, raw in self._iter_lines(body):
+                if not raw.strip():
+                    continue
+                counters.received += 1
+
+                item, error = self._parse_line(raw)
+                if item is None:
+                    counters.failed += 1
+                    await events.put({"event": "error", "line": line_no, "id": None, "error": error})
+                    continue
+
+                batch.lines.append(line_no)
+                batch.items.append(item)
+                if len(batch.items) >= self.batch_size:
+                    # Blocks while the writer is behind -> backpressure on the upload.
+                    await batches.put(batch)
+                    batch = _Batch()
+
+            if batch.items:
+                await batches.put(batch)
+        finally:
+            await batches.put(_DONE)
+
+    async def _write(
+        self,
+        batches: asyncio.Queue[Any],
+        events: asyncio.Queue[Any],
+        counters: _Counters,
+    ) -> None:
+        while True:
+            batch = await batches.get()
+            if batch is _DONE:
+                return
+
+            result = await self.svc.create_many(
+                batch.items, upsert=self.upsert, batch_size=self.batch_size, dedup=self.dedup
+            )
+
+            counters.batches += 1
+            counters.created += result.created
+            counters.failed += len(result.failed)
+            counters.collapsed += len(result.collapsed or [])
+            for duplicate in result.collapsed or []:
+                await events.put(
+                    {
+                        "event": "duplicate",
+                        "line": batch.lines[duplicate.index],
+                        "id": duplicate.id,
+                        "duplicate_of": duplicate.duplicate_of,
+                        "similarity": duplicate.similarity,
+                    }
+                )
+            for failure in result.failed:
+                await events.put(
+                    {
+                        "event": "error",
+                        "line": batch.lines[failure.index],
+                        "id": failure.id,
+                        "error": failure.error,
+                    }
+                )
+            await events.put(
+                {
+                    "event": "progress",
+                    "batch": counters.batches,
+                    "received": counters.received,
+                    "created": counters.created,
+                    "failed": counters.failed,
+                    **({"collapsed": counters.collapsed} if self.dedup else {}),
+                }
+            )
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+
+    @staticmethod
+    async def _iter_lines(body: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+        """
+        Split an arbitrary chunked byte stream into (1-based line number, line).
+        """
+        buffer = b""
+        line_no = 0
+        async for chunk in body:
+            if not chunk:
+                continue
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_no += 1
+                yield line_no, line
+            if len(buffer) > MAX_LINE_BYTES:
+                raise ValueError(f"NDJSON line {line_no + 1} exceeds {MAX_LINE_BYTES} bytes")
+        if buffer:
+            line_no += 1
+            yield line_no, buffer
+
+    @staticmethod
+    def _parse_line(raw: bytes) -> Tuple[Optional[VectorCreate], Optional[str]]:
+        try:
+            return VectorCreate.model_validate_json(raw), None
+        except PydanticValidationError as e:
+            return None, "; ".join(
+                f"{'.'.join(str(p) for p in err['loc']) or 'line'}: {err['msg']}" for err in e.errors()
+            )
+
+    @staticmethod
+    def _dump(event: Dict[str, Any]) -> str:
+        return json.dumps(event) + "\n"
@@ -0,0 +1,193 @@
+# app/internal/services/service_vector_migration.py
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from app.contracts.contract_vectors import VectorMigrationCreate, VectorMigrationRead
+from app.internal.services.errors import ConflictError, NotFoundError, ValidationError
+from app.internal.services.service_vectors_async import AsyncVectorService
+
+# Writes to the source during the copy are replayed in up to this many
+# passes while writes go on; the last one holds them off during the swap.
+MAX_CATCHUP_ROUNDS = 5
+ACTIVE = ("copying", "catching_up", "swapping")
+CANCELLABLE = ("copying", "catching_up")
+
+
+class VectorMigrationJob:
+    """
+    Background re-embedding of one collection.
+
+    1. copy: page through the source and upsert every record into a new
+       physical collection (created with the requested HNSW settings and
+       embedding model), which embeds it again with its own embedding
+       function; throttled to `max_records_per_second`. The source keeps
+       its embedding function, so it is queried as before until the swap;
+    2. catch up: writes that reached the source meanwhile (seen through its
+       generation counter) are replayed until a pass sees none, or for at
+       most `MAX_CATCHUP_ROUNDS` passes;
+    3. swap: with writes to the source held off, a last pass replays what
+       came in since and the collection's name becomes an alias of the new
+       collection, so readers and writers move over at once. The swap runs
+       to the end once started: it can't be cancelled through the API, and
+       a job cancelled meanwhile (on shutdown) waits for it and keeps the
+       new collection if the name already points there;
+    4. after `grace_seconds` the old collection is deleted, unless an alias
+       points at it again. It is recorded as retired next to the aliases,
+       so a restart before then deletes it on startup instead.
+
+    Failing or cancelling before the swap drops the new collection and
+    leaves the source untouched. Jobs live in this process only; the new
+    collection of one cut short by a restart is dropped on startup.
+    """
+
+    def __init__(self, svc: AsyncVectorService, collection: str, req: VectorMigrationCreate):
+        self.svc = svc
+        self.repo = svc.svc.repo
+        self.req = req
+        id = uuid.uuid4().hex[:12]
+        self.state = VectorMigrationRead(
+            id=id,
+            collection=collection,
+            source=self.repo.registry.resolve(collection),
+            target=f"{collection}.m{id[:8]}",
+            embedding_model=req.embedding_model,
+            status="copying",
+            total=0,
+            started_at=time.time(),
+        )
+        self.task: Optional[asyncio.Task[None]] = None
+        self._generation = 0  # of the source, as of the last copy or catch-up pass
+
+    async def start(self) -> None:
+        self.state.total = await self.svc.executor.run(
+            self.repo.create_migration_target,
+            self.state.collection, self.state.target, self.req.index, self.req.embedding_model,
+        )
+        self.task = asyncio.create_task(self.run())
+
+    async def run(self) -> None:
+        state = self.state
+        swap: Optional[asyncio.Future[int]] = None
+        try:
+            await self._copy()
+            state.status = "catching_up"
+            await self._catch_up()
+            state.status = "swapping"
+            swap = asyncio.ensure_future(self.svc.executor.run(
+                self.repo.finish_migration, state.collection, state.target, self._generation,
+                page_size=self.req.batch_size,
+            ))
+            # Shielded: the swap thread can't be stopped, so the task must not stop awaiting it.
+            state.caught_up += await asyncio.shield(swap)
+            state.status, state.swapped_at = "swapped", time.time()
+        except BaseException as e:
+            cancelled = isinstance(e, asyncio.CancelledError)
+            if swap is not None:
+                await asyncio.wait([swap])
+                if self.repo.registry.resolve(state.collection) == state.target:
+                    # Cancelled mid-swap, but the name moved over: the target is live now.
+                    state.status, state.swapped_at = "swapped", time.time()
+                    raise
+            state.status = "cancelled" if cancelled else "failed"
+            state.error = None if cancelled else str(e)
+            state.finished_at = time.time()
+            # Shielded: a cancelled job still cleans up after itself.
+            await asyncio.shield(self.svc.executor.run(self.repo.delete_collection, state.target, resolve=False))
+            if cancelled:
+                raise
+            return
+
+        await asyncio.sleep(self.req.grace_seconds)
+        await self.svc.executor.run(self.repo.drop_retired, state.source)
+        state.status, state.finished_at = "completed", time.time()
+
+    async def _copy(self) -> None:
+        pages = self.repo.scan(self.state.source, page_size=self.req.batch_size)
+        self._generation = self.repo.registry.generation(self.state.source)
+        started = time.perf_counter()
+        while (page := await self.svc.executor.run(next, pages, None)) is not None:
+            failures = await self.svc.executor.run(self.repo.copy_records, self.state.target, page)
+            if failures:
+                raise ValueError(f"{len(failures)} record(s) could not be copied: {failures[0][1]}")
+            self.state.copied += len(page["ids"])
+            if self.req.max_records_per_second:
+                ahead = self.state.copied / self.req.max_records_per_second - (time.perf_counter() - started)
+                await asyncio.sleep(max(0.0, ahead))
+            else:
+                await asyncio.sleep(0)  # let queries in between pages
+
+    async def _catch_up(self) -> None:
+        for _ in range(MAX_CATCHUP_ROUNDS):
+            generation = self.repo.registry.generation(self.state.source)
+            if generation == self._generation:
+                return
+            self._generation = generation
+            self.state.caught_up += await self.svc.executor.run(
+                self.repo.reconcile_records, self.state.source, self.state.target, page_size=self.req.batch_size,
+            )
+
+
+class VectorMigrations:
+    """Running and finished migration jobs of this process, by id."""
+
+    def __init__(self):
+        self._jobs: Dict[str, VectorMigrationJob] = {}
+
+    async def start(self, svc: AsyncVectorService, collection: str, req: VectorMigrationCreate) -> VectorMigrationRead:
+        collection = await svc.executor.run(svc.svc.migration_source, collection, req.embedding_model)
+        active = [j for j in self._jobs.values() if j.state.collection == collection and j.state.status in ACTIVE]
+        if active:
+            raise ConflictError(resource="Migration", field="collection", value=collection)
+        job = VectorMigrationJob(svc, collection, req)
+        await job.start()
+        self._jobs[job.state.id] = job
+        return job.state.model_copy()
+
+    def get(self, id: str) -> VectorMigrationRead:
+        return self._job(id).state.model_copy()
+
+    def list(self) -> List[VectorMigrationRead]:
+        return [job.state.model_copy() for job in self._jobs.values()]
+
+    async def cancel(self, id: str) -> VectorMigrationRead:
+        job = self._job(id)
+        if job.state.status not in CANCELLABLE or job.task is None:
+            raise ValidationError(f"migration '{id}' is {job.state.status}; only copying or catching up can be cancelled")
+        job.task.cancel()
+        try:
+            await job.task
+        except asyncio.CancelledError:
+            pass
+        return job.state.model_copy()
+
+    def shutdown(self) -> None:
+        for job in self._jobs.values():
+            if job.task is not None:
+                job.task.cancel()
+
+    def _job(self, id: str) -> VectorMigrationJob:
+        job = self._jobs.get(id)
+        if job is None:
+            raise NotFoundError(resource="Migration", identifier=id)
+        return job
+
+
+_migrations: Optional[VectorMigrations] = None
+
+
+def get_vector_migrations() -> VectorMigrations:
+    global _migrations
+    if _migrations is None:
+        _migrations = VectorMigrations()
+    return _migrations
+
+
+def shutdown_vector_migrations() -> None:
+    global _migrations
+    if _migrations is not None:
+        _migrations.shutdown()
+        _migrations = None
@@ -0,0 +1,73 @@
+# app/internal/services/service_vector_warmup.py
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List, Literal, Optional, Sequence
+
+from app.internal.services.service_vectors_async import VectorExecutor
+from app.internal.store.repository_vectors import VectorRepository
+
+WarmupState = Literal["pending", "running", "done"]
+
+
+class VectorWarmup:
+    """
+    Startup warmup of the hot collections ("*" = all existing ones), so the
+    first real query doesn't pay for loading segments and the embedding
+    model. Readiness is gated on it.
+
+    A collection that fails to warm is reported but doesn't block
+    readiness; it just stays cold. Names are resolved through aliases;
+    collections that don't exist are skipped rather than created.
+    """
+
+    def __init__(self, collections: Sequence[str]):
+        self.collections = list(collections)
+        self.state: WarmupState = "pending"
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.errors: Dict[str, str] = {}
+        self.skipped: List[str] = []
+        self.duration_ms: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "done"
+
+    def run(self, repo: VectorRepository) -> None:
+        self.state = "running"
+        start = time.perf_counter()
+        try:
+            if not self.collections:
+                return
+            existing = set(repo.collection_names())
+            aliases = repo.aliases()
+            if "*" in self.collections:
+                # Aliases under their own name; the collections behind them once.
+                names = sorted(aliases) + sorted(existing - set(aliases.values()))
+            else:
+                names = self.collections
+            for name in names:
+                if repo.registry.resolve(name) not in existing:
+                    self.skipped.append(name)
+                    continue
+                try:
+                    self.results[name] = repo.warm_collection(name)
+                except Exception as e:
+                    self.errors[name] = str(e)
+        except Exception as e:
+            self.errors["*"] = str(e)
+        finally:
+            self.duration_ms = round((time.perf_counter() - start) * 1000.0, 1)
+            self.state = "done"
+
+    async def start(self, executor: VectorExecutor, repo: VectorRepository) -> None:
+        await executor.run(self.run, repo)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "collections": self.results,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "duration_ms": self.duration_ms,
+        }
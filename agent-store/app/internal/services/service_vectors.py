@@ -1,19 +1,45 @@
 # app/internal/services/service_vectors.py
 from __future__ import annotations
 
-from typing import List, Optional, Sequence, Union
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from chromadb.errors import NotFoundError as ChromaNotFoundError
 
 from app.contracts.contract_vectors import (
+    VectorBulkCreateResponse,
+    VectorBulkUpdate,
+    VectorBulkUpdateResponse,
     VectorCreate,
+    VectorDeleteRequest,
+    VectorDedup,
+    VectorDeleteResponse,
+    VectorDocumentIngest,
+    VectorDocumentIngestResponse,
+    VectorDuplicate,
+    VectorItemError,
     VectorUpdate,
     VectorRead,
+    VectorMultiQueryRequest,
     VectorQueryRequest,
     VectorQueryResponse,
-    VectorCollectionRead
+    VectorCollectionCreate,
+    VectorCollectionRead,
+    VectorIndexConfig,
+    VectorSnapshotCreate,
+    VectorSnapshotRead,
+    VectorSnapshotRestore,
 )
 
-from app.internal.services.errors import NotFoundError, ValidationError
-from app.internal.store.repository_vectors import VectorRepository
+from app.internal.services.errors import ConflictError, NotFoundError, ValidationError
+from app.internal.services.vector_chunking import chunk_texts, tokens_available
+from app.internal.store.repository_vectors import DEFAULT_BATCH_SIZE, SCAN_PAGE_SIZE, DuplicateIdError, VectorRepository
+from app.internal.store.vector_snapshot import SnapshotManifest, read_manifest
+
+# Snapshot names are single path segments below the snapshot directory.
+_SNAPSHOT_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]{0,127}")
 
 class VectorService:
     repo: VectorRepository
@@ -35,6 +61,64 @@ class VectorService:
         # optional: keep collection naming consistent (trim spaces)
         return collection.strip()
 
+    def _check_dimension(self, collection: str, dim: int, what: str) -> None:
+        expected = self.repo.dimension(collection)
+        if expected is not None and dim != expected:
+            raise ValidationError(
+                f"{what} have dimension {dim}, collection '{collection}' expects {expected}"
+            )
+
+    def _group_items(
+        self, items: Sequence[VectorCreate]
+    ) -> Tuple[Dict[str, List[Tuple[int, VectorCreate]]], List[VectorItemError]]:
+        """
+        Validate items for a bulk write and group the valid ones per
+        collection as (index, item); the rest is returned as failures.
+        """
+        failed: List[VectorItemError] = []
+        groups: Dict[str, List[Tuple[int, VectorCreate]]] = {}
+        seen: Set[Tuple[str, str]] = set()
+
+        for index, item in enumerate(items):
+            try:
+                self._require_collection(item.collection)
+                self._require_non_empty(item.id, "id")
+                if not isinstance(item.document, str) or not item.document.strip():
+                    raise ValidationError("'document' must be a non-empty string")
+                if item.embedding is not None and not item.embedding:
+                    raise ValidationError("'embedding' must not be empty")
+            except ValidationError as e:
+                failed.append(VectorItemError(index=index, collection=item.collection, id=item.id, error=str(e)))
+                continue
+
+            collection = self._normalize_collection(item.collection)
+            key = (collection, item.id)
+            if key in seen:
+                failed.append(
+                    VectorItemError(index=index, collection=collection, id=item.id, error="duplicate id in request")
+                )
+                continue
+            seen.add(key)
+            groups.setdefault(collection, []).append((index, item))
+
+        # Precomputed embeddings must match the collection (or, for a new
+        # collection, the first embedding in the request).
+        for collection, entries in groups.items():
+            dims = [len(item.embedding) for _, item in entries if item.embedding is not None]
+            if not dims:
+                continue
+            expected = self.repo.dimension(collection) or dims[0]
+            kept = []
+            for index, item in entries:
+                if item.embedding is not None and len(item.embedding) != expected:
+                    error = f"embedding has dimension {len(item.embedding)}, expected {expected}"
+                    failed.append(VectorItemError(index=index, collection=collection, id=item.id, error=error))
+                else:
+                    kept.append((index, item))
+            groups[collection] = kept
+
+        return groups, failed
+
     # -------------------------
     # Public API
     # -------------------------
@@ -50,9 +134,181 @@ class VectorService:
             raise ValidationError("'document' must be a non-empty string")
 
         collection = self._normalize_collection(collection)
+        if data.embedding is not None:
+            if not data.embedding:
+                raise ValidationError("'embedding' must not be empty")
+            self._check_dimension(collection, len(data.embedding), "embeddings")
 
         # Delegate
-        return self.repo.create_vector(collection=collection, data=data)
+        try:
+            return self.repo.create_vector(collection=collection, data=data)
+        except DuplicateIdError:
+            raise ConflictError(resource="Vector", field="id", value=data.id)
+
+    def create_many(
+        self,
+        items: Sequence[VectorCreate],
+        *,
+        upsert: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        dedup: Optional[VectorDedup] = None,
+    ) -> VectorBulkCreateResponse:
+        """
+        Bulk ingest. Items are validated one by one, grouped per collection and
+        written in batches. Invalid or rejected items are reported in `failed`
+        instead of aborting the whole request.
+
+        With `dedup`, near-duplicates are collapsed first and reported in
+        `collapsed`; merged items are always upserted.
+        """
+        if batch_size <= 0:
+            raise ValidationError("'batch_size' must be > 0")
+
+        groups, failed = self._group_items(items)
+        collapsed: List[VectorDuplicate] = []
+
+        created = 0
+        for collection, entries in groups.items():
+            writes = [(entries, upsert)]
+            if dedup is not None:
+                kept, merged, dupes = self._collapse_duplicates(collection, entries, dedup)
+                collapsed.extend(dupes)
+                writes = [(kept, upsert), (merged, True)]
+            for group, group_upsert in writes:
+                if not group:
+                    continue
+                batch = [item for _, item in group]
+                failures = self.repo.create_vectors(collection, batch, upsert=group_upsert, batch_size=batch_size)
+                created += len(batch) - len(failures)
+                for i, error in failures:
+                    index, item = group[i]
+                    failed.append(VectorItemError(index=index, collection=collection, id=item.id, error=error))
+
+        failed.sort(key=lambda f: f.index)
+        collapsed.sort(key=lambda d: d.index)
+        if dedup is not None:
+            return VectorBulkCreateResponse(ok=not failed, created=created, failed=failed, collapsed=collapsed)
+        return VectorBulkCreateResponse(ok=not failed, created=created, failed=failed)
+
+    def _collapse_duplicates(
+        self,
+        collection: str,
+        entries: List[Tuple[int, VectorCreate]],
+        dedup: VectorDedup,
+    ) -> Tuple[List[Tuple[int, VectorCreate]], List[Tuple[int, VectorCreate]], List[VectorDuplicate]]:
+        """
+        Split (index, item) entries into the ones to write as they are, the
+        ones to merge into a stored record (re-keyed to its id), and the
+        collapsed duplicates to report.
+        """
+        matches = self.repo.find_near_duplicates(collection, [item for _, item in entries], dedup.threshold)
+        kept: Dict[str, Tuple[int, VectorCreate]] = {}
+        merged: Dict[str, Tuple[int, VectorCreate]] = {}
+        dupes: List[VectorDuplicate] = []
+        for (index, item), match in zip(entries, matches):
+            if match is None:
+                kept[item.id] = (index, item)
+                continue
+            duplicate_of, similarity = match
+            dupes.append(VectorDuplicate(
+                index=index, collection=collection, id=item.id, duplicate_of=duplicate_of, similarity=similarity,
+            ))
+            if dedup.mode == "reject":
+                continue
+            rekeyed = item.model_copy(update={"id": duplicate_of})
+            if duplicate_of in kept:
+                # Duplicate of an earlier item in this request: the later content wins.
+                kept[duplicate_of] = (kept[duplicate_of][0], rekeyed)
+            else:
+                merged[duplicate_of] = (index, rekeyed)
+        return list(kept.values()), list(merged.values()), dupes
+
+    def create_documents(
+        self,
+        req: VectorDocumentIngest,
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> VectorDocumentIngestResponse:
+        """
+        Chunk whole documents server-side and write the chunks through the
+        bulk path (upsert). Re-ingesting a document replaces its chunks;
+        chunks left over from a longer previous version are deleted.
+        """
+        if batch_size <= 0:
+            raise ValidationError("'batch_size' must be > 0")
+        opts = req.chunking
+        if opts.unit == "tokens" and not tokens_available():
+            raise ValidationError("token chunking needs the 'tiktoken' package")
+
+        groups, failed = self._group_items(req.documents)
+        for collection, group in groups.items():
+            # A document-level embedding can't stand for its chunks.
+            for index, item in group:
+                if item.embedding is not None:
+                    failed.append(VectorItemError(
+                        index=index, collection=collection, id=item.id,
+                        error="'embedding' is not supported for chunked documents",
+                    ))
+            groups[collection] = [(index, item) for index, item in group if item.embedding is None]
+        entries = [(collection, index, item) for collection, group in groups.items() for index, item in group]
+        spans = chunk_texts(
+            [item.document for _, _, item in entries],
+            unit=opts.unit,
+            size=opts.size,
+            overlap=opts.overlap,
+            encoding=opts.encoding,
+        )
+
+        chunks: Dict[str, List[VectorCreate]] = {}
+        owners: Dict[str, List[int]] = {}  # chunk -> position in `entries`
+        for pos, ((collection, _, item), doc_spans) in enumerate(zip(entries, spans)):
+            for n, (start, end) in enumerate(doc_spans):
+                chunks.setdefault(collection, []).append(VectorCreate(
+                    id=f"{item.id}#{n}",
+                    collection=collection,
+                    document=item.document[start:end],
+                    metadata={
+                        **item.metadata,
+                        "parent_id": item.id,
+                        "chunk_index": n,
+                        "chunk_count": len(doc_spans),
+                        "chunk_start": start,
+                        "chunk_end": end,
+                    },
+                ))
+                owners.setdefault(collection, []).append(pos)
+
+        written = 0
+        rejected: Dict[int, str] = {}
+        for collection, batch in chunks.items():
+            failures = self.repo.create_vectors(collection, batch, upsert=True, batch_size=batch_size)
+            written += len(batch) - len(failures)
+            for i, error in failures:
+                rejected.setdefault(owners[collection][i], error)
+
+            parents = [
+                entries[pos][2].id for pos in dict.fromkeys(owners[collection]) if pos not in rejected
+            ]
+            if parents:
+                fresh = {chunk.id for chunk in batch}
+                stale = [
+                    id for id in self.repo.find_ids(collection, where={"parent_id": {"$in": parents}})
+                    if id not in fresh
+                ]
+                if stale:
+                    self.repo.delete_vectors(collection, ids=stale)
+
+        for pos, error in rejected.items():
+            collection, index, item = entries[pos]
+            failed.append(VectorItemError(index=index, collection=collection, id=item.id, error=error))
+
+        failed.sort(key=lambda f: f.index)
+        return VectorDocumentIngestResponse(
+            ok=not failed,
+            documents=len(entries) - len(rejected),
+            chunks=written,
+            failed=failed,
+        )
 
     def get(self, collection: str, id: str) -> VectorRead:
         """
@@ -67,7 +323,7 @@ class VectorService:
             return self.repo.read_vector(collection=collection, id=id)
         except ValueError:
             # Repo stays generic; service gives domain error
-            raise NotFoundError(collection=collection, id=id)
+            raise NotFoundError(resource="Vector", identifier=f"{collection}/{id}")
 
     def update(self, data: VectorUpdate) -> VectorRead:
         """
@@ -87,7 +343,40 @@ class VectorService:
         try:
             return self.repo.update_vector(data=data)
         except ValueError:
-            raise NotFoundError(collection=data.collection, id=data.id)
+            raise NotFoundError(resource="Vector", identifier=f"{data.collection}/{data.id}")
+
+    def update_many(self, data: VectorBulkUpdate) -> VectorBulkUpdateResponse:
+        """
+        Bulk patch update of many vectors in one collection (same semantics
+        as `update`). Invalid items are reported in `failed`, unknown ids in
+        `missing`; the rest is applied.
+        """
+        self._require_collection(data.collection)
+        collection = self._normalize_collection(data.collection)
+
+        failed: List[VectorItemError] = []
+        valid = []
+        seen: Set[str] = set()
+        for index, item in enumerate(data.items):
+            try:
+                self._require_non_empty(item.id, "id")
+                if item.document is not None and not item.document.strip():
+                    raise ValidationError("'document' must be non-empty when provided")
+                if item.id in seen:
+                    raise ValidationError("duplicate id in request")
+            except ValidationError as e:
+                failed.append(VectorItemError(index=index, collection=collection, id=item.id, error=str(e)))
+                continue
+            seen.add(item.id)
+            valid.append(item)
+
+        updated, missing = self.repo.update_vectors(collection, valid) if valid else ([], [])
+        return VectorBulkUpdateResponse(
+            ok=not failed and not missing,
+            updated=len(updated),
+            missing=missing,
+            failed=failed,
+        )
 
     def delete(self, collection: str, id: str) -> None:
         """
@@ -107,9 +396,9 @@ class VectorService:
 
         self.repo.delete_vector(collection=collection, id=id)
 
-    def query(self, req: VectorQueryRequest) -> VectorQueryResponse:
+    def validate_query(self, req: VectorQueryRequest) -> None:
         """
-        Query the vector store.
+        Validate a query request in place (normalizes the collection name).
         """
         self._require_collection(req.collection)
 
@@ -117,9 +406,23 @@ class VectorService:
 
         if req.n_results <= 0:
             raise ValidationError("'n_results' must be > 0")
+        if req.mmr is not None and req.retrieval != "vector":
+            raise ValidationError("'mmr' re-ranking needs retrieval='vector'")
+
+        if (req.query is None) == (req.query_embeddings is None):
+            raise ValidationError("provide exactly one of 'query' and 'query_embeddings'")
 
+        if req.query_embeddings is not None:
+            if req.retrieval != "vector":
+                raise ValidationError("'query_embeddings' needs retrieval='vector'")
+            if not req.query_embeddings or not req.query_embeddings[0]:
+                raise ValidationError("'query_embeddings' must be a non-empty list of vectors")
+            dims = {len(vector) for vector in req.query_embeddings}
+            if len(dims) > 1:
+                raise ValidationError("all 'query_embeddings' must have the same dimension")
+            self._check_dimension(req.collection, dims.pop(), "query embeddings")
         # If query is a string, ensure it isn't empty.
-        if isinstance(req.query, str):
+        elif isinstance(req.query, str):
             if not req.query.strip():
                 raise ValidationError("'query' must be non-empty")
         else:
@@ -128,7 +431,65 @@ class VectorService:
             if any((not q or not q.strip()) for q in req.query):
                 raise ValidationError("all items in 'query' list must be non-empty strings")
 
-        return self.repo.query(req=req)
+    def delete_many(self, req: VectorDeleteRequest) -> VectorDeleteResponse:
+        """
+        Delete many vectors by ids and/or metadata/document filter in one
+        round trip. Deleting missing ids is not an error; the response
+        reports how many vectors were actually removed.
+        """
+        self._require_collection(req.collection)
+        collection = self._normalize_collection(req.collection)
+
+        if req.ids is None and req.where is None and req.where_document is None:
+            raise ValidationError("provide 'ids', 'where' or 'where_document'")
+        # An empty filter would match (memory) or break (Chroma) on everything.
+        if req.where is not None and not req.where:
+            raise ValidationError("'where' must not be empty")
+        if req.where_document is not None and not req.where_document:
+            raise ValidationError("'where_document' must not be empty")
+        if req.ids is not None:
+            if not req.ids:
+                raise ValidationError("'ids' list must not be empty")
+            for id in req.ids:
+                self._require_non_empty(id, "id")
+
+        deleted = self.repo.delete_vectors(
+            collection,
+            ids=req.ids,
+            where=req.where,
+            where_document=req.where_document,
+        )
+        return VectorDeleteResponse(deleted=deleted)
+
+    def query(self, req: VectorQueryRequest, *, cache_ttl: Optional[float] = None) -> VectorQueryResponse:
+        """
+        Query the vector store.
+
+        `cache_ttl` enables the result cache for this call (seconds).
+        """
+        self.validate_query(req)
+        return self.repo.query(req=req, cache_ttl=cache_ttl)
+
+    def split_multi_query(self, req: VectorMultiQueryRequest) -> List[VectorQueryRequest]:
+        """
+        Validate a multi-collection query and return one validated query per
+        distinct collection. Unknown collections are a NotFoundError rather
+        than silently created.
+        """
+        collections: List[str] = []
+        for collection in req.collections:
+            self._require_collection(collection)
+            collection = self._normalize_collection(collection)
+            if collection not in collections:
+                collections.append(collection)
+        missing = [c for c in collections if not self.repo.collection_exists(c)]
+        if missing:
+            raise NotFoundError(resource="Collection", identifier=", ".join(missing))
+
+        subs = [req.for_collection(collection) for collection in collections]
+        for sub in subs:
+            self.validate_query(sub)
+        return subs
 
     def collection_info(self, collection: str) -> VectorCollectionRead:
         """
@@ -137,3 +498,151 @@ class VectorService:
         self._require_collection(collection)
         collection = self._normalize_collection(collection)
         return self.repo.collection_info(collection=collection)
+
+    def scan(
+        self,
+        collection: str,
+        *,
+        embeddings: bool = False,
+        page_size: int = SCAN_PAGE_SIZE,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Page through every record of a collection (ids, documents, metadata
+        and optionally embeddings). Checked up front; pages are read lazily.
+        """
+        self._require_collection(collection)
+        collection = self._normalize_collection(collection)
+        if page_size <= 0:
+            raise ValidationError("'page_size' must be > 0")
+        if not self.repo.collection_exists(collection):
+            raise NotFoundError(resource="Collection", identifier=collection)
+        include = ["documents", "metadatas", *(["embeddings"] if embeddings else [])]
+        return self.repo.scan(collection, include=include, page_size=page_size)
+
+    def create_collection(self, data: VectorCollectionCreate) -> VectorCollectionRead:
+        """
+        Create a collection with its HNSW settings (distance space, build and
+        search ef, M, batch/sync thresholds).
+        """
+        self._require_collection(data.collection)
+        collection = self._normalize_collection(data.collection)
+        if self.repo.collection_exists(collection):
+            raise ConflictError(resource="Collection", field="name", value=collection)
+        return self.repo.create_collection(collection, data.index, data.metadata)
+
+    def configure_collection(self, collection: str, index: VectorIndexConfig) -> VectorCollectionRead:
+        """
+        Tune an existing collection; only search_ef, batch_size and
+        sync_threshold can change after creation.
+        """
+        self._require_collection(collection)
+        collection = self._normalize_collection(collection)
+        try:
+            return self.repo.configure_collection(collection, index)
+        except ChromaNotFoundError:
+            raise NotFoundError(resource="Collection", identifier=collection)
+        except ValueError as e:
+            raise ValidationError(str(e))
+
+    @staticmethod
+    def _snapshot_dir(root: str, name: str) -> Path:
+        if not _SNAPSHOT_NAME.fullmatch(name) or ".." in name:
+            raise ValidationError(f"invalid snapshot name '{name}'")
+        return Path(root) / name
+
+    @staticmethod
+    def _snapshot_read(name: str, manifest: SnapshotManifest) -> VectorSnapshotRead:
+        return VectorSnapshotRead(
+            name=name,
+            collection=manifest.collection,
+            count=manifest.count,
+            dimension=manifest.dimension,
+            created_at=manifest.created_at,
+        )
+
+    def snapshot_collection(self, collection: str, data: VectorSnapshotCreate, *, root: str) -> VectorSnapshotRead:
+        """
+        Save a collection as a binary snapshot (embeddings included) named
+        `data.name` under `root`.
+        """
+        self._require_collection(collection)
+        collection = self._normalize_collection(collection)
+        if not self.repo.collection_exists(collection):
+            raise NotFoundError(resource="Collection", identifier=collection)
+        name = data.name or f"{collection}-{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}"
+        try:
+            manifest = self.repo.snapshot_collection(collection, self._snapshot_dir(root, name))
+        except FileExistsError:
+            raise ConflictError(resource="Snapshot", field="name", value=name)
+        return self._snapshot_read(name, manifest)
+
+    def list_snapshots(self, *, root: str) -> List[VectorSnapshotRead]:
+        """
+        Snapshots under `root`, oldest first.
+        """
+        snapshots: List[VectorSnapshotRead] = []
+        for path in Path(root).glob("*/"):
+            try:
+                snapshots.append(self._snapshot_read(path.name, read_manifest(path)))
+            except (OSError, ValueError, TypeError):
+                continue  # not a (readable) snapshot
+        return sorted(snapshots, key=lambda s: s.created_at)
+
+    def restore_snapshot(self, name: str, data: VectorSnapshotRestore, *, root: str) -> VectorCollectionRead:
+        """
+        Recreate a collection from a snapshot without re-embedding; with
+        `data.replace` an existing collection of that name is replaced once
+        the snapshot has been restored in full.
+        """
+        path = self._snapshot_dir(root, name)
+        try:
+            manifest = read_manifest(path)
+        except FileNotFoundError:
+            raise NotFoundError(resource="Snapshot", identifier=name)
+        except (ValueError, TypeError) as e:
+            raise ValidationError(f"snapshot '{name}': {e}")
+        if data.collection is not None:
+            self._require_collection(data.collection)
+        collection = self._normalize_collection(data.collection or manifest.collection)
+        if not data.replace and self.repo.collection_exists(collection):
+            raise ConflictError(resource="Collection", field="name", value=collection)
+        try:
+            return self.repo.restore_collection(path, collection, replace=data.replace)
+        except ValueError as e:
+            raise ValidationError(f"snapshot '{name}': {e}")
+
+    def migration_source(self, collection: str, embedding_model: Optional[str] = None) -> str:
+        """
+        Check that `collection` can be migrated (to `embedding_model`, if
+        given); returns its normalized name.
+        """
+        self._require_collection(collection)
+        collection = self._normalize_collection(collection)
+        if not self.repo.collection_exists(collection):
+            raise NotFoundError(resource="Collection", identifier=collection)
+        if embedding_model is not None and embedding_model not in self.repo.registry.embedding_functions:
+            raise ValidationError(f"embedding model '{embedding_model}' is not configured")
+        return collection
+
+    def aliases(self) -> Dict[str, str]:
+        """
+        Collection names that resolve to another (physical) collection.
+        """
+        return self.repo.aliases()
+
+    def delete_collection(self, collection: str) -> None:
+        """
+        Drop a whole collection.
+        """
+        self._require_collection(collection)
+        collection = self._normalize_collection(collection)
+        try:
+            self.repo.delete_collection(collection=collection)
+        except (ChromaNotFoundError, ValueError):
+            raise NotFoundError(resource="Collection", identifier=collection)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Runtime counters of the vector store caches.
+        """
+        return self.repo.stats()
@@ -0,0 +1,277 @@
+# app/internal/services/service_vectors_async.py
+from __future__ import annotations
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Sequence, TypeVar
+
+from app.config.vector_config import vector_config
+from app.contracts.contract_vectors import (
+    VectorBulkCreateResponse,
+    VectorCollectionRead,
+    VectorCreate,
+    VectorDedup,
+    VectorDocumentIngest,
+    VectorDocumentIngestResponse,
+    VectorMultiQueryRequest,
+    VectorQueryRequest,
+    VectorQueryResponse,
+    VectorRead,
+    VectorUpdate,
+)
+from app.internal.services.query_coalescer import DEFAULT_MAX_BATCH, DEFAULT_WINDOW_MS, QueryCoalescer
+from app.internal.services.service_vectors import VectorService
+from app.internal.store.repository_vectors import DEFAULT_BATCH_SIZE, SCAN_PAGE_SIZE
+
+T = TypeVar("T")
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_PENDING = 64
+
+
+class VectorExecutor:
+    """
+    Dedicated, bounded thread pool for (blocking) Chroma calls.
+
+    At most `max_pending` calls are admitted at once (running + queued in the
+    pool); further callers wait asynchronously instead of piling up work.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, max_pending: int = DEFAULT_MAX_PENDING):
+        if max_workers <= 0 or max_pending < max_workers:
+            raise ValueError("executor needs max_workers > 0 and max_pending >= max_workers")
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vectors")
+        self._lock = Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+        self.admitted = 0
+        self.running = 0
+        self.completed = 0
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        slots = self._semaphore()
+        self.waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.admitted += 1
+        try:
+            future = self._pool.submit(self._call, partial(fn, *args, **kwargs))
+            return await asyncio.wrap_future(future)
+        finally:
+            self.admitted -= 1
+            slots.release()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "running": self.running,
+            "queued": max(0, self.admitted - self.running),
+            "waiting": self.waiting,
+            "completed": self.completed,
+        }
+
+    def _call(self, fn: Callable[[], T]) -> T:
+        with self._lock:
+            self.running += 1
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # asyncio primitives are bound to one event loop.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._slots is None:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_pending)
+        return self._slots
+
+
+_executor: Optional[VectorExecutor] = None
+
+
+def init_vector_executor(
+    max_workers: Optional[int] = None,
+    max_pending: Optional[int] = None,
+) -> VectorExecutor:
+    """
+    (Re)create the process-wide vector executor; defaults come from
+    [tool.vectors] executor-workers / executor-max-pending.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+    _executor = VectorExecutor(
+        max_workers=max_workers or vector_config.get("executor-workers", DEFAULT_WORKERS),
+        max_pending=max_pending or vector_config.get("executor-max-pending", DEFAULT_MAX_PENDING),
+    )
+    return _executor
+
+
+def get_vector_executor() -> VectorExecutor:
+    if _executor is None:
+        return init_vector_executor()
+    return _executor
+
+
+def shutdown_vector_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+_coalescer: Optional[QueryCoalescer] = None
+
+
+def init_query_coalescer(
+    window_ms: Optional[float] = None,
+    max_batch: Optional[int] = None,
+) -> Optional[QueryCoalescer]:
+    """
+    (Re)create the process-wide query coalescer; defaults come from
+    [tool.vectors] coalesce-window-ms / coalesce-max-batch. A window of 0
+    disables coalescing.
+    """
+    global _coalescer
+    window_ms = vector_config.get("coalesce-window-ms", DEFAULT_WINDOW_MS) if window_ms is None else window_ms
+    max_batch = max_batch or vector_config.get("coalesce-max-batch", DEFAULT_MAX_BATCH)
+    _coalescer = QueryCoalescer(window_ms=window_ms, max_batch=max_batch) if window_ms > 0 else None
+    return _coalescer
+
+
+def get_query_coalescer() -> Optional[QueryCoalescer]:
+    return _coalescer
+
+
+class AsyncVectorService:
+    """
+    Async facade over `VectorService` for code running on the event loop
+    (MCP tools, streaming routes). Every call is offloaded to the vector
+    executor so embedding and ANN search never block the loop.
+
+    Single-text queries are micro-batched by the query coalescer when one is
+    configured.
+    """
+
+    def __init__(
+        self,
+        svc: VectorService,
+        executor: Optional[VectorExecutor] = None,
+        coalescer: Optional[QueryCoalescer] = None,
+    ):
+        self.svc = svc
+        self.executor = executor or get_vector_executor()
+        self.coalescer = coalescer or get_query_coalescer()
+
+    async def create(self, collection: str, data: VectorCreate) -> VectorRead:
+        return await self.executor.run(self.svc.create, collection, data)
+
+    async def create_many(
+        self,
+        items: Sequence[VectorCreate],
+        *,
+        upsert: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        dedup: Optional[VectorDedup] = None,
+    ) -> VectorBulkCreateResponse:
+        return await self.executor.run(self.svc.create_many, items, upsert=upsert, batch_size=batch_size, dedup=dedup)
+
+    async def create_documents(
+        self,
+        req: VectorDocumentIngest,
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> VectorDocumentIngestResponse:
+        return await self.executor.run(self.svc.create_documents, req, batch_size=batch_size)
+
+    async def get(self, collection: str, id: str) -> VectorRead:
+        return await self.executor.run(self.svc.get, collection, id)
+
+    async def update(self, data: VectorUpdate) -> VectorRead:
+        return await self.executor.run(self.svc.update, data)
+
+    async def delete(self, collection: str, id: str) -> None:
+        return await self.executor.run(self.svc.delete, collection, id)
+
+    async def query(self, req: VectorQueryRequest, *, cache_ttl: Optional[float] = None) -> VectorQueryResponse:
+        if self.coalescer is None or not isinstance(req.query, str) or req.shape is not None or req.mmr is not None:
+            return await self.executor.run(self.svc.query, req, cache_ttl=cache_ttl)
+
+        self.svc.validate_query(req)
+        repo = self.svc.repo
+        cache_key, cached = repo.cached_query(req) if cache_ttl else (None, None)
+        if cached is not None:
+            return cached
+
+        key = (
+            id(repo.registry),
+            req.collection,
+            json.dumps(req.where, sort_keys=True, default=str),
+            json.dumps(req.where_document, sort_keys=True, default=str),
+            req.retrieval,
+            # Fused rankings depend on the candidate pool, which n_results
+            # sizes, so only vector queries may share a larger one.
+            None if req.retrieval == "vector" else req.n_results,
+            tuple(req.include),
+        )
+        result = await self.coalescer.submit(key, req, lambda batch: self.executor.run(repo.query, batch))
+        if cache_ttl:
+            repo.cache_query_result(cache_key, result, cache_ttl)
+        return result
+
+    async def query_many(
+        self,
+        req: VectorMultiQueryRequest,
+        *,
+        cache_ttl: Optional[float] = None,
+    ) -> VectorQueryResponse:
+        """
+        Fan a query out over several collections concurrently on the vector
+        executor and merge the hits into one global top-k by distance.
+        """
+        subs = await self.executor.run(self.svc.split_multi_query, req)
+        responses = await asyncio.gather(*(self.query(sub, cache_ttl=cache_ttl) for sub in subs))
+        return self.svc.repo.merge_responses(req, responses)
+
+    async def collection_info(self, collection: str) -> VectorCollectionRead:
+        return await self.executor.run(self.svc.collection_info, collection)
+
+    async def scan(
+        self,
+        collection: str,
+        *,
+        embeddings: bool = False,
+        page_size: int = SCAN_PAGE_SIZE,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Validate the scan now (so callers can fail before streaming), then
+        return the pages; each page is fetched on the vector executor.
+        """
+        pages = await self.executor.run(self.svc.scan, collection, embeddings=embeddings, page_size=page_size)
+        return self._drain(pages)
+
+    async def _drain(self, pages: Iterator[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        while (page := await self.executor.run(next, pages, None)) is not None:
+            yield page
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {**self.svc.stats(), "executor": self.executor.stats()}
+        if self.coalescer is not None:
+            stats["coalescer"] = self.coalescer.stats()
+        return stats
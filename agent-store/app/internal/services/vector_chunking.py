@@ -0,0 +1,157 @@
+# app/internal/services/vector_chunking.py
+from __future__ import annotations
+
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Tuple
+
+from app.config.vector_config import vector_config
+
+# (start, end) character offsets into the source document
+ChunkSpan = Tuple[int, int]
+
+DEFAULT_CHUNK_WORKERS = 2
+DEFAULT_ENCODING = "cl100k_base"
+# Below this many characters per request the IPC costs more than the chunking.
+INLINE_CHARS = 32_768
+# Documents are shipped to the workers in tasks of about this many characters.
+TASK_CHARS = 1_000_000
+
+
+def tokens_available() -> bool:
+    return importlib.util.find_spec("tiktoken") is not None
+
+
+@lru_cache(maxsize=4)
+def get_encoding(name: str) -> Any:
+    import tiktoken
+
+    return tiktoken.get_encoding(name)
+
+
+def _char_spans(text: str, size: int, overlap: int) -> List[ChunkSpan]:
+    spans: List[ChunkSpan] = []
+    n = len(text)
+    start = 0
+    while start < n:
+        end = min(start + size, n)
+        if end < n:
+            # Prefer to cut after whitespace in the second half of the window.
+            low = start + size // 2
+            cut = max(text.rfind("\n", low, end), text.rfind(" ", low, end))
+            if cut > low:
+                end = cut + 1
+        if text[start:end].strip():
+            spans.append((start, end))
+        if end >= n:
+            break
+        start = max(end - overlap, start + 1)
+    return spans
+
+
+def _token_spans(text: str, size: int, overlap: int, encoding: str) -> List[ChunkSpan]:
+    enc = get_encoding(encoding)
+    tokens = enc.encode(text, disallowed_special=())
+    if not tokens:
+        return []
+    _, offsets = enc.decode_with_offsets(tokens)
+
+    spans: List[ChunkSpan] = []
+    step = size - overlap
+    for first in range(0, len(tokens), step):
+        last = min(first + size, len(tokens))
+        start = offsets[first]
+        end = offsets[last] if last < len(tokens) else len(text)
+        if end > start and text[start:end].strip():
+            spans.append((start, end))
+        if last == len(tokens):
+            break
+    return spans
+
+
+def chunk_text(
+    text: str,
+    *,
+    unit: str = "chars",
+    size: int = 1000,
+    overlap: int = 200,
+    encoding: str = DEFAULT_ENCODING,
+) -> List[ChunkSpan]:
+    """
+    Split `text` into overlapping windows of `size` characters or tokens.
+    Character windows are nudged back to the last whitespace so words stay
+    whole. Returns spans into `text`; whitespace-only windows are skipped.
+    """
+    if size <= 0 or not 0 <= overlap < size:
+        raise ValueError("chunking needs size > 0 and 0 <= overlap < size")
+    if unit == "tokens":
+        return _token_spans(text, size, overlap, encoding)
+    return _char_spans(text, size, overlap)
+
+
+def _chunk_task(texts: List[str], unit: str, size: int, overlap: int, encoding: str) -> List[List[ChunkSpan]]:
+    return [chunk_text(t, unit=unit, size=size, overlap=overlap, encoding=encoding) for t in texts]
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def init_chunk_pool(workers: Optional[int] = None) -> Optional[ProcessPoolExecutor]:
+    """
+    (Re)create the process pool used for chunking; the default comes from
+    [tool.vectors] chunk-workers. 0 workers chunks in the calling thread.
+    """
+    global _pool
+    shutdown_chunk_pool()
+    workers = vector_config.get("chunk-workers", DEFAULT_CHUNK_WORKERS) if workers is None else workers
+    if workers > 0:
+        # spawn: forking a process that already runs threads is unsafe.
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def get_chunk_pool() -> Optional[ProcessPoolExecutor]:
+    return _pool
+
+
+def shutdown_chunk_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def chunk_texts(
+    texts: Sequence[str],
+    *,
+    unit: str = "chars",
+    size: int = 1000,
+    overlap: int = 200,
+    encoding: str = DEFAULT_ENCODING,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> List[List[ChunkSpan]]:
+    """
+    Chunk many documents, one list of spans per text.
+
+    Large requests are split into tasks of about `TASK_CHARS` characters and
+    run on the chunk pool; small ones (or without a pool) run inline.
+    Blocks the caller, so call it from a worker thread, not the event loop.
+    """
+    pool = pool or get_chunk_pool()
+    texts = list(texts)
+    if pool is None or sum(len(t) for t in texts) < INLINE_CHARS:
+        return _chunk_task(texts, unit, size, overlap, encoding)
+
+    tasks: List[List[str]] = [[]]
+    chars = 0
+    for text in texts:
+        if chars >= TASK_CHARS:
+            tasks.append([])
+            chars = 0
+        tasks[-1].append(text)
+        chars += len(text)
+
+    futures = [pool.submit(_chunk_task, task, unit, size, overlap, encoding) for task in tasks]
+    return [spans for future in futures for spans in future.result()]
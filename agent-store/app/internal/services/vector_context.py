@@ -0,0 +1,165 @@
+# app/internal/services/vector_context.py
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal, Sequence
+
+from app.contracts.contract_vectors import VectorQueryHit
+from app.internal.services.errors import ValidationError
+from app.internal.services.vector_chunking import DEFAULT_ENCODING, get_encoding, tokens_available
+from app.internal.store.lexical_index import term_positions, tokenize
+
+ContextUnit = Literal["chars", "tokens"]
+
+# A trimmed document shorter than this isn't worth its header.
+MIN_WINDOW = {"chars": 200, "tokens": 50}
+ELLIPSIS = "…"
+SEPARATOR = "\n\n"
+
+
+@dataclass
+class PackedContext:
+    context: str
+    ids: List[str] = field(default_factory=list)  # hits in the context, best first
+    truncated: List[str] = field(default_factory=list)  # in the context, document trimmed
+    dropped: List[str] = field(default_factory=list)  # didn't fit at all
+    used: int = 0
+
+
+class _Units:
+    """Measures text and maps between unit (char or token) and char offsets."""
+
+    def __init__(self, unit: ContextUnit, encoding: str):
+        self.unit = unit
+        self._enc = get_encoding(encoding) if unit == "tokens" else None
+
+    def cost(self, text: str) -> int:
+        if self._enc is None:
+            return len(text)
+        return len(self._enc.encode(text, disallowed_special=()))
+
+    def offsets(self, text: str) -> List[int]:
+        """Char offset where each unit starts, plus len(text)."""
+        if self._enc is None:
+            return list(range(len(text) + 1))
+        _, offsets = self._enc.decode_with_offsets(self._enc.encode(text, disallowed_special=()))
+        return [*offsets, len(text)]
+
+
+def _best_window(positions: Sequence[int], n_units: int, size: int) -> int:
+    """Start unit of the `size`-unit window holding the most term positions."""
+    if not positions or size >= n_units:
+        return 0
+    best, best_i, best_j = 0, 0, 0
+    j = 0
+    for i, p in enumerate(positions):
+        while j < len(positions) and positions[j] < p + size:
+            j += 1
+        if j - i > best:
+            best, best_i, best_j = j - i, i, j
+    # Center the matched span in the window.
+    span = positions[best_j - 1] - positions[best_i]
+    start = positions[best_i] - (size - span) // 2
+    return max(0, min(start, n_units - size))
+
+
+def trim_to_window(text: str, terms: Sequence[str], size: int, units: _Units) -> str:
+    """
+    The `size`-unit window of `text` with the most query term occurrences,
+    snapped to word boundaries and marked with ellipses where cut.
+    """
+    offsets = units.offsets(text)
+    n_units = len(offsets) - 1
+    if n_units <= size:
+        return text
+    wanted = set(terms)
+    chars = [pos for term, pos in term_positions(text) if term in wanted]
+    positions = sorted({bisect_right(offsets, pos) - 1 for pos in chars})
+    first = _best_window(positions, n_units, size)
+    start, end = offsets[first], offsets[first + size]
+
+    # Don't cut words in half (the first/last partial word is dropped).
+    if start > 0 and not text[start - 1].isspace():
+        space = text.find(" ", start, end)
+        start = space + 1 if space != -1 else start
+    if end < len(text) and not text[end].isspace():
+        space = text.rfind(" ", start, end)
+        end = space if space > start else end
+    window = text[start:end].strip()
+    return f"{ELLIPSIS if start > 0 else ''}{window}{ELLIPSIS if end < len(text) else ''}"
+
+
+def _header(rank: int, hit: VectorQueryHit) -> str:
+    where = hit.collection if hit.distance is None else f"{hit.collection}, distance {hit.distance:.3f}"
+    return f"[{rank}] {hit.id} ({where})"
+
+
+def _metadata_line(metadata: Dict[str, Any], seen: Dict[str, Any]) -> str:
+    """Metadata not already shown with an earlier hit (same key and value)."""
+    fresh = {k: v for k, v in metadata.items() if k not in seen or seen[k] != v}
+    seen.update(fresh)
+    return "; ".join(f"{k}: {v}" for k, v in fresh.items())
+
+
+def pack_context(
+    hits: Sequence[VectorQueryHit],
+    query: str,
+    budget: int,
+    *,
+    unit: ContextUnit = "chars",
+    encoding: str = DEFAULT_ENCODING,
+) -> PackedContext:
+    """
+    Pack query hits into one prompt-ready context of at most `budget`
+    characters or tokens.
+
+    Hits are taken greedily in relevance order. No single document takes
+    more than half the budget: longer ones are trimmed to the window with
+    the most query terms. Metadata already shown with an earlier hit is
+    left out. Hits that no longer fit are dropped.
+    """
+    if budget <= 0:
+        raise ValidationError("'budget' must be > 0")
+    if unit == "tokens" and not tokens_available():
+        raise ValidationError("a token budget needs the 'tiktoken' package")
+    units = _Units(unit, encoding)
+    terms = tokenize(query)
+    cap = max(budget // 2, MIN_WINDOW[unit])
+    separator = units.cost(SEPARATOR)
+
+    packed = PackedContext(context="")
+    blocks: List[str] = []
+    seen: Dict[str, Any] = {}
+    remaining = budget
+    for rank, hit in enumerate(hits, start=1):
+        snapshot = dict(seen)
+        head = "\n".join(filter(None, [_header(rank, hit), _metadata_line(hit.metadata, seen)]))
+        room = remaining - units.cost(head) - 1 - (separator if blocks else 0)
+        document = hit.document or ""
+        size = units.cost(document)
+        if size > min(room, cap):
+            window = min(room, cap) - 2 * units.cost(ELLIPSIS)
+            if window < MIN_WINDOW[unit]:
+                seen = snapshot
+                packed.dropped.append(hit.id)
+                continue
+            document = trim_to_window(document, terms, window, units)
+            packed.truncated.append(hit.id)
+        block = f"{head}\n{document}"
+        blocks.append(block)
+        packed.ids.append(hit.id)
+        remaining -= units.cost(block) + (separator if len(blocks) > 1 else 0)
+
+    packed.context = SEPARATOR.join(blocks)
+    packed.used = units.cost(packed.context)
+    # Token counts of the parts don't add up exactly; never exceed the budget.
+    while blocks and packed.used > budget:
+        blocks.pop()
+        dropped = packed.ids.pop()
+        if dropped in packed.truncated:
+            packed.truncated.remove(dropped)
+        packed.dropped.append(dropped)
+        packed.context = SEPARATOR.join(blocks)
+        packed.used = units.cost(packed.context)
+    return packed
@@ -0,0 +1,99 @@
+# app/internal/services/vector_export.py
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import numpy as np
+
+from app.contracts.contract_vectors import VectorExportFormat, VectorRecord
+from app.internal.services.errors import ValidationError
+
+MEDIA_TYPES: Dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def arrow_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def export_stream(
+    collection: str,
+    pages: AsyncIterator[Dict[str, Any]],
+    fmt: VectorExportFormat,
+    *,
+    embeddings: bool = False,
+) -> AsyncIterator[Any]:
+    """Encode scan pages as NDJSON lines or Arrow IPC stream chunks."""
+    if fmt == "arrow":
+        if not arrow_available():
+            raise ValidationError("arrow export needs the 'pyarrow' package")
+        return _arrow_chunks(pages, embeddings=embeddings)
+    return _ndjson_lines(collection, pages)
+
+
+async def _ndjson_lines(collection: str, pages: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    async for page in pages:
+        documents = page.get("documents") or [None] * len(page["ids"])
+        metadatas = page.get("metadatas") or [None] * len(page["ids"])
+        vectors = page.get("embeddings")
+        lines: List[str] = []
+        for i, id in enumerate(page["ids"]):
+            record = VectorRecord(
+                collection=collection,
+                id=id,
+                document=documents[i],
+                metadata=metadatas[i] or {},
+                embedding=None if vectors is None else np.asarray(vectors[i], dtype=np.float32).tolist(),
+            )
+            lines.append(record.model_dump_json(exclude_none=True) + "\n")
+        # One chunk per page rather than per record.
+        yield "".join(lines)
+
+
+async def _arrow_chunks(pages: AsyncIterator[Dict[str, Any]], *, embeddings: bool) -> AsyncIterator[bytes]:
+    """
+    One Arrow IPC stream, a record batch per page: id, document, metadata
+    (JSON text, as metadata keys vary per record) and list<float32> embedding.
+    """
+    import pyarrow as pa
+
+    fields = [
+        pa.field("id", pa.string(), nullable=False),
+        pa.field("document", pa.string()),
+        pa.field("metadata", pa.string()),
+    ]
+    if embeddings:
+        fields.append(pa.field("embedding", pa.list_(pa.float32())))
+    schema = pa.schema(fields)
+
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+
+    def drain() -> bytes:
+        chunk = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return chunk
+
+    yield drain()  # the schema message
+    async for page in pages:
+        n = len(page["ids"])
+        metadatas: List[Optional[Dict[str, Any]]] = page.get("metadatas") or [None] * n
+        columns = [
+            pa.array(page["ids"], pa.string()),
+            pa.array(page.get("documents") or [None] * n, pa.string()),
+            pa.array([json.dumps(m or {}) for m in metadatas], pa.string()),
+        ]
+        if embeddings:
+            vectors = np.asarray(page["embeddings"], dtype=np.float32).reshape(n, -1)
+            offsets = np.arange(n + 1, dtype=np.int32) * vectors.shape[1]
+            columns.append(pa.ListArray.from_arrays(pa.array(offsets), pa.array(vectors.ravel())))
+        writer.write_batch(pa.record_batch(columns, schema=schema))
+        yield drain()
+    writer.close()
+    yield drain()
@@ -0,0 +1,87 @@
+# app/internal/store/collection_aliases.py
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+
+class CollectionAliases:
+    """
+    Logical collection names pointing at physical collections.
+
+    A name that is an alias resolves to its target everywhere the registry
+    looks collections up, so repointing an alias switches readers and
+    writers over in one step. With a `path` the table is kept in a JSON
+    file (rewritten atomically on change) so it survives restarts.
+
+    It also records the physical collections an alias moved away from that
+    are still to be deleted (`retire`), in a second file next to it, so a
+    restart before they are dropped doesn't leak them.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self._lock = Lock()
+        self._targets: Dict[str, str] = {}
+        self._retired: List[str] = []
+        if path is not None and path.exists():
+            self._targets = dict(json.loads(path.read_text()))
+        if self.retired_path is not None and self.retired_path.exists():
+            self._retired = list(json.loads(self.retired_path.read_text()))
+
+    @property
+    def retired_path(self) -> Optional[Path]:
+        return None if self.path is None else self.path.with_name(f"{self.path.stem}.retired.json")
+
+    def resolve(self, name: str) -> str:
+        return self._targets.get(name, name)
+
+    def set(self, alias: str, target: str) -> None:
+        with self._lock:
+            self._targets[alias] = target
+            self._save()
+
+    def remove(self, alias: str) -> None:
+        with self._lock:
+            if self._targets.pop(alias, None) is not None:
+                self._save()
+
+    def aliases_of(self, target: str) -> List[str]:
+        return [alias for alias, t in list(self._targets.items()) if t == target]
+
+    def items(self) -> Dict[str, str]:
+        return dict(self._targets)
+
+    def retire(self, name: str) -> None:
+        """Record `name` as due for deletion."""
+        with self._lock:
+            if name not in self._retired:
+                self._retired.append(name)
+                self._save_retired()
+
+    def discard_retired(self, name: str) -> None:
+        with self._lock:
+            if name in self._retired:
+                self._retired.remove(name)
+                self._save_retired()
+
+    def retired(self) -> List[str]:
+        return list(self._retired)
+
+    def _save(self) -> None:
+        if self.path is not None:
+            self._write(self.path, self._targets)
+
+    def _save_retired(self) -> None:
+        if self.retired_path is not None:
+            self._write(self.retired_path, self._retired)
+
+    @staticmethod
+    def _write(path: Path, data: Any) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(json.dumps(data, indent=2, sort_keys=True))
+        os.replace(tmp, path)
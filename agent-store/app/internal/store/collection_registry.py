@@ -0,0 +1,315 @@
+# app/internal/store/collection_registry.py
+from __future__ import annotations
+
+from contextlib import contextmanager
+from threading import Condition, Lock
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+from chromadb.errors import NotFoundError as ChromaNotFoundError
+
+from app.internal.store.collection_aliases import CollectionAliases
+from app.internal.store.dedup_index import MinHashIndex
+from app.internal.store.flat_index import FlatCollection
+from app.internal.store.lexical_index import BM25Index, LexicalIndexes
+from app.internal.store.vector_backend import VectorBackend, VectorCollection
+
+# Collection metadata key naming the entry of `embedding_functions` a
+# collection was embedded with; collections without it use the default.
+EMBEDDING_MODEL_KEY = "embedding_model"
+
+
+class CollectionRegistry:
+    """
+    Process-wide cache of collection handles, keyed by name.
+
+    `get_or_create_collection` is a metadata round-trip; resolving it once per
+    collection lets hot read/query paths go straight to the handle.
+    Whoever creates, deletes or re-configures a collection must call
+    `invalidate` so the next lookup fetches a fresh handle.
+
+    It also keeps a generation counter per collection, bumped on every write,
+    which result caches fold into their keys, the per-collection BM25
+    indexes used for lexical/hybrid retrieval and the MinHash indexes used
+    for near-duplicate detection on ingest.
+
+    With `flat_max_records > 0`, collections that don't exist in Chroma yet
+    start as an in-process `FlatCollection` and are promoted to Chroma once
+    they grow past that many records. Flat collections live only in this
+    registry: `invalidate` keeps them, `delete` drops them.
+
+    Names are resolved through `aliases` first; handles, dimensions and the
+    document indexes are keyed by the physical collection, generations by
+    the name written to (a write bumps the collection and all its aliases).
+    Writes hold `writing` for their collection; `frozen` holds them off a
+    physical collection while its aliases are repointed.
+
+    Collections embed with `embedding_function` unless their metadata names
+    one of `embedding_functions` (model id -> function) under
+    `EMBEDDING_MODEL_KEY`, e.g. a migration target re-embedded with another
+    model: the source keeps its own function until the name moves over.
+    """
+
+    def __init__(
+        self,
+        client: VectorBackend,
+        embedding_function: Optional[EmbeddingFunction] = None,
+        *,
+        flat_max_records: int = 0,
+        flat_dtype: str = "float32",
+        aliases: Optional[CollectionAliases] = None,
+        embedding_functions: Optional[Dict[str, EmbeddingFunction]] = None,
+    ):
+        self.client = client
+        self.aliases = aliases if aliases is not None else CollectionAliases()
+        self.embedding_function = embedding_function
+        self.embedding_functions = dict(embedding_functions or {})
+        self.flat_max_records = flat_max_records
+        self.flat_dtype = flat_dtype
+        self._handles: Dict[str, VectorCollection] = {}
+        self._generations: Dict[str, int] = {}
+        self._dimensions: Dict[str, int] = {}
+        self.lexical: LexicalIndexes[BM25Index] = LexicalIndexes()
+        self.dedup: LexicalIndexes[MinHashIndex] = LexicalIndexes(MinHashIndex)
+        self._lock = Lock()
+        self._gate = Condition()
+        self._writers: Dict[str, int] = {}
+        self._frozen: Set[str] = set()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.promotions = 0
+
+    def resolve(self, name: str) -> str:
+        """The physical collection behind `name` (itself unless it's an alias)."""
+        return self.aliases.resolve(name)
+
+    def get(self, name: str) -> VectorCollection:
+        name = self.resolve(name)
+        handle = self._handles.get(name)
+        if handle is not None:
+            self.hits += 1
+            return handle
+
+        with self._lock:
+            handle = self._handles.get(name)
+            if handle is not None:
+                self.hits += 1
+                return handle
+            self.misses += 1
+            handle = self._fetch(name)
+            self._handles[name] = handle
+            return handle
+
+    def create(
+        self,
+        name: str,
+        *,
+        configuration: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        embedding_model: Optional[str] = None,
+    ) -> VectorCollection:
+        """
+        Create a new collection (fails if it exists) and cache its handle.
+        It embeds with `embedding_functions[embedding_model]`, by default the
+        model recorded in `metadata` (e.g. copied from another collection).
+        """
+        embedding_model = embedding_model or (metadata or {}).get(EMBEDDING_MODEL_KEY)
+        if embedding_model is not None:
+            metadata = {**(metadata or {}), EMBEDDING_MODEL_KEY: embedding_model}
+        kwargs: Dict[str, Any] = {"configuration": configuration, "metadata": metadata or None}
+        embedding_function = self._model_function(embedding_model)
+        if embedding_function is not None:
+            kwargs["embedding_function"] = embedding_function
+        with self._lock:
+            handle = self.client.create_collection(name=name, **kwargs)
+            self._handles[name] = handle
+            self._dimensions.pop(name, None)
+            return handle
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Drop one handle, or all of them when `name` is None (flat collections stay)."""
+        with self._lock:
+            names = list(self._handles) if name is None else [self.resolve(name)]
+            for n in names:
+                self._dimensions.pop(n, None)
+                if self._is_flat(self._handles.get(n)):
+                    continue
+                if self._handles.pop(n, None) is not None:
+                    self.invalidations += 1
+
+    def delete(self, name: str, *, resolve: bool = True) -> None:
+        """
+        Delete a collection, flat or Chroma, and the aliases pointing at it;
+        raises Chroma's NotFoundError if missing. With `resolve=False`,
+        `name` is taken as a physical collection even if an alias shadows it.
+        """
+        if resolve:
+            name = self.resolve(name)
+        with self._lock:
+            flat = self._is_flat(self._handles.get(name))
+            if flat:
+                del self._handles[name]
+        if not flat:
+            self.client.delete_collection(name=name)
+            with self._lock:
+                if self._handles.pop(name, None) is not None:
+                    self.invalidations += 1
+        self._dimensions.pop(name, None)
+        self.aliases.discard_retired(name)
+        for alias in self.aliases.aliases_of(name):
+            self.aliases.remove(alias)
+            self.bump(alias)
+
+    def swap_alias(self, alias: str, target: str) -> Optional[str]:
+        """Point `alias` at `target`; returns the collection it resolved to before."""
+        previous = self.resolve(alias)
+        self.aliases.set(alias, target)
+        self.bump(alias)
+        return previous
+
+    @contextmanager
+    def writing(self, name: str) -> Iterator[str]:
+        """
+        Held around a write to `name`; yields the physical collection, which
+        can't be repointed until the write is done. Waits while it's frozen.
+        """
+        with self._gate:
+            while (physical := self.resolve(name)) in self._frozen:
+                self._gate.wait()
+            self._writers[physical] = self._writers.get(physical, 0) + 1
+        try:
+            yield physical
+        finally:
+            with self._gate:
+                self._writers[physical] -= 1
+                if not self._writers[physical]:
+                    del self._writers[physical]
+                self._gate.notify_all()
+
+    @contextmanager
+    def frozen(self, name: str) -> Iterator[str]:
+        """
+        Hold new writes to the collection behind `name` (through any of its
+        names) and wait for running ones; yields the physical collection.
+        Writers held meanwhile resolve their name again when let through.
+        """
+        physical = self.resolve(name)
+        with self._gate:
+            self._frozen.add(physical)
+            while self._writers.get(physical):
+                self._gate.wait()
+        try:
+            yield physical
+        finally:
+            with self._gate:
+                self._frozen.discard(physical)
+                self._gate.notify_all()
+
+    def flat_names(self) -> List[str]:
+        """Names of the collections currently held in a flat index."""
+        return [name for name, handle in list(self._handles.items()) if self._is_flat(handle)]
+
+    def generation(self, name: str) -> int:
+        return self._generations.get(name, 0)
+
+    def bump(self, name: str) -> int:
+        """Mark `name` (and the collection behind it, and its aliases) as written to; returns the new generation."""
+        target = self.resolve(name)
+        with self._lock:
+            for key in {name, target, *self.aliases.aliases_of(target)}:
+                self._generations[key] = self._generations.get(key, 0) + 1
+            return self._generations[name]
+
+    def dimension(self, name: str) -> Optional[int]:
+        """Embedding dimension of `name`, if known."""
+        return self._dimensions.get(self.resolve(name))
+
+    def set_dimension(self, name: str, dim: int) -> None:
+        # A collection's dimension is fixed by its first embedding.
+        self._dimensions[self.resolve(name)] = dim
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._handles),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "flat": len(self.flat_names()),
+            "promotions": self.promotions,
+        }
+
+    @staticmethod
+    def _is_flat(handle: Any) -> bool:
+        return isinstance(handle, FlatCollection) and handle.pending_promotion
+
+    def _exists(self, name: str) -> bool:
+        try:
+            self.client.get_collection(name=name)
+            return True
+        except ChromaNotFoundError:
+            return False
+
+    def embedding_model(self, name: str) -> Optional[str]:
+        """The model id `name` is embedded with; None for the default function."""
+        return (self.get(name).metadata or {}).get(EMBEDDING_MODEL_KEY)
+
+    def embed_queries(self, name: str, texts: List[str]) -> np.ndarray:
+        """
+        Embed query texts for collection `name` as `query_texts` would: with
+        its embedding function (`embed_query` where it has one), else the
+        backend's default.
+        """
+        fn = self._model_function(self.embedding_model(name))
+        fn = fn or getattr(self.client, "embedding_function", None)
+        if fn is None:
+            from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+            fn = DefaultEmbeddingFunction()
+        embed = getattr(fn, "embed_query", fn)
+        return np.asarray(embed(texts), dtype=np.float32)
+
+    def _fetch(self, name: str) -> VectorCollection:
+        if self.flat_max_records > 0 and not self._exists(name):
+            return FlatCollection(
+                name,
+                embedding_function=self.embedding_function,
+                dtype=self.flat_dtype,
+                max_records=self.flat_max_records,
+                promote=self._promote,
+            )
+        if self.embedding_function is None:
+            col = self.client.get_or_create_collection(name=name)
+        else:
+            col = self.client.get_or_create_collection(name=name, embedding_function=self.embedding_function)
+        model = (col.metadata or {}).get(EMBEDDING_MODEL_KEY)
+        if model is None:
+            return col
+        # Embedded with another model: reopen with that model's function.
+        return self.client.get_collection(name=name, embedding_function=self._model_function(model))
+
+    def _model_function(self, model: Optional[str]) -> Optional[EmbeddingFunction]:
+        if model is None:
+            return self.embedding_function
+        fn = self.embedding_functions.get(model)
+        if fn is None:
+            raise ValueError(f"embedding model '{model}' is not configured")
+        return fn
+
+    def _promote(self, flat: FlatCollection) -> VectorCollection:
+        """Copy a flat collection into Chroma and swap the cached handle."""
+        kwargs: Dict[str, Any] = {"metadata": flat.metadata or None}
+        hnsw = flat.configuration["hnsw"]
+        if hnsw:
+            kwargs["configuration"] = {"hnsw": hnsw}
+        if self.embedding_function is not None:
+            kwargs["embedding_function"] = self.embedding_function
+        col = self.client.get_or_create_collection(name=flat.name, **kwargs)
+        for ids, documents, metadatas, embeddings in flat.export(self.client.get_max_batch_size()):
+            col.upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)  # type: ignore[arg-type]
+        with self._lock:
+            if self._handles.get(flat.name) is flat:
+                self._handles[flat.name] = col
+            self.promotions += 1
+        return col
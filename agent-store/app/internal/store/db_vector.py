@@ -178,30 +178,61 @@
 # app/vectorstore.py
 from __future__ import annotations
 
-from typing import Generator, Optional
+from pathlib import Path
+from typing import Any, Dict, Generator, Optional, cast
 
 import chromadb
-from chromadb import ClientAPI
+from chromadb.api.types import EmbeddingFunction
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction, config_to_embedding_function
+
+from app.internal.store.collection_aliases import CollectionAliases
+from app.internal.store.collection_registry import CollectionRegistry
+from app.internal.store.embedding_cache import CachedEmbeddingFunction, EmbeddingCache, embedding_namespace
+from app.internal.store.query_cache import QueryResultCache
+from app.internal.store.vector_backend import BACKENDS, MemoryBackend, VectorBackend
 
 # ---- Defaults (override in tests / config) ----
 CHROMA_PATH = "./chroma"  # for PersistentClient
 USE_PERSISTENT = False
+BACKEND = "chroma"  # or "memory": in-process flat index, hashed embeddings
+FLAT_MAX_RECORDS = 0  # 0: every collection lives in Chroma
+FLAT_DTYPE = "float32"
+SNAPSHOT_PATH = "./snapshots"
+ALIASES_FILE = "aliases.json"  # next to a persistent Chroma store
 
-_client: Optional[ClientAPI] = None
+_client: Optional[VectorBackend] = None
+_aliases = CollectionAliases()
+_embedding_function: Optional[EmbeddingFunction] = None
+_embedding_models: Dict[str, EmbeddingFunction] = {}
+_embedding_cache_path: Optional[str] = None
+_embedding_caches: Dict[str, EmbeddingCache] = {}  # by embedding namespace
+_embedding_cache: Optional[EmbeddingCache] = None
+_cached_embedding_function: Optional[EmbeddingFunction] = None
+_cached_embedding_models: Optional[Dict[str, EmbeddingFunction]] = None
+_registry: Optional[CollectionRegistry] = None
+_flat_max_records = FLAT_MAX_RECORDS
+_flat_dtype = FLAT_DTYPE
+_snapshot_path = SNAPSHOT_PATH
+_query_cache = QueryResultCache()
 
 def init_chroma(
     *,
     persistent: bool = USE_PERSISTENT,
     path: str = CHROMA_PATH,
-    client: Optional[ClientAPI] = None,
-) -> ClientAPI:
+    client: Optional[VectorBackend] = None,
+) -> VectorBackend:
     """
     Initialize the global Chroma client.
 
     - If `client` is provided, it becomes the global client (useful for tests).
     - Otherwise creates a new in-memory Client() OR PersistentClient().
+
+    Collection aliases are kept in a file next to a persistent store and in
+    memory otherwise.
     """
-    global _client
+    global _client, _registry, _aliases
+    _registry = None
+    _aliases = CollectionAliases(Path(path) / ALIASES_FILE if persistent and client is None else None)
 
     if client is not None:
         _client = client
@@ -214,12 +245,30 @@ def init_chroma(
 
     return _client
 
-def set_client(new_client: ClientAPI) -> None:
+def init_vector_backend(
+    backend: str = BACKEND,
+    *,
+    persistent: bool = USE_PERSISTENT,
+    path: str = CHROMA_PATH,
+) -> VectorBackend:
+    """
+    Initialize the global client as the given backend: "chroma" (see
+    `init_chroma`) or "memory" (`MemoryBackend`, nothing persisted).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown vector backend '{backend}', expected one of {', '.join(BACKENDS)}")
+    if backend == "memory":
+        return init_chroma(client=MemoryBackend())
+    return init_chroma(persistent=persistent, path=path)
+
+def set_client(new_client: VectorBackend) -> None:
     """Override the global client (e.g. tests)."""
-    global _client
+    global _client, _registry, _aliases
     _client = new_client
+    _registry = None
+    _aliases = CollectionAliases()
 
-def get_client() -> ClientAPI:
+def get_client() -> VectorBackend:
     """
     Return the global client. If not initialized, initialize with defaults.
     """
@@ -228,7 +277,134 @@ def get_client() -> ClientAPI:
         _client = init_chroma()
     return _client
 
-def client_dep() -> Generator[ClientAPI, None, None]:
+def set_embedding_function(fn: Optional[EmbeddingFunction]) -> None:
+    """
+    Override the embedding function used for collections (e.g. tests).
+    `None` falls back to Chroma's default embedding function.
+    """
+    global _embedding_function, _embedding_cache, _cached_embedding_function, _registry
+    _embedding_function = fn
+    _embedding_cache = None
+    _cached_embedding_function = None
+    _registry = None
+
+def set_embedding_models(functions: Dict[str, EmbeddingFunction]) -> None:
+    """
+    Further embedding functions by model id, for collections embedded with
+    another model than the default one (e.g. migrated to it).
+    """
+    global _embedding_models, _cached_embedding_models, _registry
+    _embedding_models = dict(functions)
+    _cached_embedding_models = None
+    _registry = None
+
+def init_embedding_models(specs: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Build the embedding models of [tool.vectors.embedding-models]: a Chroma
+    embedding function `name` and its `config` per model id.
+    """
+    set_embedding_models({model: config_to_embedding_function(spec) for model, spec in specs.items()})
+
+def init_embedding_cache(path: str) -> EmbeddingCache:
+    """
+    Put a disk-backed embedding cache in front of the embedding function.
+    """
+    set_embedding_cache(path)
+    get_embedding_function()
+    assert _embedding_cache is not None
+    return _embedding_cache
+
+def set_embedding_cache(path: Optional[str]) -> None:
+    """
+    Set (or with None, remove) the embedding cache directory. Each embedding
+    function gets its own namespace in it, derived from its name and config.
+    """
+    global _embedding_cache_path, _embedding_cache, _cached_embedding_function, _cached_embedding_models, _registry
+    _embedding_cache_path = path
+    _embedding_caches.clear()
+    _embedding_cache = None
+    _cached_embedding_function = None
+    _cached_embedding_models = None
+    _registry = None
+
+def set_flat_index(max_records: int = FLAT_MAX_RECORDS, dtype: str = FLAT_DTYPE) -> None:
+    """
+    Keep new collections in an in-process flat index until they exceed
+    `max_records` (0 disables).
+    """
+    global _flat_max_records, _flat_dtype, _registry
+    _flat_max_records = max_records
+    _flat_dtype = dtype
+    _registry = None
+
+def set_snapshot_path(path: str = SNAPSHOT_PATH) -> None:
+    """Directory the snapshot API writes to and restores from."""
+    global _snapshot_path
+    _snapshot_path = path
+
+def get_snapshot_path() -> str:
+    return _snapshot_path
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    return _embedding_cache
+
+def get_embedding_function() -> Optional[EmbeddingFunction]:
+    """
+    Return the embedding function for collections, wrapped by the embedding
+    cache when one is configured; None means Chroma's default.
+    """
+    global _embedding_cache, _cached_embedding_function
+    if _embedding_cache_path is None:
+        return _embedding_function
+    if _cached_embedding_function is None:
+        cached = cast(CachedEmbeddingFunction, _with_cache(_embedding_function or DefaultEmbeddingFunction()))
+        _embedding_cache = cached.cache
+        _cached_embedding_function = cached
+    return _cached_embedding_function
+
+def get_embedding_models() -> Dict[str, EmbeddingFunction]:
+    """The embedding models by id, each wrapped by the embedding cache when one is configured."""
+    global _cached_embedding_models
+    if _cached_embedding_models is None:
+        _cached_embedding_models = {model: _with_cache(fn) for model, fn in _embedding_models.items()}
+    return _cached_embedding_models
+
+def _with_cache(fn: EmbeddingFunction) -> EmbeddingFunction:
+    """`fn` behind its namespace of the embedding cache, if one is configured."""
+    if _embedding_cache_path is None:
+        return fn
+    namespace = embedding_namespace(fn)
+    cache = _embedding_caches.get(namespace)
+    if cache is None:
+        cache = _embedding_caches[namespace] = EmbeddingCache(_embedding_cache_path, namespace)
+    return CachedEmbeddingFunction(fn, cache)
+
+def get_collection_registry(client: Optional[VectorBackend] = None) -> CollectionRegistry:
+    """
+    Return the process-wide collection handle registry for `client`
+    (defaults to the global client). Rebuilt when the client or the
+    embedding function changes.
+    """
+    global _registry
+    client = client or get_client()
+    if _registry is None or _registry.client is not client:
+        _registry = CollectionRegistry(
+            client,
+            embedding_function=get_embedding_function(),
+            flat_max_records=_flat_max_records,
+            flat_dtype=_flat_dtype,
+            aliases=_aliases,
+            embedding_functions=get_embedding_models(),
+        )
+        # Cached results are keyed on the old registry's generations.
+        _query_cache.clear()
+    return _registry
+
+def get_query_cache() -> QueryResultCache:
+    """Return the process-wide query result cache."""
+    return _query_cache
+
+def client_dep() -> Generator[VectorBackend, None, None]:
     """
     FastAPI dependency that yields the client.
     Use this if you want the same 'yield style' as DB sessions.
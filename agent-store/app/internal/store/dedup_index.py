@@ -0,0 +1,156 @@
+# app/internal/store/dedup_index.py
+from __future__ import annotations
+
+import zlib
+from threading import Event, Lock
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+NUM_PERM = 128
+# 32 bands of 4 rows: pairs above ~0.6 Jaccard almost surely share a band.
+BANDS = 32
+SHINGLE_WORDS = 3
+_PRIME = (1 << 31) - 1  # a * hash < 2**63, so the permutations fit in uint64
+_FNV = np.uint64(0x100000001B3)
+_INITIAL_CAPACITY = 256
+
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(1, _PRIME, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, size=NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> Set[str]:
+    """Lower-cased word `size`-grams; shorter texts are one shingle."""
+    words = text.lower().split()
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint32) of the text's word shingles."""
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles(text)), dtype=np.uint64)
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def band_keys(signatures: np.ndarray) -> np.ndarray:
+    """One uint64 key per band (n x BANDS) for signatures (n x NUM_PERM)."""
+    rows = signatures.reshape(signatures.shape[0], BANDS, -1).astype(np.uint64)
+    keys = np.zeros(rows.shape[:2], dtype=np.uint64)
+    for j in range(rows.shape[2]):
+        keys = (keys * _FNV) ^ rows[:, :, j]
+    return keys
+
+
+class MinHashIndex:
+    """
+    Near-duplicate index over the documents of one collection: MinHash
+    signatures and their LSH band keys in two contiguous arrays, plus one
+    bucket map per band from band key to the ids that hashed there.
+
+    A lookup gathers candidates from the buckets its own band keys hit,
+    then estimates Jaccard similarity on the candidates' full signatures;
+    rows sharing no band are never looked at. Same add/remove interface
+    as `BM25Index`, so `LexicalIndexes` builds and keeps it.
+    """
+
+    def __init__(self):
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._signatures = np.zeros((0, NUM_PERM), dtype=np.uint32)
+        self._bands = np.zeros((0, BANDS), dtype=np.uint64)
+        self._buckets: List[Dict[int, List[str]]] = [{} for _ in range(BANDS)]
+        self._lock = Lock()
+        self.ready = Event()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, ids: Sequence[str], documents: Sequence[Optional[str]], *, replace: bool = True) -> None:
+        """Index documents; with `replace=False` already indexed ids are kept."""
+        pending = [(id, doc) for id, doc in zip(ids, documents) if replace or id not in self._rows]
+        if pending:
+            signatures = np.stack([minhash(doc or "") for _, doc in pending])
+            self.add_signatures([id for id, _ in pending], signatures, replace=replace)
+
+    def add_signatures(self, ids: Sequence[str], signatures: np.ndarray, *, replace: bool = True) -> None:
+        bands = band_keys(signatures)
+        with self._lock:
+            for id, signature, keys in zip(ids, signatures, bands):
+                row = self._rows.get(id)
+                if row is not None and not replace:
+                    continue
+                if row is None:
+                    row = self._append(id)
+                else:
+                    self._unbucket(id, self._bands[row])
+                self._signatures[row] = signature
+                self._bands[row] = keys
+                self._bucket(id, keys)
+
+    def remove(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            for id in ids:
+                row = self._rows.pop(id, None)
+                if row is None:
+                    continue
+                self._unbucket(id, self._bands[row])
+                last = len(self._ids) - 1
+                if row != last:
+                    # Move the last row into the hole to keep the arrays dense.
+                    moved = self._ids[last]
+                    self._ids[row] = moved
+                    self._rows[moved] = row
+                    self._signatures[row] = self._signatures[last]
+                    self._bands[row] = self._bands[last]
+                self._ids.pop()
+
+    def nearest(
+        self, signature: np.ndarray, threshold: float, *, exclude: Optional[str] = None
+    ) -> Optional[Tuple[str, float]]:
+        """The most similar indexed id (other than `exclude`) with estimated Jaccard >= `threshold`."""
+        with self._lock:
+            candidates = self._candidate_rows(signature, exclude)
+            if not candidates.size:
+                return None
+            similarity = (self._signatures[candidates] == signature).mean(axis=1)
+            best = int(np.argmax(similarity))
+            if similarity[best] < threshold:
+                return None
+            return self._ids[candidates[best]], float(similarity[best])
+
+    def candidates(self, signature: np.ndarray, *, exclude: Optional[str] = None) -> List[str]:
+        """Indexed ids sharing at least one band with `signature`, in row order."""
+        with self._lock:
+            return [self._ids[row] for row in self._candidate_rows(signature, exclude)]
+
+    def _candidate_rows(self, signature: np.ndarray, exclude: Optional[str]) -> np.ndarray:
+        keys = band_keys(signature[None, :])[0].tolist()
+        rows = {self._rows[id] for band, key in zip(self._buckets, keys) for id in band.get(key, ())}
+        rows.discard(self._rows.get(exclude))  # type: ignore[arg-type]
+        return np.fromiter(sorted(rows), dtype=np.intp, count=len(rows))
+
+    def _bucket(self, id: str, keys: np.ndarray) -> None:
+        for band, key in zip(self._buckets, keys.tolist()):
+            band.setdefault(key, []).append(id)
+
+    def _unbucket(self, id: str, keys: np.ndarray) -> None:
+        for band, key in zip(self._buckets, keys.tolist()):
+            bucket = band[key]
+            bucket.remove(id)
+            if not bucket:
+                del band[key]
+
+    def _append(self, id: str) -> int:
+        row = len(self._ids)
+        if row == self._signatures.shape[0]:
+            capacity = max(2 * row, _INITIAL_CAPACITY)
+            signatures = np.zeros((capacity, NUM_PERM), dtype=np.uint32)
+            bands = np.zeros((capacity, BANDS), dtype=np.uint64)
+            signatures[:row] = self._signatures[:row]
+            bands[:row] = self._bands[:row]
+            self._signatures, self._bands = signatures, bands
+        self._ids.append(id)
+        self._rows[id] = row
+        return row
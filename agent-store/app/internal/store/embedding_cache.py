@@ -0,0 +1,268 @@
+# app/internal/store/embedding_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import warnings
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence, cast
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+_DIGEST_SIZE = 32  # sha256
+_INITIAL_CAPACITY = 1024
+
+logger = logging.getLogger(__name__)
+
+
+def embedding_namespace(fn: Any) -> str:
+    """
+    Cache namespace of an embedding function: its `name()` plus a hash of
+    its `get_config()`, so another model (or the same one configured
+    differently) never reads vectors cached for this one.
+    """
+    with warnings.catch_warnings():
+        # Chroma's base class warns (and returns NotImplemented) for both.
+        warnings.simplefilter("ignore", DeprecationWarning)
+        name = fn.name() if hasattr(fn, "name") else NotImplemented
+        config = fn.get_config() if hasattr(fn, "get_config") else NotImplemented
+    if name is NotImplemented or not name:
+        name = f"{type(fn).__module__}.{type(fn).__qualname__}"
+    if config is NotImplemented:
+        config = {}
+    digest = hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f"{name}-{digest[:12]}"
+
+
+class EmbeddingCache:
+    """
+    Content-addressed, disk-backed embedding cache for one embedding model.
+
+    Layout of `<directory>/<model id>/` (see `embedding_namespace`):
+    - `meta.json`: model id and embedding dimension;
+    - `vectors.f32`: float32 matrix (capacity x dim), memory-mapped, so only
+      the rows actually touched are resident;
+    - `keys.bin`: append-only sha256 digests of the texts; digest i is the
+      key of row i.
+
+    Rows are written before their key is appended, so a crash can at worst
+    lose the last entries, never map a key to a half-written row.
+    Intended for a single writing process.
+    """
+
+    def __init__(self, directory: str | Path, model_id: str):
+        self.model_id = model_id
+        self.path = Path(directory) / re.sub(r"[^A-Za-z0-9._-]+", "_", model_id)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self._meta_path = self.path / "meta.json"
+        self._keys_path = self.path / "keys.bin"
+        self._vectors_path = self.path / "vectors.f32"
+
+        self._lock = Lock()
+        self._index: Dict[bytes, int] = {}
+        self._rows = 0
+        self._capacity = 0
+        self._dim: Optional[int] = None
+        self._matrix: Optional[np.memmap] = None
+        self.hits = 0
+        self.misses = 0
+
+        self._load()
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self._dim
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Cached embeddings for `texts`, None where missing."""
+        out: List[Optional[np.ndarray]] = []
+        with self._lock:
+            for text in texts:
+                row = self._index.get(self.key(text))
+                if row is None or self._matrix is None:
+                    self.misses += 1
+                    out.append(None)
+                else:
+                    self.hits += 1
+                    out.append(np.array(self._matrix[row]))
+        return out
+
+    def put_many(self, texts: Sequence[str], embeddings: Sequence[Any]) -> None:
+        if not texts:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[0] != len(texts):
+            raise ValueError("expected one embedding per text")
+
+        with self._lock:
+            if self._dim is None:
+                self._init_dim(int(vectors.shape[1]))
+            if vectors.shape[1] != self._dim:
+                raise ValueError(f"embedding dimension {vectors.shape[1]} != cached dimension {self._dim}")
+
+            keys: List[bytes] = []
+            rows: List[int] = []
+            for text in texts:
+                digest = self.key(text)
+                if digest in self._index or digest in keys:
+                    rows.append(-1)
+                    continue
+                keys.append(digest)
+                rows.append(self._rows + len(keys) - 1)
+
+            if not keys:
+                return
+
+            self._ensure_capacity(self._rows + len(keys))
+            assert self._matrix is not None
+            fresh = [i for i, row in enumerate(rows) if row >= 0]
+            self._matrix[self._rows:self._rows + len(keys)] = vectors[fresh]
+            self._matrix.flush()
+
+            with open(self._keys_path, "ab") as f:
+                f.write(b"".join(keys))
+
+            for i, digest in enumerate(keys):
+                self._index[digest] = self._rows + i
+            self._rows += len(keys)
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. when they no longer match the model."""
+        with self._lock:
+            if self._matrix is not None:
+                del self._matrix
+            self._matrix = None
+            for path in (self._meta_path, self._keys_path, self._vectors_path):
+                path.unlink(missing_ok=True)
+            self._index.clear()
+            self._rows = self._capacity = 0
+            self._dim = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model_id": self.model_id,
+            "entries": self._rows,
+            "dim": self._dim,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    # -------------------------
+    # Storage
+    # -------------------------
+
+    def _load(self) -> None:
+        if not self._meta_path.exists():
+            return
+        meta = json.loads(self._meta_path.read_text())
+        if meta.get("model_id") != self.model_id:
+            # Another id that sanitizes to the same directory name.
+            logger.warning("Embedding cache %s belongs to %r, clearing it", self.path, meta.get("model_id"))
+            self.clear()
+            return
+        self._dim = int(meta["dim"])
+
+        raw = self._keys_path.read_bytes() if self._keys_path.exists() else b""
+        vector_bytes = self._vectors_path.stat().st_size if self._vectors_path.exists() else 0
+        self._capacity = vector_bytes // (4 * self._dim)
+        # Ignore a torn tail in the key file and keys without a stored row.
+        rows = min(len(raw) // _DIGEST_SIZE, self._capacity)
+        for row in range(rows):
+            self._index[raw[row * _DIGEST_SIZE:(row + 1) * _DIGEST_SIZE]] = row
+        self._rows = rows
+        if self._capacity:
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(self._capacity, self._dim))
+
+    def _init_dim(self, dim: int) -> None:
+        self._dim = dim
+        self._meta_path.write_text(json.dumps({"model_id": self.model_id, "dim": dim}))
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self._capacity:
+            return
+        assert self._dim is not None
+        capacity = max(self._capacity, _INITIAL_CAPACITY)
+        while capacity < rows:
+            capacity *= 2
+        if self._matrix is not None:
+            self._matrix.flush()
+            del self._matrix
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self._dim * 4)
+        self._capacity = capacity
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self._dim))
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Embedding function that serves known texts from an `EmbeddingCache` and
+    only sends the misses (in one call) to the wrapped function.
+
+    The first call is always embedded by the wrapped function, to check the
+    dimension recorded in the cache's meta; a cache that doesn't match is
+    cleared. Name, config and supported spaces are delegated to the
+    wrapped function.
+    """
+
+    def __init__(self, inner: EmbeddingFunction[Documents], cache: EmbeddingCache):
+        self.inner = inner
+        self.cache = cache
+        self._checked = False
+
+    def __call__(self, input: Documents) -> Embeddings:
+        texts = list(input)
+        if not self._checked and texts:
+            return self._first_call(texts)
+        cached = self.cache.get_many(texts)
+        missing = [i for i, vec in enumerate(cached) if vec is None]
+
+        if missing:
+            # Duplicates within one call are embedded once.
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            computed = dict(zip(unique, self.inner(unique)))
+            self.cache.put_many(unique, [computed[t] for t in unique])
+            for i in missing:
+                cached[i] = np.asarray(computed[texts[i]], dtype=np.float32)
+
+        return cast(Embeddings, cached)
+
+    def _first_call(self, texts: List[str]) -> Embeddings:
+        computed = [np.asarray(e, dtype=np.float32) for e in self.inner(texts)]
+        dim = int(computed[0].shape[0])
+        if self.cache.dim is not None and self.cache.dim != dim:
+            logger.warning(
+                "Embedding cache %s holds %d-dim vectors, %s returns %d; clearing it",
+                self.cache.path, self.cache.dim, self.cache.model_id, dim,
+            )
+            self.cache.clear()
+        self.cache.put_many(texts, computed)
+        self._checked = True
+        return cast(Embeddings, computed)
+
+    def name(self) -> str:  # type: ignore[override]
+        return self.inner.name()
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.inner.get_config()
+
+    def build_from_config(self, config: Dict[str, Any]) -> EmbeddingFunction[Documents]:  # type: ignore[override]
+        return self.inner.build_from_config(config)
+
+    def default_space(self):  # type: ignore[override]
+        return self.inner.default_space()
+
+    def supported_spaces(self):  # type: ignore[override]
+        return self.inner.supported_spaces()
@@ -0,0 +1,508 @@
+# app/internal/store/flat_index.py
+from __future__ import annotations
+
+import functools
+import logging
+import re
+from threading import RLock
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+
+DEFAULT_MAX_RECORDS = 20_000
+_INITIAL_CAPACITY = 256
+# float16 rows are scored in float32 blocks of this many rows.
+_BLOCK_ROWS = 4096
+
+logger = logging.getLogger(__name__)
+
+Metadata = Dict[str, Any]
+Where = Dict[str, Any]
+
+
+class _Column:
+    """
+    One metadata key as arrays parallel to the embedding rows, so filters
+    are vectorized compares instead of per-record dict lookups.
+    """
+
+    def __init__(self, capacity: int):
+        self.values = np.full(capacity, None, dtype=object)
+        self.numbers = np.full(capacity, np.nan)  # int/float values, NaN otherwise
+        self.present = np.zeros(capacity, dtype=bool)
+        self.is_bool = np.zeros(capacity, dtype=bool)
+
+    def grow(self, capacity: int) -> None:
+        n = self.values.shape[0]
+        self.values = np.concatenate([self.values, np.full(capacity - n, None, dtype=object)])
+        self.numbers = np.concatenate([self.numbers, np.full(capacity - n, np.nan)])
+        self.present = np.concatenate([self.present, np.zeros(capacity - n, dtype=bool)])
+        self.is_bool = np.concatenate([self.is_bool, np.zeros(capacity - n, dtype=bool)])
+
+    def set(self, row: int, value: Any) -> None:
+        self.values[row] = value
+        self.present[row] = value is not None
+        self.is_bool[row] = isinstance(value, bool)
+        numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+        self.numbers[row] = float(value) if numeric else np.nan
+
+    def move(self, src: int, dst: int) -> None:
+        for array in (self.values, self.numbers, self.present, self.is_bool):
+            array[dst] = array[src]
+
+    def equals(self, value: Any, n: int) -> np.ndarray:
+        # Chroma keeps types apart: True doesn't match 1, "1" doesn't match 1.
+        if isinstance(value, bool):
+            return self.is_bool[:n] & (self.values[:n] == value)
+        if isinstance(value, (int, float)):
+            return self.numbers[:n] == float(value)
+        return self.present[:n] & ~self.is_bool[:n] & (self.values[:n] == value)
+
+
+def _forward(method: Callable[..., Any]) -> Callable[..., Any]:
+    """Once promoted, calls on a (stale) flat handle go to the Chroma collection."""
+
+    @functools.wraps(method)
+    def wrapper(self: "FlatCollection", *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            target = self._promoted
+            if target is None:
+                return method(self, *args, **kwargs)
+        return getattr(target, method.__name__)(*args, **kwargs)
+
+    return wrapper
+
+
+class FlatCollection:
+    """
+    In-process exact-search collection with the subset of Chroma's
+    `Collection` API the repository uses, for small collections where a
+    single matrix-vector product beats HNSW behind Chroma's client stack.
+
+    Embeddings are stored L2-normalized in one contiguous float32 (or
+    float16) array, with their norms kept aside so l2/ip distances match
+    Chroma's. Top-k is one matmul plus `argpartition`; metadata filters are
+    evaluated on per-key column arrays before scoring. Deletes move the last
+    row into the hole, so the arrays stay dense.
+
+    When an add/upsert takes it past `max_records`, `promote` is called to
+    move the data into a Chroma collection; afterwards every call on this
+    handle is forwarded there. Memory-only: nothing is persisted.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        embedding_function: Optional[EmbeddingFunction] = None,
+        dtype: str = "float32",
+        max_records: int = DEFAULT_MAX_RECORDS,
+        metadata: Optional[Metadata] = None,
+        promote: Optional[Callable[["FlatCollection"], Any]] = None,
+    ):
+        self.name = name
+        self.metadata = metadata
+        self.dtype = np.dtype(dtype)
+        self.max_records = max_records
+        self._embedding_function = embedding_function
+        self._promote = promote
+        self._promoted: Optional[Any] = None
+        self._hnsw: Dict[str, Any] = {}
+        self._lock = RLock()
+
+        self._n = 0
+        self._capacity = 0
+        self._dim: Optional[int] = None
+        self._matrix = np.zeros((0, 0), dtype=self.dtype)
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._documents: List[Optional[str]] = []
+        self._metadatas: List[Optional[Metadata]] = []
+        self._columns: Dict[str, _Column] = {}
+
+    @property
+    def promoted(self) -> Optional[Any]:
+        return self._promoted
+
+    @property
+    def pending_promotion(self) -> bool:
+        """Held here until it grows past `max_records` (False for standalone use)."""
+        return self._promote is not None and self._promoted is None
+
+    @property
+    def configuration(self) -> Dict[str, Any]:
+        # HNSW settings are only kept for the Chroma collection on promotion.
+        return {"hnsw": dict(self._hnsw)}
+
+    # -------------------------
+    # Collection API
+    # -------------------------
+
+    @_forward
+    def count(self) -> int:
+        return self._n
+
+    @_forward
+    def add(self, ids, embeddings=None, metadatas=None, documents=None, **_: Any) -> None:
+        # Like Chroma, adding an existing id is a no-op.
+        fresh = [i for i, id in enumerate(ids) if id not in self._rows]
+        self._write(ids, embeddings, metadatas, documents, only=fresh)
+        self._maybe_promote()
+
+    @_forward
+    def upsert(self, ids, embeddings=None, metadatas=None, documents=None, **_: Any) -> None:
+        self._write(ids, embeddings, metadatas, documents, only=list(range(len(ids))))
+        self._maybe_promote()
+
+    @_forward
+    def update(self, ids, embeddings=None, metadatas=None, documents=None, **_: Any) -> None:
+        known = [i for i, id in enumerate(ids) if id in self._rows]
+        if not known:
+            return
+        if embeddings is None and documents is not None:
+            embeddings = self._embed([documents[i] for i in known])
+            embeddings = {i: e for i, e in zip(known, embeddings)}
+        for i in known:
+            row = self._rows[ids[i]]
+            if embeddings is not None:
+                self._set_vector(row, embeddings[i])
+            if documents is not None:
+                self._documents[row] = documents[i]
+            if metadatas is not None and metadatas[i] is not None:
+                # Chroma merges metadata on update; None deletes a key.
+                merged = dict(self._metadatas[row] or {})
+                for key, value in metadatas[i].items():
+                    if value is None:
+                        merged.pop(key, None)
+                    else:
+                        merged[key] = value
+                self._set_metadata(row, merged or None)
+
+    @_forward
+    def delete(self, ids=None, where=None, where_document=None, **_: Any) -> None:
+        for row in sorted(self._select(ids, where, where_document).tolist(), reverse=True):
+            self._remove_row(row)
+
+    @_forward
+    def get(
+        self,
+        ids=None,
+        where=None,
+        limit=None,
+        offset=None,
+        where_document=None,
+        include=("metadatas", "documents"),
+        **_: Any,
+    ) -> Dict[str, Any]:
+        rows = self._select(ids, where, where_document)
+        start = offset or 0
+        rows = rows[start:start + limit] if limit is not None else rows[start:]
+        out = self._columns_for(rows.tolist(), include)
+        out["ids"] = [self._ids[r] for r in rows.tolist()]
+        return out
+
+    @_forward
+    def query(
+        self,
+        query_embeddings=None,
+        query_texts=None,
+        n_results=10,
+        where=None,
+        where_document=None,
+        include=("metadatas", "documents", "distances"),
+        **_: Any,
+    ) -> Dict[str, Any]:
+        queries = np.asarray(
+            query_embeddings if query_embeddings is not None else self._embed(list(query_texts or [])),
+            dtype=np.float32,
+        )
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        if self._dim is not None and queries.shape[1] != self._dim:
+            raise ValueError(f"Collection expecting embedding with dimension of {self._dim}, got {queries.shape[1]}")
+
+        filtered = where is not None or where_document is not None
+        rows = self._select(None, where, where_document) if filtered else None
+        out: Dict[str, Any] = {"ids": [], "distances": [], "documents": [], "metadatas": [], "embeddings": []}
+        distances = self._distances(queries, rows)
+        candidates = rows if rows is not None else np.arange(self._n)
+
+        for qi in range(queries.shape[0]):
+            k = min(n_results, candidates.shape[0])
+            if k == 0:
+                picked = np.zeros(0, dtype=np.int64)
+            else:
+                d = distances[:, qi]
+                top = np.argpartition(d, k - 1)[:k]
+                picked = top[np.argsort(d[top], kind="stable")]
+            chosen = candidates[picked].tolist()
+            cols = self._columns_for(chosen, include)
+            out["ids"].append([self._ids[r] for r in chosen])
+            out["distances"].append(distances[picked, qi].tolist())
+            for field in ("documents", "metadatas", "embeddings"):
+                out[field].append(cols[field])
+
+        for field in ("documents", "metadatas", "embeddings", "distances"):
+            if field not in include:
+                out[field] = None
+        return out
+
+    @_forward
+    def modify(self, name=None, metadata=None, configuration=None, **_: Any) -> None:
+        if name is not None:
+            self.name = name
+        if metadata is not None:
+            self.metadata = metadata
+        if configuration is not None:
+            self._hnsw.update((configuration or {}).get("hnsw") or {})
+
+    def _embed(self, input: Sequence[str], is_query: bool = False) -> List[np.ndarray]:
+        if self._embedding_function is None:
+            from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+            self._embedding_function = DefaultEmbeddingFunction()
+        return [np.asarray(e, dtype=np.float32) for e in self._embedding_function(list(input))]
+
+    def export(self, batch_size: int) -> Iterator[Tuple[List[str], List[Optional[str]], List[Optional[Metadata]], np.ndarray]]:
+        """(ids, documents, metadatas, raw embeddings) in batches, for promotion."""
+        with self._lock:
+            for start in range(0, self._n, batch_size):
+                end = min(start + batch_size, self._n)
+                yield (
+                    self._ids[start:end],
+                    self._documents[start:end],
+                    self._metadatas[start:end],
+                    self._raw(np.arange(start, end)),
+                )
+
+    # -------------------------
+    # Storage
+    # -------------------------
+
+    def _write(self, ids, embeddings, metadatas, documents, *, only: List[int]) -> None:
+        if not only:
+            return
+        if embeddings is None:
+            if documents is None:
+                raise ValueError("documents or embeddings are required")
+            vectors: Dict[int, Any] = dict(zip(only, self._embed([documents[i] for i in only])))
+        else:
+            vectors = {i: embeddings[i] for i in only}
+
+        for i in only:
+            row = self._rows.get(ids[i])
+            if row is None:
+                row = self._append_row(ids[i])
+            self._set_vector(row, vectors[i])
+            self._documents[row] = documents[i] if documents is not None else None
+            self._set_metadata(row, metadatas[i] if metadatas is not None else None)
+
+    def _append_row(self, id: str) -> int:
+        row = self._n
+        self._reserve(row + 1)
+        self._ids.append(id)
+        self._documents.append(None)
+        self._metadatas.append(None)
+        self._rows[id] = row
+        self._n += 1
+        return row
+
+    def _reserve(self, rows: int) -> None:
+        if rows <= self._capacity:
+            return
+        capacity = max(self._capacity * 2, _INITIAL_CAPACITY)
+        while capacity < rows:
+            capacity *= 2
+        if self._dim is not None:
+            matrix = np.zeros((capacity, self._dim), dtype=self.dtype)
+            matrix[:self._n] = self._matrix[:self._n]
+            self._matrix = matrix
+        norms = np.zeros(capacity, dtype=np.float32)
+        norms[:self._n] = self._norms[:self._n]
+        self._norms = norms
+        for column in self._columns.values():
+            column.grow(capacity)
+        self._capacity = capacity
+
+    def _set_vector(self, row: int, embedding: Any) -> None:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        if self._dim is None:
+            self._dim = vector.shape[0]
+            self._matrix = np.zeros((self._capacity, self._dim), dtype=self.dtype)
+        elif vector.shape[0] != self._dim:
+            raise ValueError(f"Collection expecting embedding with dimension of {self._dim}, got {vector.shape[0]}")
+        norm = float(np.linalg.norm(vector))
+        self._norms[row] = norm
+        self._matrix[row] = vector / norm if norm else vector
+
+    def _set_metadata(self, row: int, metadata: Optional[Metadata]) -> None:
+        previous = self._metadatas[row] or {}
+        self._metadatas[row] = dict(metadata) if metadata else None
+        current = metadata or {}
+        for key in previous:
+            if key not in current:
+                self._columns[key].set(row, None)
+        for key, value in current.items():
+            column = self._columns.get(key)
+            if column is None:
+                column = self._columns[key] = _Column(self._capacity)
+            column.set(row, value)
+
+    def _remove_row(self, row: int) -> None:
+        last = self._n - 1
+        del self._rows[self._ids[row]]
+        if row != last:
+            self._matrix[row] = self._matrix[last]
+            self._norms[row] = self._norms[last]
+            for column in self._columns.values():
+                column.move(last, row)
+            self._ids[row] = self._ids[last]
+            self._documents[row] = self._documents[last]
+            self._metadatas[row] = self._metadatas[last]
+            self._rows[self._ids[row]] = row
+        for column in self._columns.values():
+            column.set(last, None)
+        self._ids.pop()
+        self._documents.pop()
+        self._metadatas.pop()
+        self._n -= 1
+
+    def _raw(self, rows: np.ndarray) -> np.ndarray:
+        if self._dim is None:
+            return np.zeros((len(rows), 0), dtype=np.float32)
+        return self._matrix[rows].astype(np.float32) * self._norms[rows, None]
+
+    def _columns_for(self, rows: List[int], include: Sequence[str]) -> Dict[str, Any]:
+        idx = np.asarray(rows, dtype=np.int64)
+        return {
+            "documents": [self._documents[r] for r in rows] if "documents" in include else None,
+            "metadatas": [self._metadatas[r] for r in rows] if "metadatas" in include else None,
+            "embeddings": self._raw(idx) if "embeddings" in include else None,
+            "included": list(include),
+        }
+
+    # -------------------------
+    # Search
+    # -------------------------
+
+    def _distances(self, queries: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """Distances (len(rows) x queries) in the collection's space."""
+        if self._dim is None or self._n == 0:
+            return np.zeros((0, queries.shape[0]), dtype=np.float32)
+        matrix = self._matrix[:self._n] if rows is None else self._matrix[rows]
+        norms = self._norms[:self._n] if rows is None else self._norms[rows]
+
+        if self.dtype == np.float32:
+            sims = matrix @ queries.T
+        else:
+            sims = np.empty((matrix.shape[0], queries.shape[0]), dtype=np.float32)
+            for start in range(0, matrix.shape[0], _BLOCK_ROWS):
+                sims[start:start + _BLOCK_ROWS] = matrix[start:start + _BLOCK_ROWS].astype(np.float32) @ queries.T
+
+        q_norms = np.linalg.norm(queries, axis=1)
+        space = self._hnsw.get("space", "l2")
+        if space == "cosine":
+            return 1.0 - sims / np.where(q_norms == 0.0, 1.0, q_norms)[None, :]
+        dots = sims * norms[:, None]
+        if space == "ip":
+            return 1.0 - dots
+        return (q_norms ** 2)[None, :] + (norms ** 2)[:, None] - 2.0 * dots
+
+    def _select(self, ids: Optional[Sequence[str]], where: Optional[Where], where_document: Optional[Where]) -> np.ndarray:
+        """Rows matching all given selectors, in row order."""
+        mask = np.ones(self._n, dtype=bool)
+        if ids is not None:
+            by_id = np.zeros(self._n, dtype=bool)
+            by_id[[self._rows[id] for id in ids if id in self._rows]] = True
+            mask &= by_id
+        if where:
+            mask &= self._where(where)
+        if where_document:
+            mask &= self._where_document(where_document)
+        return np.flatnonzero(mask)
+
+    def _where(self, where: Where) -> np.ndarray:
+        n = self._n
+        mask = np.ones(n, dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self._where(clause)
+                continue
+            if key == "$or":
+                either = np.zeros(n, dtype=bool)
+                for clause in condition:
+                    either |= self._where(clause)
+                mask &= either
+                continue
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            column = self._columns.get(key)
+            for op, value in condition.items():
+                mask &= self._compare(column, op, value, n)
+        return mask
+
+    @staticmethod
+    def _compare(column: Optional[_Column], op: str, value: Any, n: int) -> np.ndarray:
+        if column is None:
+            # Negations also match records without the key, as in Chroma.
+            return np.full(n, op in ("$ne", "$nin"), dtype=bool)
+        if op == "$eq":
+            return column.equals(value, n)
+        if op == "$ne":
+            return ~column.equals(value, n)
+        if op == "$in":
+            hit = np.zeros(n, dtype=bool)
+            for v in value:
+                hit |= column.equals(v, n)
+            return hit
+        if op == "$nin":
+            hit = np.zeros(n, dtype=bool)
+            for v in value:
+                hit |= column.equals(v, n)
+            return ~hit
+        numbers = column.numbers[:n]
+        with np.errstate(invalid="ignore"):
+            if op == "$gt":
+                return numbers > value
+            if op == "$gte":
+                return numbers >= value
+            if op == "$lt":
+                return numbers < value
+            if op == "$lte":
+                return numbers <= value
+        raise ValueError(f"unsupported where operator: {op}")
+
+    def _where_document(self, where_document: Where) -> np.ndarray:
+        docs = self._documents
+        mask = np.ones(self._n, dtype=bool)
+        for op, value in where_document.items():
+            if op == "$and":
+                for clause in value:
+                    mask &= self._where_document(clause)
+            elif op == "$or":
+                either = np.zeros(self._n, dtype=bool)
+                for clause in value:
+                    either |= self._where_document(clause)
+                mask &= either
+            elif op in ("$contains", "$not_contains"):
+                hit = np.fromiter((value in (d or "") for d in docs), dtype=bool, count=self._n)
+                mask &= hit if op == "$contains" else ~hit
+            elif op in ("$regex", "$not_regex"):
+                pattern = re.compile(value)
+                hit = np.fromiter((bool(pattern.search(d or "")) for d in docs), dtype=bool, count=self._n)
+                mask &= hit if op == "$regex" else ~hit
+            else:
+                raise ValueError(f"unsupported where_document operator: {op}")
+        return mask
+
+    def _maybe_promote(self) -> None:
+        if self._promote is None or self._n <= self.max_records:
+            return
+        try:
+            self._promoted = self._promote(self)
+        except Exception:
+            # The write already landed here; stay flat and retry on the next one.
+            logger.exception("Promoting flat collection %s failed, keeping it in memory", self.name)
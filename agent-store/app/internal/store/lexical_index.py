@@ -0,0 +1,179 @@
+# app/internal/store/lexical_index.py
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+# Runs of letters/digits, joined by . _ : / - into one compound term so
+# identifiers like "v2.4.1", "INV-2024-0042" or "E_CONN_RESET" stay whole.
+_TOKEN = re.compile(r"[^\W_]+(?:[._:/-][^\W_]+)*")
+_SEPARATORS = re.compile(r"[._:/-]")
+
+RRF_K = 60
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cased terms of `text`. Compound identifiers are indexed whole and
+    by their parts, so "v2.4.1" matches both "v2.4.1" and "2".
+    """
+    return [term for term, _ in term_positions(text)]
+
+
+def term_positions(text: str) -> List[Tuple[str, int]]:
+    """`tokenize` with the character offset of each term in `text`."""
+    terms: List[Tuple[str, int]] = []
+    for match in _TOKEN.finditer(text.lower()):
+        term, start = match.group(), match.start()
+        terms.append((term, start))
+        if not term.isalnum():
+            offset = 0
+            for part in _SEPARATORS.split(term):
+                if part:
+                    terms.append((part, start + offset))
+                offset += len(part) + 1
+    return terms
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[str]:
+    """Fuse ranked id lists: score(id) = sum of 1 / (k + rank), best first."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, id in enumerate(ranking, start=1):
+            scores[id] = scores.get(id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda id: scores[id], reverse=True)
+
+
+class BM25Index:
+    """
+    Incrementally maintained in-memory BM25 (Okapi) inverted index over the
+    documents of one collection.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Counter[str]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._lock = Lock()
+        self.ready = Event()
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def add(self, ids: Sequence[str], documents: Sequence[Optional[str]], *, replace: bool = True) -> None:
+        """Index documents; with `replace=False` already indexed ids are kept."""
+        with self._lock:
+            for id, document in zip(ids, documents):
+                if id in self._doc_terms:
+                    if not replace:
+                        continue
+                    self._remove(id)
+                terms = Counter(tokenize(document or ""))
+                self._doc_terms[id] = terms
+                self._lengths[id] = sum(terms.values())
+                self._total_length += self._lengths[id]
+                for term, tf in terms.items():
+                    self._postings.setdefault(term, {})[id] = tf
+
+    def remove(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            for id in ids:
+                self._remove(id)
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Top `k` (id, score) for `query`, best first."""
+        with self._lock:
+            n = len(self._doc_terms)
+            if not n:
+                return []
+            avg_length = self._total_length / n
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1.0 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for id, tf in postings.items():
+                    norm = self.k1 * (1.0 - self.b + self.b * self._lengths[id] / avg_length)
+                    scores[id] = scores.get(id, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def _remove(self, id: str) -> None:
+        terms = self._doc_terms.pop(id, None)
+        if terms is None:
+            return
+        self._total_length -= self._lengths.pop(id)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(id, None)
+                if not postings:
+                    del self._postings[term]
+
+
+IndexT = TypeVar("IndexT", bound=Any)
+
+
+class LexicalIndexes(Generic[IndexT]):
+    """
+    Document indexes per collection, BM25 unless another `factory` is given
+    (any class with `add`/`remove`, `__len__` and a `ready` Event). An index
+    is built from the collection on first use (`ensure`) and then kept
+    current by the repository's writes; collections nobody searched
+    lexically cost nothing.
+    """
+
+    def __init__(self, factory: Callable[[], IndexT] = BM25Index):  # type: ignore[assignment]
+        self.factory = factory
+        self._indexes: Dict[str, IndexT] = {}
+        self._lock = Lock()
+
+    def get(self, name: str) -> Optional[IndexT]:
+        """The index of `name` if one exists (possibly still building)."""
+        return self._indexes.get(name)
+
+    def ensure(self, name: str, load: Callable[[IndexT], None]) -> IndexT:
+        """
+        Return the index of `name`, building it with `load` if needed.
+
+        The empty index is published before loading, so writes landing
+        during the load are applied to it; `load` must therefore add with
+        `replace=False`.
+        """
+        with self._lock:
+            index = self._indexes.get(name)
+            build = index is None
+            if build:
+                index = self._indexes[name] = self.factory()
+        assert index is not None
+
+        if build:
+            try:
+                load(index)
+            except Exception:
+                with self._lock:
+                    if self._indexes.get(name) is index:
+                        del self._indexes[name]
+                raise
+            finally:
+                index.ready.set()
+        else:
+            index.ready.wait()
+            if self._indexes.get(name) is not index:
+                # The build failed (or the collection was dropped); retry.
+                return self.ensure(name, load)
+        return index
+
+    def drop(self, name: str) -> None:
+        with self._lock:
+            self._indexes.pop(name, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"indexes": len(self._indexes), "documents": sum(len(i) for i in self._indexes.values())}
@@ -0,0 +1,44 @@
+# app/internal/store/mmr.py
+from __future__ import annotations
+
+from typing import Any, List
+
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0.0, 1.0, norms)
+
+
+def mmr_select(query: Any, candidates: Any, k: int, lambda_mult: float = 0.5) -> List[int]:
+    """
+    Maximal marginal relevance: pick `k` of `candidates` (n x d), each step
+    taking argmax of lambda * sim(query, c) - (1 - lambda) * max sim(c, picked),
+    with cosine similarity.
+
+    The candidate similarity matrix is computed once; each step is a few
+    vector ops over all candidates (O(k * n)), not a loop over pairs.
+    Returns indices into `candidates` in pick order.
+    """
+    matrix = _normalize(np.asarray(candidates, dtype=np.float32))
+    n = matrix.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return []
+
+    relevance = matrix @ _normalize(np.asarray(query, dtype=np.float32))
+    similarity = matrix @ matrix.T
+    redundancy = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+
+    picked: List[int] = []
+    for _ in range(k):
+        # Before the first pick there is nothing to be redundant with.
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        scores = np.where(available, lambda_mult * relevance - (1.0 - lambda_mult) * penalty, -np.inf)
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+    return picked
@@ -1,28 +1,87 @@
 from __future__ import annotations
 
+import hashlib
+import heapq
+import json
+import re
+import time
+import uuid
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Sequence, Union, Literal, cast
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union, Literal, cast
 
 import chromadb 
-from chromadb import ClientAPI
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+from chromadb.errors import NotFoundError as ChromaNotFoundError
+
+from app.internal.store.collection_registry import CollectionRegistry
+from app.internal.store.dedup_index import MinHashIndex, minhash
+from app.internal.store.embedding_cache import CachedEmbeddingFunction
+from app.internal.store.lexical_index import BM25Index, LexicalIndexes, reciprocal_rank_fusion
+from app.internal.store.mmr import mmr_select
+from app.internal.store.query_cache import QueryResultCache
+from app.internal.store.vector_backend import VectorBackend
+from app.internal.store.vector_snapshot import SnapshotManifest, read_manifest, read_snapshot, write_snapshot
 
 from app.contracts.contract_vectors import (
     Metadata,
     VectorCreate,
+    VectorPatchItem,
+    VectorQueryColumns,
     VectorQueryHit,
     VectorUpdate,
     VectorRead,
     VectorCollectionRead,
+    VectorIndexConfig,
+    VectorMultiQueryRequest,
     VectorQueryRequest,
     VectorQueryResponse,
 )
 
+# "text" sends `query_texts` (embedded by Chroma), "embedding" sends
+# precomputed `query_embeddings` as they are.
 QueryMode = Literal["text", "embedding"]
 
+# Bulk writes are split into chunks bounded by both item count and total
+# document size, so a single oversized request never turns into one huge
+# embedding call / write.
+DEFAULT_BATCH_SIZE = 256
+MAX_BATCH_CHARS = 2_000_000
+
+# VectorIndexConfig field -> Chroma HNSW configuration key.
+HNSW_SETTINGS = {
+    "space": "space",
+    "construction_ef": "ef_construction",
+    "search_ef": "ef_search",
+    "M": "max_neighbors",
+    "batch_size": "batch_size",
+    "sync_threshold": "sync_threshold",
+}
+# Only these can be changed after creation.
+HNSW_MUTABLE = ("search_ef", "batch_size", "sync_threshold")
+
+# Lexical/hybrid retrieval ranks this many candidates per side before fusing.
+HYBRID_CANDIDATE_FACTOR = 4
+HYBRID_MIN_CANDIDATES = 20
+LEXICAL_LOAD_PAGE = 1000
+SCAN_PAGE_SIZE = 1000
+WARMUP_PROBE = "warmup"
+# Collections a restore (.r) or migration (.m) writes to before a name points at them.
+TEMPORARY_NAME = re.compile(r"\.[mr][0-9a-f]{8}$")
+
+# (index into the submitted items, error message)
+ItemFailure = Tuple[int, str]
+
+
+class DuplicateIdError(ValueError):
+    """An id to add is already stored (Chroma's `add` would silently skip it)."""
+
 
 class VectorRepository:
     """
-    Repository for managing vectors in ChromaDB.
+    Repository for managing vectors in a `VectorBackend` (Chroma by default).
 
     Notes:
     - Uses "patch semantics" for metadata on update: merges provided keys into existing metadata.
@@ -30,12 +89,51 @@ class VectorRepository:
     - Document update is optional; if provided, it overwrites the stored document.
     """
 
-    def __init__(self, client: ClientAPI):
+    def __init__(
+        self,
+        client: VectorBackend,
+        embedding_function: Optional[EmbeddingFunction] = None,
+        registry: Optional[CollectionRegistry] = None,
+        query_cache: Optional[QueryResultCache] = None,
+    ):
         self._client = client
+        # Without a shared registry handles are only cached for this instance.
+        self._registry = registry or CollectionRegistry(client, embedding_function=embedding_function)
+        self._query_cache = query_cache
 
     def _collection(self, name: str):
         # You could switch to get_collection if you prefer strictness.
-        return self._client.get_or_create_collection(name=name)
+        return self._registry.get(name)
+
+    def _max_batch_size(self, requested: int) -> int:
+        # Chroma rejects writes above its own limit; never exceed it.
+        try:
+            limit = int(self._client.get_max_batch_size())
+        except Exception:
+            return requested
+        return max(1, min(requested, limit))
+
+    @staticmethod
+    def _iter_batches(
+        items: Sequence[VectorCreate],
+        batch_size: int,
+        max_chars: int,
+    ) -> Iterator[List[int]]:
+        """
+        Yields lists of indices into `items`, each bounded by `batch_size`
+        items and (softly) `max_chars` document characters.
+        """
+        batch: List[int] = []
+        chars = 0
+        for i, item in enumerate(items):
+            size = len(item.document)
+            if batch and (len(batch) >= batch_size or chars + size > max_chars):
+                yield batch
+                batch, chars = [], 0
+            batch.append(i)
+            chars += size
+        if batch:
+            yield batch
 
     @staticmethod
     def _merge_metadata(existing: Metadata, patch: Optional[Metadata]) -> Metadata:
@@ -51,20 +149,132 @@ class VectorRepository:
                 merged[k] = v
         return merged
 
+    @staticmethod
+    def _metadata_update(existing: Metadata, merged: Metadata) -> Optional[Metadata]:
+        """
+        Chroma merges metadata on `update` and deletes keys set to None, so
+        send the merged result plus an explicit None for every removed key.
+        """
+        payload: Metadata = dict(merged)
+        for k in existing:
+            if k not in merged:
+                payload[k] = None
+        return payload or None
+
     # -------------------------
     # CRUD
     # -------------------------
 
     def create_vector(self, collection: str, data: VectorCreate) -> VectorRead:
-        col = self._collection(collection)
+        with self._registry.writing(collection):
+            col = self._collection(collection)
+            if col.get(ids=[data.id], include=[])["ids"]:
+                raise DuplicateIdError(f"Vector already exists: collection={collection} id={data.id}")
 
-        col.add(
-            ids=[data.id],
-            documents=[data.document],
-            metadatas=[data.metadata],
-        )
+            col.add(
+                ids=[data.id],
+                documents=[data.document],
+                metadatas=[data.metadata or None],
+                **self._embeddings_arg([data]),
+            )
+            self._registry.bump(collection)
+            self._index_documents(collection, [data.id], [data.document])
+
+            return VectorRead(collection=collection, id=data.id, document=data.document, metadata=data.metadata)
+
+    def create_vectors(
+        self,
+        collection: str,
+        items: Sequence[VectorCreate],
+        *,
+        upsert: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_batch_chars: int = MAX_BATCH_CHARS,
+    ) -> List[ItemFailure]:
+        """
+        Bulk write `items` into one collection.
 
-        return VectorRead(collection=collection, id=data.id, document=data.document, metadata=data.metadata)
+        Items are sent in size-bounded chunks, one `add`/`upsert` (and thus one
+        embedding pass) per chunk. If a chunk is rejected, its items are retried
+        one by one so a single bad item doesn't fail its neighbours. Without
+        `upsert`, ids that already exist are reported as conflicts rather
+        than silently skipped (Chroma's `add` ignores them).
+
+        Returns the failures as (index into `items`, error message).
+        """
+        with self._registry.writing(collection):
+            col = self._collection(collection)
+            write = col.upsert if upsert else col.add
+            failures: List[ItemFailure] = []
+            written: List[int] = []
+
+            for batch in self._iter_batches(items, self._max_batch_size(batch_size), max_batch_chars):
+                if not upsert:
+                    batch = self._drop_existing(col, items, batch, failures)
+                # Chroma embeds either all or none of a write, so items with and
+                # without precomputed embeddings go in separate calls.
+                for part in (
+                    [i for i in batch if items[i].embedding is not None],
+                    [i for i in batch if items[i].embedding is None],
+                ):
+                    if not part:
+                        continue
+                    try:
+                        write(
+                            ids=[items[i].id for i in part],
+                            documents=[items[i].document for i in part],
+                            metadatas=[items[i].metadata or None for i in part],
+                            **self._embeddings_arg([items[i] for i in part]),
+                        )
+                        written.extend(part)
+                    except Exception:
+                        for i in part:
+                            try:
+                                write(
+                                    ids=[items[i].id],
+                                    documents=[items[i].document],
+                                    metadatas=[items[i].metadata or None],
+                                    **self._embeddings_arg([items[i]]),
+                                )
+                                written.append(i)
+                            except Exception as e:
+                                failures.append((i, str(e)))
+
+            self._registry.bump(collection)
+            # Only what reached the store; existing ids were skipped above.
+            self._index_documents(collection, [items[i].id for i in written], [items[i].document for i in written])
+            return failures
+
+    @staticmethod
+    def _drop_existing(col: Any, items: Sequence[VectorCreate], batch: List[int], failures: List[ItemFailure]) -> List[int]:
+        """The batch without items whose id is already stored; those become conflict failures."""
+        existing = set(col.get(ids=[items[i].id for i in batch], include=[])["ids"])
+        if not existing:
+            return batch
+        for i in batch:
+            if items[i].id in existing:
+                failures.append((i, f"Vector with id='{items[i].id}' already exists"))
+        return [i for i in batch if items[i].id not in existing]
+
+    @staticmethod
+    def _embeddings_arg(items: Sequence[VectorCreate]) -> Dict[str, Any]:
+        if items[0].embedding is None:
+            return {}
+        return {"embeddings": np.asarray([item.embedding for item in items], dtype=np.float32)}
+
+    def dimension(self, collection: str) -> Optional[int]:
+        """
+        Embedding dimension of the collection; None while it is empty.
+        Learned from one stored embedding, then remembered by the registry.
+        """
+        dim = self._registry.dimension(collection)
+        if dim is None:
+            res = self._collection(collection).get(limit=1, include=cast(Any, ["embeddings"]))
+            embeddings = res.get("embeddings")
+            if embeddings is not None and len(embeddings):
+                dim = len(embeddings[0])
+                self._registry.set_dimension(collection, dim)
+        return dim
 
     def read_vector(self, collection: str, id: str) -> VectorRead:
         col = self._collection(collection)
@@ -85,65 +295,442 @@ class VectorRepository:
 
         return VectorRead(collection=collection, id=id, document=doc, metadata=metadata)
 
+    def scan(
+        self,
+        collection: str,
+        *,
+        include: Sequence[str] = ("documents", "metadatas"),
+        page_size: int = SCAN_PAGE_SIZE,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Every record of the collection as pages of Chroma `get` columns,
+        fetched lazily with offset/limit so only one page is in memory.
+        Writes during a scan can shift the pages (records skipped or seen twice).
+        """
+        col = self._collection(collection)
+        offset = 0
+        while True:
+            page = col.get(include=cast(Any, list(include)), limit=page_size, offset=offset)
+            ids = cast(List[str], page.get("ids") or [])
+            if not ids:
+                return
+            yield cast(Dict[str, Any], page)
+            if len(ids) < page_size:
+                return
+            offset += len(ids)
+
     def update_vector(self, data: VectorUpdate) -> VectorRead:
         """
         Patch semantics:
         - If data.document is provided => overwrite document.
         - If data.metadata is provided => merge into existing metadata (key-level).
         """
-        # read existing first for patch semantics
-        current = self.read_vector(collection=data.collection, id=data.id)
-        new_metadata = self._merge_metadata(current.metadata, data.metadata)
+        with self._registry.writing(data.collection):
+            # read existing first for patch semantics
+            current = self.read_vector(collection=data.collection, id=data.id)
+            new_metadata = self._merge_metadata(current.metadata, data.metadata)
 
-        col = self._collection(data.collection)
+            col = self._collection(data.collection)
 
-        # Chroma's `update` expects only fields you want to change.
-        # We'll update metadatas always (since merge might delete keys),
-        # and documents only if supplied.
-        if data.document is None:
-            col.update(ids=[data.id], metadatas=[new_metadata])
-            new_document = current.document
-        else:
-            col.update(ids=[data.id], documents=[data.document], metadatas=[new_metadata])
-            new_document = data.document
-
-        return VectorRead(
-            collection=data.collection,
-            id=data.id,
-            document=new_document,
-            metadata=new_metadata,
-        )
+            # Chroma's `update` expects only fields you want to change.
+            # We'll update metadatas always (since merge might delete keys),
+            # and documents only if supplied.
+            metadata_update = self._metadata_update(current.metadata, new_metadata)
+            if data.document is None:
+                col.update(ids=[data.id], metadatas=[metadata_update])
+                new_document = current.document
+            else:
+                col.update(ids=[data.id], documents=[data.document], metadatas=[metadata_update])
+                new_document = data.document
+                self._index_documents(data.collection, [data.id], [data.document])
+            self._registry.bump(data.collection)
+
+            return VectorRead(
+                collection=data.collection,
+                id=data.id,
+                document=new_document,
+                metadata=new_metadata,
+            )
+
+    def update_vectors(self, collection: str, items: Sequence[VectorPatchItem]) -> Tuple[List[str], List[str]]:
+        """
+        Bulk patch with the same semantics as `update_vector`: one batched
+        `get` of the current metadata, an in-memory merge, and one batched
+        `update` (two when only some items replace their document), per
+        chunk of Chroma's max batch size.
+
+        Returns (updated ids, missing ids).
+        """
+        with self._registry.writing(collection):
+            col = self._collection(collection)
+            updated: List[str] = []
+            missing: List[str] = []
+            step = self._max_batch_size(DEFAULT_BATCH_SIZE * 16)
+
+            for start in range(0, len(items), step):
+                chunk = items[start:start + step]
+                res = col.get(ids=[item.id for item in chunk], include=cast(Any, ["metadatas"]))
+                existing: Dict[str, Metadata] = {
+                    vid: cast(Metadata, meta or {})
+                    for vid, meta in zip(cast(List[str], res.get("ids") or []), res.get("metadatas") or [])
+                }
+
+                with_doc: List[Tuple[str, str, Optional[Metadata]]] = []
+                without_doc: List[Tuple[str, Optional[Metadata]]] = []
+                for item in chunk:
+                    if item.id not in existing:
+                        missing.append(item.id)
+                        continue
+                    current = existing[item.id]
+                    merged = self._merge_metadata(current, item.metadata)
+                    metadata_update = self._metadata_update(current, merged)
+                    if item.document is None:
+                        without_doc.append((item.id, metadata_update))
+                    else:
+                        with_doc.append((item.id, item.document, metadata_update))
+                    updated.append(item.id)
+
+                if with_doc:
+                    col.update(
+                        ids=[i for i, _, _ in with_doc],
+                        documents=[d for _, d, _ in with_doc],
+                        metadatas=[m for _, _, m in with_doc],
+                    )
+                    self._index_documents(collection, [i for i, _, _ in with_doc], [d for _, d, _ in with_doc])
+                if without_doc:
+                    col.update(ids=[i for i, _ in without_doc], metadatas=[m for _, m in without_doc])
+
+            if updated:
+                self._registry.bump(collection)
+            return updated, missing
 
     def delete_vector(self, collection: str, id: str) -> None:
-        col = self._collection(collection)
-        col.delete(ids=[id])
+        with self._registry.writing(collection):
+            col = self._collection(collection)
+            col.delete(ids=[id])
+            self._registry.bump(collection)
+            self._unindex_documents(collection, [id])
+
+    def delete_vectors(
+        self,
+        collection: str,
+        *,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Metadata] = None,
+        where_document: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """
+        Delete by ids and/or filter in one `delete` call; returns how many
+        vectors were removed.
+
+        Matching ids are resolved first (ids only, no payload): Chroma's own
+        delete count includes requested ids that never existed.
+        """
+        with self._registry.writing(collection):
+            matched_ids = self.find_ids(collection, ids=ids, where=where, where_document=where_document)
+            if matched_ids:
+                self._collection(collection).delete(ids=matched_ids)
+                self._registry.bump(collection)
+                self._unindex_documents(collection, matched_ids)
+            return len(matched_ids)
+
+    def find_ids(
+        self,
+        collection: str,
+        *,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Metadata] = None,
+        where_document: Optional[Dict[str, Any]] = None,
+    ) -> List[str]:
+        """Ids of the existing vectors matching the selectors, without payload."""
+        res = self._collection(collection).get(
+            ids=list(ids) if ids else None,
+            where=where,
+            where_document=where_document,
+            include=cast(Any, []),
+        )
+        return cast(List[str], res.get("ids") or [])
 
     # -------------------------
     # Query / Collections
     # -------------------------
 
-    def query(self, req: VectorQueryRequest) -> VectorQueryResponse:
-        col = self._collection(req.collection)
+    @property
+    def registry(self) -> CollectionRegistry:
+        return self._registry
+
+    def _query_cache_key(self, req: VectorQueryRequest) -> Tuple[Any, ...]:
+        if req.query_embeddings is not None:
+            vectors = np.asarray(req.query_embeddings, dtype=np.float32)
+            query: Any = ("embedding", vectors.shape, hashlib.sha1(vectors.tobytes()).hexdigest())
+        else:
+            query = req.query if isinstance(req.query, str) else tuple(req.query or ())
+        return (
+            req.collection,
+            self._registry.generation(req.collection),
+            query,
+            req.n_results,
+            json.dumps(req.where, sort_keys=True, default=str),
+            json.dumps(req.where_document, sort_keys=True, default=str),
+            req.shape,
+            req.retrieval,
+            req.mmr,
+            req.mmr_fetch_factor,
+            tuple(req.include),
+        )
 
-        queries: List[str] = [req.query] if isinstance(req.query, str) else list(req.query)
+    def cached_query(self, req: VectorQueryRequest) -> Tuple[Optional[Tuple[Any, ...]], Optional[VectorQueryResponse]]:
+        """
+        Look `req` up in the query cache without querying.
+
+        Returns (cache key, cached response). Store a fresh result under that
+        key with `cache_query_result`; the key pins the collection generation
+        seen *before* querying, so a concurrent write can only ever make the
+        entry unreachable, never stale.
+        """
+        if self._query_cache is None:
+            return None, None
+        key = self._query_cache_key(req)
+        return key, self._query_cache.get(key)
 
-        res = col.query(
-            query_texts=queries,
-            n_results=req.n_results,
+    def cache_query_result(self, key: Optional[Tuple[Any, ...]], result: VectorQueryResponse, ttl: float) -> None:
+        if key is not None and self._query_cache is not None:
+            self._query_cache.put(key, result, ttl)
+
+    def query(self, req: VectorQueryRequest, *, cache_ttl: Optional[float] = None) -> VectorQueryResponse:
+        """
+        Similarity query. With `cache_ttl` (and a query cache configured) the
+        response is served from / stored in the cache; any write to the
+        collection invalidates its cached results.
+        """
+        if not cache_ttl:
+            return self._query(req)
+
+        key, cached = self.cached_query(req)
+        if cached is not None:
+            return cached
+
+        result = self._query(req)
+        self.cache_query_result(key, result, cache_ttl)
+        return result
+
+    def _query(self, req: VectorQueryRequest) -> VectorQueryResponse:
+        queries = self._query_texts(req)
+        n_queries = len(req.query_embeddings) if self.query_mode(req) == "embedding" else len(queries)
+        if req.mmr is not None:
+            res = self._query_mmr(req, queries)
+        elif req.retrieval == "vector":
+            res = self._query_raw(req, include=self._chroma_include(req))
+        else:
+            res = self._query_fused(req, queries)
+        return self._build_response(req, res, n_queries)
+
+    @staticmethod
+    def query_mode(req: VectorQueryRequest) -> QueryMode:
+        return "embedding" if req.query_embeddings is not None else "text"
+
+    @staticmethod
+    def _query_texts(req: VectorQueryRequest) -> List[str]:
+        if req.query is None:
+            return []
+        return [req.query] if isinstance(req.query, str) else list(req.query)
+
+    def _query_input(self, req: VectorQueryRequest) -> Dict[str, Any]:
+        if self.query_mode(req) == "embedding":
+            return {"query_embeddings": np.asarray(req.query_embeddings, dtype=np.float32)}
+        return {"query_texts": self._query_texts(req)}
+
+    @staticmethod
+    def _chroma_include(req: VectorQueryRequest) -> List[str]:
+        # Chroma always returns ids; only ask for the other columns we serve.
+        return [f for f in req.include if f != "ids"]
+
+    def _query_raw(self, req: VectorQueryRequest, *, include: List[str]) -> Dict[str, Any]:
+        col = self._collection(req.collection)
+        return cast(
+            Dict[str, Any],
+            col.query(
+                **self._query_input(req),
+                n_results=req.n_results,
+                where=req.where,
+                where_document=req.where_document,
+                include=cast(Any, include),
+            ),
+        )
+
+    def _query_mmr(self, req: VectorQueryRequest, queries: List[str]) -> Dict[str, Any]:
+        """
+        Fetch n_results * mmr_fetch_factor candidates with their embeddings
+        and keep the n_results picked by maximal marginal relevance, in pick
+        order. Text queries are embedded once, up front, so the query vectors
+        are at hand for the relevance term.
+        """
+        col = self._collection(req.collection)
+        include = self._chroma_include(req)
+        if req.query_embeddings is not None:
+            query_embeddings: Any = np.asarray(req.query_embeddings, dtype=np.float32)
+        else:
+            query_embeddings = self._registry.embed_queries(req.collection, queries)
+        res = cast(Dict[str, Any], col.query(
+            query_embeddings=cast(Any, query_embeddings),
+            n_results=req.n_results * req.mmr_fetch_factor,
             where=req.where,
             where_document=req.where_document,
-            include=["documents", "metadatas", "distances"],
-        )
+            include=cast(Any, include + ["embeddings"]),
+        ))
+
+        picks = [
+            mmr_select(query_embeddings[qi], candidates, req.n_results, req.mmr)
+            if len(candidates) else []
+            for qi, candidates in enumerate(res["embeddings"])
+        ]
+        out: Dict[str, Any] = {}
+        for field in ["ids", *include]:
+            rows = res.get(field)
+            if rows is not None:
+                out[field] = [[row[i] for i in pick] for row, pick in zip(rows, picks)]
+        return out
+
+    def _query_fused(self, req: VectorQueryRequest, queries: List[str]) -> Dict[str, Any]:
+        """
+        Lexical / hybrid retrieval, returned in Chroma's query result layout.
+
+        BM25 candidates are restricted to `where`/`where_document` with one
+        ids-only `get`; in hybrid mode they are fused with a widened embedding
+        query by reciprocal rank fusion. Payload for hits only BM25 found is
+        fetched in one `get`; their distance is None.
+        """
+        include = self._chroma_include(req)
+        index = self._lexical_index(req.collection)
+        candidates = max(req.n_results * HYBRID_CANDIDATE_FACTOR, HYBRID_MIN_CANDIDATES)
+        filtered = req.where is not None or req.where_document is not None
+
+        vector: Dict[str, Any] = {}
+        if req.retrieval == "hybrid":
+            wide = req.model_copy(update={"n_results": candidates})
+            vector = self._query_raw(wide, include=include)
+
+        rows: List[List[str]] = []
+        payload: Dict[str, Tuple[Any, Any, Optional[float]]] = {}
+        for qi, text in enumerate(queries):
+            lexical = [id for id, _ in index.search(text, candidates)]
+            if filtered and lexical:
+                allowed = set(self.find_ids(
+                    req.collection, ids=lexical, where=req.where, where_document=req.where_document
+                ))
+                lexical = [id for id in lexical if id in allowed]
+
+            rankings = [lexical]
+            if vector:
+                vector_ids = cast(List[str], vector["ids"][qi])
+                docs, metas, dists = (vector.get(f) for f in ("documents", "metadatas", "distances"))
+                rankings.insert(0, vector_ids)
+                for i, id in enumerate(vector_ids):
+                    payload.setdefault(id, (
+                        docs[qi][i] if docs else None,
+                        metas[qi][i] if metas else None,
+                        float(dists[qi][i]) if dists else None,
+                    ))
+            rows.append(reciprocal_rank_fusion(rankings)[:req.n_results])
 
-        ids_grouped = cast(List[List[str]], res.get("ids") or [[] for _ in queries])
-        docs_grouped = cast(List[List[Optional[str]]], res.get("documents") or [[] for _ in queries])
-        metas_grouped = cast(List[List[Optional[Dict[str, Any]]]], res.get("metadatas") or [[] for _ in queries])
-        dists_grouped = cast(List[List[Optional[float]]], res.get("distances") or [[] for _ in queries])
+        fetch = [id for id in dict.fromkeys(id for row in rows for id in row) if id not in payload]
+        if fetch and (set(include) & {"documents", "metadatas"}):
+            res = self._collection(req.collection).get(ids=fetch, include=cast(Any, ["documents", "metadatas"]))
+            for id, doc, meta in zip(
+                cast(List[str], res.get("ids") or []), res.get("documents") or [], res.get("metadatas") or []
+            ):
+                payload[id] = (doc, meta, None)
+
+        fused: Dict[str, Any] = {"ids": rows}
+        for field, pos in (("documents", 0), ("metadatas", 1), ("distances", 2)):
+            if field in include:
+                fused[field] = [[payload.get(id, (None, None, None))[pos] for id in row] for row in rows]
+        return fused
+
+    def find_near_duplicates(
+        self,
+        collection: str,
+        items: Sequence[VectorCreate],
+        threshold: float,
+    ) -> List[Optional[Tuple[str, float]]]:
+        """
+        For each item, the most similar stored record or earlier item in
+        `items` (never itself) with estimated Jaccard similarity of word
+        shingles >= `threshold`, as (id, similarity); None if there is none.
+        Items found to be duplicates are not matched against later ones, so
+        chains collapse onto the first occurrence.
+        """
+        index = self._document_index(self._registry.dedup, collection)
+        batch = MinHashIndex()
+        matches: List[Optional[Tuple[str, float]]] = []
+        for item in items:
+            signature = minhash(item.document)
+            found = [
+                m for m in (
+                    index.nearest(signature, threshold, exclude=item.id),
+                    batch.nearest(signature, threshold, exclude=item.id),
+                ) if m is not None
+            ]
+            best = max(found, key=lambda m: m[1], default=None)
+            if best is None:
+                batch.add_signatures([item.id], signature[None, :])
+            matches.append(best)
+        return matches
+
+    def _lexical_index(self, collection: str) -> BM25Index:
+        return self._document_index(self._registry.lexical, collection)
+
+    def _document_index(self, indexes: LexicalIndexes[Any], collection: str) -> Any:
+        def load(index: Any) -> None:
+            for page in self.scan(collection, include=["documents"], page_size=LEXICAL_LOAD_PAGE):
+                index.add(page["ids"], cast(List[Optional[str]], page.get("documents") or []), replace=False)
+
+        # Keyed by the physical collection, which every alias of it shares.
+        return indexes.ensure(self._registry.resolve(collection), load)
+
+    def _index_documents(self, collection: str, ids: List[str], documents: List[str]) -> None:
+        # Only collections that were searched lexically (or deduplicated)
+        # have an index to keep current.
+        for indexes in (self._registry.lexical, self._registry.dedup):
+            index = indexes.get(self._registry.resolve(collection))
+            if index is not None and ids:
+                index.add(ids, documents)
+
+    def _unindex_documents(self, collection: str, ids: List[str]) -> None:
+        for indexes in (self._registry.lexical, self._registry.dedup):
+            index = indexes.get(self._registry.resolve(collection))
+            if index is not None and ids:
+                index.remove(ids)
+
+    def _build_response(self, req: VectorQueryRequest, res: Dict[str, Any], n_queries: int) -> VectorQueryResponse:
+        """
+        Shape a raw Chroma query result as requested by `req.shape`:
+        - None: `hits` and `grouped` (legacy);
+        - "flat" / "grouped": only that list of hit objects;
+        - "columnar": Chroma's parallel arrays, without per-hit objects.
+        """
+        if req.shape == "columnar":
+            return VectorQueryResponse.model_construct(
+                hits=[],
+                grouped=[],
+                columns=VectorQueryColumns.model_construct(
+                    ids=res.get("ids") if "ids" in req.include else None,
+                    documents=res.get("documents"),
+                    metadatas=res.get("metadatas"),
+                    distances=self._plain(res.get("distances")),
+                ),
+            )
+
+        empty: List[List[Any]] = [[] for _ in range(n_queries)]
+        ids_grouped = cast(List[List[str]], res.get("ids") or empty)
+        docs_grouped = cast(List[List[Optional[str]]], res.get("documents") or empty)
+        metas_grouped = cast(List[List[Optional[Dict[str, Any]]]], res.get("metadatas") or empty)
+        dists_grouped = cast(List[List[Optional[float]]], self._plain(res.get("distances")) or empty)
 
         grouped: List[List[VectorQueryHit]] = []
         flat: List[VectorQueryHit] = []
 
-        for qi in range(len(queries)):
+        for qi in range(n_queries):
             hits_for_q: List[VectorQueryHit] = []
             for i, vid in enumerate(ids_grouped[qi] if qi < len(ids_grouped) else []):
                 doc = None
@@ -166,15 +753,341 @@ class VectorRepository:
                     distance=dist,
                 )
                 hits_for_q.append(hit)
-                flat.append(hit)
+                if req.shape != "grouped":
+                    flat.append(hit)
 
-            grouped.append(hits_for_q)
+            if req.shape != "flat":
+                grouped.append(hits_for_q)
 
         return VectorQueryResponse(hits=flat, grouped=grouped)
 
+    @staticmethod
+    def merge_responses(req: VectorMultiQueryRequest, responses: Sequence[VectorQueryResponse]) -> VectorQueryResponse:
+        """
+        Merge per-collection responses (grouped, each sorted by distance) into
+        the global top `req.n_results` per query with a k-way heap merge, then
+        shape the result like `_build_response`. Hits keep their collection.
+        """
+        n_queries = max((len(r.grouped) for r in responses), default=0)
+        grouped: List[List[VectorQueryHit]] = []
+        for qi in range(n_queries):
+            ranked = [r.grouped[qi] for r in responses if qi < len(r.grouped)]
+            merged = list(islice(heapq.merge(*ranked, key=lambda hit: hit.distance), req.n_results))
+            if "distances" not in req.include:
+                merged = [hit.model_copy(update={"distance": None}) for hit in merged]
+            grouped.append(merged)
+
+        if req.shape == "columnar":
+            return VectorQueryResponse.model_construct(
+                hits=[],
+                grouped=[],
+                columns=VectorQueryColumns.model_construct(
+                    ids=[[h.id for h in hits] for hits in grouped] if "ids" in req.include else None,
+                    documents=[[h.document for h in hits] for hits in grouped] if "documents" in req.include else None,
+                    metadatas=[[h.metadata for h in hits] for hits in grouped] if "metadatas" in req.include else None,
+                    distances=[[h.distance for h in hits] for hits in grouped] if "distances" in req.include else None,
+                    collections=[[h.collection for h in hits] for hits in grouped],
+                ),
+            )
+        return VectorQueryResponse(
+            hits=[hit for hits in grouped for hit in hits] if req.shape != "grouped" else [],
+            grouped=grouped if req.shape != "flat" else [],
+        )
+
+    @staticmethod
+    def _plain(grouped: Any) -> Any:
+        # Distances may come back as numpy arrays; keep the payload JSON-native.
+        if grouped is None:
+            return None
+        return [[None if d is None else float(d) for d in row] for row in grouped]
+
+    def delete_collection(self, collection: str, *, resolve: bool = True) -> None:
+        """Drop a collection (through its alias unless `resolve=False`) and its aliases."""
+        physical = self._registry.resolve(collection) if resolve else collection
+        try:
+            self._registry.delete(physical, resolve=False)
+        finally:
+            self._registry.invalidate(physical)
+            self._registry.lexical.drop(physical)
+            self._registry.dedup.drop(physical)
+            self._registry.bump(collection)
+
+    def collection_exists(self, collection: str) -> bool:
+        collection = self._registry.resolve(collection)
+        if collection in self._registry.flat_names():
+            return True
+        try:
+            self._client.get_collection(name=collection)
+        except ChromaNotFoundError:
+            return False
+        return True
+
+    def collection_names(self) -> List[str]:
+        return [c.name for c in self._client.list_collections()] + self._registry.flat_names()
+
+    def warm_collection(self, collection: str) -> Dict[str, Any]:
+        """
+        Resolve the handle and run one probe text query, which loads the
+        collection's HNSW segments and the embedding model. Returns the
+        record count and how long it took.
+        """
+        start = time.perf_counter()
+        col = self._collection(collection)
+        count = col.count()
+        if count:
+            col.query(query_texts=[WARMUP_PROBE], n_results=1, include=cast(Any, []))
+        return {"count": count, "ms": round((time.perf_counter() - start) * 1000.0, 1)}
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"collections": self._registry.stats()}
+        if isinstance(self._registry.embedding_function, CachedEmbeddingFunction):
+            stats["embedding_cache"] = self._registry.embedding_function.cache.stats()
+        if self._query_cache is not None:
+            stats["query_cache"] = self._query_cache.stats()
+        stats["lexical"] = self._registry.lexical.stats()
+        stats["dedup"] = self._registry.dedup.stats()
+        return stats
+
+    def create_collection(
+        self,
+        collection: str,
+        index: VectorIndexConfig,
+        metadata: Optional[Metadata] = None,
+    ) -> VectorCollectionRead:
+        """Create a collection with explicit HNSW settings; fails if it exists."""
+        self._registry.create(
+            collection,
+            configuration={"hnsw": self._hnsw_configuration(index)},
+            metadata=metadata,
+        )
+        self._registry.bump(collection)
+        return self.collection_info(collection)
+
+    def configure_collection(self, collection: str, index: VectorIndexConfig) -> VectorCollectionRead:
+        """
+        Change the mutable HNSW settings (search_ef, batch_size,
+        sync_threshold) of an existing collection.
+        """
+        fixed = [f for f in index.model_fields_set if f not in HNSW_MUTABLE and getattr(index, f) is not None]
+        if fixed:
+            raise ValueError(f"fixed at creation: {', '.join(sorted(fixed))}")
+        if not self.collection_exists(collection):
+            raise ChromaNotFoundError(f"Collection {collection} does not exist.")
+        col = self._collection(collection)
+        settings = self._hnsw_configuration(index)
+        if settings:
+            col.modify(configuration=cast(Any, {"hnsw": settings}))
+        # Handles carry their configuration; fetch a fresh one next time.
+        self._registry.invalidate(collection)
+        self._registry.bump(collection)
+        return self.collection_info(collection)
+
+    def snapshot_collection(self, collection: str, path: Path, *, page_size: int = SCAN_PAGE_SIZE) -> SnapshotManifest:
+        """
+        Write the collection (records, embeddings, HNSW settings, metadata)
+        to a snapshot directory; see `vector_snapshot.write_snapshot`.
+        """
+        col = self._collection(collection)
+        return write_snapshot(
+            path,
+            self.scan(collection, include=["documents", "metadatas", "embeddings"], page_size=page_size),
+            collection=collection,
+            count=col.count(),
+            hnsw=dict((col.configuration or {}).get("hnsw") or {}),
+            metadata=dict(col.metadata) if col.metadata else None,
+        )
+
+    def restore_collection(
+        self,
+        path: Path,
+        collection: Optional[str] = None,
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        replace: bool = False,
+    ) -> VectorCollectionRead:
+        """
+        Create `collection` (default: the snapshotted name) from a snapshot.
+        Stored embeddings are bulk-loaded from the memory-mapped array, so
+        nothing is re-embedded. Fails if the collection exists, unless
+        `replace`: then the snapshot is restored under a temporary name and,
+        only once that succeeded, the name is pointed at it (an alias) and
+        the collection it resolved to before is dropped, with writes to it
+        held off so none land on the dropped collection. A restart midway
+        leaves that (or the temporary collection) to `sweep_collections`.
+        """
+        manifest = read_manifest(path)
+        collection = collection or manifest.collection
+        if not (replace and self.collection_exists(collection)):
+            self._restore_into(path, manifest, collection, batch_size)
+            return self.collection_info(collection)
+
+        target = f"{collection}.r{uuid.uuid4().hex[:8]}"
+        self._restore_into(path, manifest, target, batch_size)
+        with self._registry.frozen(collection):
+            previous = self.swap_alias(collection, target)
+            if previous is not None:
+                self._registry.aliases.retire(previous)
+                self.drop_retired(previous)
+        return self.collection_info(collection)
+
+    def _restore_into(self, path: Path, manifest: SnapshotManifest, collection: str, batch_size: int) -> None:
+        col = self._registry.create(
+            collection,
+            configuration={"hnsw": manifest.hnsw} if manifest.hnsw else None,
+            metadata=manifest.metadata,
+        )
+        try:
+            for ids, documents, metadatas, embeddings in read_snapshot(path, manifest, self._max_batch_size(batch_size)):
+                col.add(
+                    ids=ids,
+                    embeddings=embeddings,
+                    documents=cast(Any, documents),
+                    metadatas=cast(Any, [m or None for m in metadatas]),
+                )
+        except Exception:
+            # Don't leave a half-restored collection behind.
+            self.delete_collection(collection, resolve=False)
+            raise
+        if manifest.dimension:
+            self._registry.set_dimension(collection, manifest.dimension)
+        self._registry.lexical.drop(collection)
+        self._registry.dedup.drop(collection)
+        self._registry.bump(collection)
+
+    def create_migration_target(
+        self,
+        collection: str,
+        target: str,
+        index: VectorIndexConfig,
+        embedding_model: Optional[str] = None,
+    ) -> int:
+        """
+        Create `target` with the HNSW settings, metadata and embedding model of
+        the collection behind `collection`, overridden by the set fields of
+        `index` and by `embedding_model`. Returns the source's record count.
+        """
+        col = self._collection(collection)
+        hnsw = {**((col.configuration or {}).get("hnsw") or {}), **self._hnsw_configuration(index)}
+        self._registry.create(
+            target, configuration={"hnsw": hnsw}, metadata=col.metadata, embedding_model=embedding_model,
+        )
+        return col.count()
+
+    def copy_records(self, target: str, page: Dict[str, Any]) -> List[ItemFailure]:
+        """Upsert a scan page into `target`, embedding the documents again."""
+        documents = page.get("documents") or [None] * len(page["ids"])
+        metadatas = page.get("metadatas") or [None] * len(page["ids"])
+        items: List[VectorCreate] = []
+        positions: List[int] = []
+        failures: List[ItemFailure] = []
+        for i, (id, document, metadata) in enumerate(zip(page["ids"], documents, metadatas)):
+            if document is None:
+                failures.append((i, f"record '{id}' has no document to embed"))
+                continue
+            items.append(VectorCreate(id=id, collection=target, document=document, metadata=metadata or {}))
+            positions.append(i)
+        if items:
+            failures += [(positions[i], error) for i, error in self.create_vectors(target, items, upsert=True)]
+        return failures
+
+    def reconcile_records(self, source: str, target: str, *, page_size: int = SCAN_PAGE_SIZE) -> int:
+        """
+        Make `target` hold the records of `source` again after writes to
+        `source`: changed or new records are re-copied, removed ones deleted.
+        Returns how many records were touched.
+        """
+        seen: set[str] = set()
+        touched = 0
+        for page in self.scan(source, page_size=page_size):
+            seen.update(page["ids"])
+            current = self._collection(target).get(ids=page["ids"], include=cast(Any, ["documents", "metadatas"]))
+            have = {
+                id: (doc, meta or {})
+                for id, doc, meta in zip(current["ids"], current.get("documents") or [], current.get("metadatas") or [])
+            }
+            stale = [
+                i for i, (id, doc, meta) in enumerate(zip(page["ids"], page["documents"], page["metadatas"]))
+                if have.get(id) != (doc, meta or {})
+            ]
+            if stale:
+                changed = {key: [page[key][i] for i in stale] for key in ("ids", "documents", "metadatas")}
+                failures = self.copy_records(target, changed)
+                if failures:
+                    raise ValueError(failures[0][1])
+                touched += len(stale)
+        removed = [id for page in self.scan(target, include=[], page_size=page_size) for id in page["ids"] if id not in seen]
+        if removed:
+            self.delete_vectors(target, ids=removed)
+            touched += len(removed)
+        return touched
+
+    def swap_alias(self, alias: str, target: str) -> Optional[str]:
+        """Point `alias` at `target`; returns the collection it resolved to before."""
+        return self._registry.swap_alias(alias, target)
+
+    def finish_migration(self, collection: str, target: str, generation: int, *, page_size: int = SCAN_PAGE_SIZE) -> int:
+        """
+        Point `collection` at `target` with writes to its current collection
+        held off: if that was written to since `generation`, it is reconciled
+        into `target` first, so no write lands on the old collection after
+        the last pass. The old collection is recorded as retired, for
+        `drop_retired` once nothing uses it anymore. Returns how many records
+        that pass touched.
+        """
+        with self._registry.frozen(collection) as source:
+            touched = 0
+            if self._registry.generation(source) != generation:
+                touched = self.reconcile_records(source, target, page_size=page_size)
+            self.swap_alias(collection, target)
+            self._registry.aliases.retire(source)
+        return touched
+
+    def drop_retired(self, collection: str) -> bool:
+        """
+        Delete a retired collection unless an alias points at it again (then
+        it's just no longer retired). Returns whether it was deleted.
+        """
+        if self._registry.aliases.aliases_of(collection):
+            self._registry.aliases.discard_retired(collection)
+            return False
+        try:
+            self.delete_collection(collection, resolve=False)
+        except ChromaNotFoundError:
+            self._registry.aliases.discard_retired(collection)
+            return False
+        return True
+
+    def sweep_collections(self) -> List[str]:
+        """
+        Drop what migrations and restores cut short by a restart left behind:
+        retired collections and temporary ones no alias points at. Only safe
+        while none runs, i.e. on startup. Returns the dropped names.
+        """
+        dropped = [name for name in self._registry.aliases.retired() if self.drop_retired(name)]
+        targets = set(self._registry.aliases.items().values())
+        for name in self.collection_names():
+            if TEMPORARY_NAME.search(name) and name not in targets:
+                self.delete_collection(name, resolve=False)
+                dropped.append(name)
+        return dropped
+
+    def aliases(self) -> Dict[str, str]:
+        return self._registry.aliases.items()
+
+    @staticmethod
+    def _hnsw_configuration(index: VectorIndexConfig) -> Dict[str, Any]:
+        return {
+            HNSW_SETTINGS[field]: value
+            for field, value in index.model_dump().items()
+            if value is not None
+        }
+
     def collection_info(self, collection: str) -> VectorCollectionRead:
         col = self._collection(collection)
 
-        # Chroma collections have `count()`. Metadata support depends on version;
-        # we keep it conservative and return {} unless you explicitly store it elsewhere.
-        return VectorCollectionRead(collection=collection, count=col.count(), metadata={})
+        metadata: Metadata = dict(col.metadata or {})
+        hnsw = (col.configuration or {}).get("hnsw") or {}
+        for field, key in HNSW_SETTINGS.items():
+            if hnsw.get(key) is not None:
+                metadata[f"hnsw:{field}"] = hnsw[key]
+        return VectorCollectionRead(collection=collection, count=col.count(), metadata=metadata)
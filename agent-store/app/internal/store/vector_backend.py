@@ -0,0 +1,185 @@
+# app/internal/store/vector_backend.py
+"""
+The storage interface `VectorRepository` is written against.
+
+Chroma's `ClientAPI` and `Collection` satisfy these protocols as they are.
+`MemoryBackend` keeps every collection in an in-process flat index with
+deterministic hashed embeddings: no Chroma, no model download, for unit
+tests and microbenchmarks.
+"""
+from __future__ import annotations
+
+import hashlib
+from threading import Lock
+from typing import Any, Dict, List, Optional, Protocol, Sequence, runtime_checkable
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from chromadb.errors import NotFoundError, UniqueConstraintError
+
+from app.internal.store.flat_index import FlatCollection
+
+BACKENDS = ("chroma", "memory")
+DEFAULT_HASH_DIM = 64
+MEMORY_MAX_BATCH_SIZE = 5461  # Chroma's default, so batching behaves the same
+
+
+@runtime_checkable
+class VectorCollection(Protocol):
+    """One collection: records with id, embedding, document and metadata."""
+
+    @property
+    def name(self) -> str: ...
+
+    @property
+    def metadata(self) -> Optional[Dict[str, Any]]: ...
+
+    @property
+    def configuration(self) -> Dict[str, Any]: ...
+
+    def count(self) -> int: ...
+
+    def add(self, ids: Any, embeddings: Any = None, metadatas: Any = None, documents: Any = None) -> None: ...
+
+    def upsert(self, ids: Any, embeddings: Any = None, metadatas: Any = None, documents: Any = None) -> None: ...
+
+    def update(self, ids: Any, embeddings: Any = None, metadatas: Any = None, documents: Any = None) -> None: ...
+
+    def delete(self, ids: Any = None, where: Any = None, where_document: Any = None) -> None: ...
+
+    def get(
+        self,
+        ids: Any = None,
+        where: Any = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        where_document: Any = None,
+        include: Any = ...,
+    ) -> Any: ...
+
+    def query(
+        self,
+        query_embeddings: Any = None,
+        query_texts: Any = None,
+        n_results: int = 10,
+        where: Any = None,
+        where_document: Any = None,
+        include: Any = ...,
+    ) -> Any: ...
+
+    def modify(self, name: Optional[str] = None, metadata: Any = None, configuration: Any = None) -> None: ...
+
+
+@runtime_checkable
+class VectorBackend(Protocol):
+    """
+    Collection lifecycle. Missing collections raise Chroma's `NotFoundError`,
+    whatever the backend, so callers handle one exception type.
+    """
+
+    def get_collection(self, name: str, embedding_function: Any = ...) -> Any: ...
+
+    def get_or_create_collection(
+        self, name: str, configuration: Any = None, metadata: Any = None, embedding_function: Any = ...
+    ) -> Any: ...
+
+    def create_collection(
+        self, name: str, configuration: Any = None, metadata: Any = None, embedding_function: Any = ...
+    ) -> Any: ...
+
+    def delete_collection(self, name: str) -> None: ...
+
+    def list_collections(self, *args: Any, **kwargs: Any) -> Sequence[Any]: ...
+
+    def get_max_batch_size(self) -> int: ...
+
+
+class HashEmbeddingFunction(EmbeddingFunction):
+    """
+    Deterministic bag-of-words embeddings: each lower-cased word adds 1 to
+    an md5-chosen bucket, then the vector is L2-normalized.
+    """
+
+    def __init__(self, dim: int = DEFAULT_HASH_DIM):
+        self.dim = dim
+
+    def __call__(self, input: Documents) -> Embeddings:
+        out = []
+        for text in input:
+            v = np.zeros(self.dim, dtype=np.float32)
+            for word in text.lower().split():
+                v[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1.0
+            norm = np.linalg.norm(v)
+            out.append(v / norm if norm else v)
+        return out
+
+    @staticmethod
+    def name() -> str:
+        return "test-hash"
+
+    def get_config(self) -> Dict[str, Any]:
+        return {"dim": self.dim}
+
+
+class MemoryBackend:
+    """
+    In-process `VectorBackend`: one `FlatCollection` per name, exact search,
+    nothing persisted. Collections without an embedding function of their
+    own embed with `HashEmbeddingFunction`.
+    """
+
+    def __init__(self, *, dim: int = DEFAULT_HASH_DIM, dtype: str = "float32"):
+        self.embedding_function = HashEmbeddingFunction(dim)
+        self.dtype = dtype
+        self._collections: Dict[str, FlatCollection] = {}
+        self._lock = Lock()
+
+    def get_collection(self, name: str, embedding_function: Any = None, **_: Any) -> FlatCollection:
+        col = self._collections.get(name)
+        if col is None:
+            raise NotFoundError(f"Collection [{name}] does not exist")
+        return col
+
+    def get_or_create_collection(
+        self, name: str, configuration: Any = None, metadata: Any = None, embedding_function: Any = None, **_: Any
+    ) -> FlatCollection:
+        with self._lock:
+            col = self._collections.get(name)
+            if col is None:
+                col = self._collections[name] = self._new(name, configuration, metadata, embedding_function)
+            return col
+
+    def create_collection(
+        self, name: str, configuration: Any = None, metadata: Any = None, embedding_function: Any = None, **_: Any
+    ) -> FlatCollection:
+        with self._lock:
+            if name in self._collections:
+                raise UniqueConstraintError(f"Collection {name} already exists")
+            col = self._collections[name] = self._new(name, configuration, metadata, embedding_function)
+            return col
+
+    def delete_collection(self, name: str) -> None:
+        with self._lock:
+            if self._collections.pop(name, None) is None:
+                raise NotFoundError(f"Collection [{name}] does not exist")
+
+    def list_collections(self, *args: Any, **kwargs: Any) -> List[FlatCollection]:
+        return list(self._collections.values())
+
+    def get_max_batch_size(self) -> int:
+        return MEMORY_MAX_BATCH_SIZE
+
+    def reset(self) -> None:
+        with self._lock:
+            self._collections.clear()
+
+    def _new(self, name: str, configuration: Any, metadata: Any, embedding_function: Any) -> FlatCollection:
+        col = FlatCollection(
+            name,
+            embedding_function=embedding_function or self.embedding_function,
+            dtype=self.dtype,
+            metadata=metadata or None,
+        )
+        if configuration:
+            col.modify(configuration=configuration)
+        return col
@@ -0,0 +1,139 @@
+# app/internal/store/vector_snapshot.py
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from dataclasses import asdict, dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+MANIFEST = "manifest.json"
+EMBEDDINGS = "embeddings.npy"
+# One JSON value per line and file: a column each, read in lockstep.
+COLUMNS = ("ids", "documents", "metadatas")
+
+Metadata = Dict[str, Any]
+SnapshotBatch = Tuple[List[str], List[Optional[str]], List[Optional[Metadata]], np.ndarray]
+
+
+@dataclass
+class SnapshotManifest:
+    collection: str
+    count: int
+    dimension: Optional[int]
+    hnsw: Dict[str, Any] = field(default_factory=dict)
+    metadata: Optional[Metadata] = None
+    created_at: float = 0.0
+    version: int = SNAPSHOT_VERSION
+
+
+def write_snapshot(
+    path: Path,
+    pages: Iterable[Dict[str, Any]],
+    *,
+    collection: str,
+    count: int,
+    hnsw: Dict[str, Any],
+    metadata: Optional[Metadata],
+) -> SnapshotManifest:
+    """
+    Write scan pages (with embeddings) to a snapshot directory at `path`:
+    `embeddings.npy` (float32, count x dim, written through a memmap),
+    one `<column>.jsonl` file per column and `manifest.json`.
+
+    At most `count` records are written (the count when the snapshot
+    started); the manifest holds how many were. The directory is built
+    under a temporary name and renamed into place when complete.
+    """
+    if path.exists():
+        raise FileExistsError(str(path))
+    tmp = path.with_name(f".{path.name}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    try:
+        written, dimension = _write_records(tmp, pages, count)
+        manifest = SnapshotManifest(
+            collection=collection,
+            count=written,
+            dimension=dimension,
+            hnsw=hnsw,
+            metadata=metadata,
+            created_at=time.time(),
+        )
+        (tmp / MANIFEST).write_text(json.dumps(asdict(manifest), indent=2))
+        os.rename(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return manifest
+
+
+def _write_records(tmp: Path, pages: Iterable[Dict[str, Any]], count: int) -> Tuple[int, Optional[int]]:
+    files = {name: open(tmp / f"{name}.jsonl", "w", encoding="utf-8") for name in COLUMNS}
+    embeddings: Optional[np.memmap] = None
+    written = 0
+    try:
+        for page in pages:
+            take = min(len(page["ids"]), count - written)
+            if take <= 0:
+                break
+            vectors = np.asarray(page["embeddings"], dtype=np.float32)[:take]
+            if embeddings is None:
+                embeddings = np.lib.format.open_memmap(
+                    tmp / EMBEDDINGS, mode="w+", dtype=np.float32, shape=(count, vectors.shape[1]),
+                )
+            embeddings[written:written + take] = vectors
+            for name in COLUMNS:
+                files[name].writelines(json.dumps(value) + "\n" for value in page[name][:take])
+            written += take
+    finally:
+        for f in files.values():
+            f.close()
+    if embeddings is None:
+        return written, None
+    embeddings.flush()
+    return written, int(embeddings.shape[1])
+
+
+def read_manifest(path: Path) -> SnapshotManifest:
+    """The snapshot's manifest; ValueError if it isn't a snapshot this version reads."""
+    text = (path / MANIFEST).read_text()  # FileNotFoundError: no snapshot here
+    try:
+        raw = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"unreadable snapshot manifest: {e}")
+    if raw.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version {raw.get('version')!r}")
+    return SnapshotManifest(**raw)
+
+
+def read_snapshot(path: Path, manifest: SnapshotManifest, batch_size: int) -> Iterator[SnapshotBatch]:
+    """
+    Records in batches of `batch_size`. Embeddings are memory-mapped, so only
+    the current batch is copied into memory.
+    """
+    if not manifest.count:
+        return
+    embeddings = np.load(path / EMBEDDINGS, mmap_mode="r")
+    if embeddings.shape[0] < manifest.count or embeddings.shape[1] != manifest.dimension:
+        raise ValueError(f"snapshot embeddings have shape {embeddings.shape}, manifest says {manifest.count} x {manifest.dimension}")
+    files = [open(path / f"{name}.jsonl", encoding="utf-8") for name in COLUMNS]
+    try:
+        rows = islice(zip(*files), manifest.count)
+        start = 0
+        while batch := list(islice(rows, batch_size)):
+            ids, documents, metadatas = (list(map(json.loads, column)) for column in zip(*batch))
+            end = start + len(batch)
+            yield ids, documents, metadatas, np.ascontiguousarray(embeddings[start:end])
+            start = end
+    finally:
+        for f in files:
+            f.close()
+    if start < manifest.count:
+        raise ValueError(f"snapshot columns hold {start} records, manifest says {manifest.count}")
@@ -9,4 +9,5 @@ Each tool is automatically registered when imported.
 # Import all tool definitions to register them
 from .tool_print import PRINT_TOOL  # noqa: F401
 from .tool_vector_query import VECTOR_QUERY_TOOL  # noqa: F401
+from .tool_vector_query_many import VECTOR_QUERY_MANY_TOOL  # noqa: F401
 # Add more tool imports here as needed
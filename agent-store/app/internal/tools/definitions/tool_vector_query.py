@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from dataclasses import asdict
 from typing import Any, Dict, Optional
 
 from app.contracts.spec_tools import (
@@ -11,7 +12,9 @@ from app.contracts.spec_tools import (
 )
 from app.internal.tools.registry import InternalToolDef, register_internal_tool
 from app.internal.services.service_vectors import VectorService
-from app.contracts.contract_vectors import VectorQueryRequest, VectorQueryResponse
+from app.internal.services.service_vectors_async import AsyncVectorService
+from app.contracts.contract_vectors import VectorQueryRequest, VectorQueryResponse, VectorRetrievalMode
+from app.internal.services.vector_context import ContextUnit, pack_context
 from app.internal.store.repository_vectors import VectorRepository
 
 
@@ -40,6 +43,40 @@ VECTOR_QUERY_CONTRACT = ToolContract(
                 default=5,
                 x_static=True,
             ),
+            "retrieval": JsonSchemaProperty(
+                type="string",  # type: JsonType
+                description=(
+                    "Ranking mode: 'vector' (semantic), 'lexical' (BM25 keyword match) or "
+                    "'hybrid' (both fused); use lexical/hybrid for exact identifiers, "
+                    "error codes or version numbers"
+                ),
+                enum=["vector", "lexical", "hybrid"],
+                default="vector",
+            ),
+            "mmr": JsonSchemaProperty(
+                type="number",  # type: JsonType
+                description=(
+                    "Optional diversity re-ranking (maximal marginal relevance): 1 = pure relevance, "
+                    "lower values drop near-duplicate hits; only with retrieval 'vector'"
+                ),
+                minimum=0,
+                maximum=1,
+            ),
+            "budget": JsonSchemaProperty(
+                type="integer",  # type: JsonType
+                description=(
+                    "Optional context budget: pack the hits into one 'context' string of at most this "
+                    "many characters or tokens, best first, trimming long documents to the passage "
+                    "around the query terms"
+                ),
+                minimum=1,
+            ),
+            "budget_unit": JsonSchemaProperty(
+                type="string",  # type: JsonType
+                description="Unit of 'budget'",
+                enum=["chars", "tokens"],
+                default="chars",
+            ),
         },
         required=["collection", "query"],
         additionalProperties=False,
@@ -56,6 +93,18 @@ VECTOR_QUERY_CONTRACT = ToolContract(
             "query": "climate change",
             "n_results": 10,
         },
+        {
+            "collection": "support",
+            "query": "push notifications delayed in v2.4.1",
+            "retrieval": "hybrid",
+        },
+        {
+            "collection": "handbook",
+            "query": "parental leave policy",
+            "n_results": 20,
+            "budget": 1500,
+            "budget_unit": "tokens",
+        },
     ],
     read_only=True,
     idempotent=True,
@@ -81,6 +130,22 @@ VECTOR_QUERY_RESPONSE = ToolResponseSpec(
                     },
                 },
             },
+            "context": {
+                "type": "string",
+                "description": "With a budget: the packed hits, one '[rank] id' block each, instead of 'hits'",
+            },
+            "ids": {"type": "array", "items": {"type": "string"}, "description": "Hits in the context, best first"},
+            "truncated": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Hits whose document was trimmed to fit",
+            },
+            "dropped": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Hits left out for lack of budget",
+            },
+            "used": {"type": "integer", "description": "Size of the context in the budget's unit"},
         },
     },
     format="json",
@@ -91,6 +156,10 @@ async def vector_query_impl(
     collection: str,
     query: str,
     n_results: int = 5,
+    retrieval: VectorRetrievalMode = "vector",
+    mmr: Optional[float] = None,
+    budget: Optional[int] = None,
+    budget_unit: ContextUnit = "chars",
     **kwargs,
 ) -> Dict[str, Any]:
     """
@@ -99,25 +168,41 @@ async def vector_query_impl(
     :param collection: Name of the collection to query
     :param query: Query text for similarity search
     :param n_results: Number of results to return (1-100, default 5)
-    :return: Dictionary with query results
+    :param retrieval: Ranking mode: vector, lexical (BM25) or hybrid (default vector)
+    :param mmr: MMR lambda for diversity re-ranking (0-1), None to disable
+    :param budget: Pack the hits into one context of at most this size, None for plain hits
+    :param budget_unit: Unit of the budget: chars or tokens (default chars)
+    :return: Dictionary with query results, or the packed context with a budget
     """
     from app.internal.store import db_vector
     
     # Get the vector client
     client = db_vector.get_client()
-    repo = VectorRepository(client)
-    svc = VectorService(repo)
+    repo = VectorRepository(
+        client,
+        registry=db_vector.get_collection_registry(client),
+        query_cache=db_vector.get_query_cache(),
+    )
+    # Chroma calls block; run them on the vector executor, not the event loop.
+    svc = AsyncVectorService(VectorService(repo))
     
     # Create the query request
     req = VectorQueryRequest(
         collection=collection,
         query=query,
         n_results=n_results,
+        retrieval=retrieval,
+        mmr=mmr,
     )
     
-    # Execute the query
-    result: VectorQueryResponse = svc.query(req)
+    # Execute the query; results are cached for the contract's TTL and
+    # invalidated by any write to the collection.
+    result: VectorQueryResponse = await svc.query(req, cache_ttl=VECTOR_QUERY_CONTRACT.cache_ttl_seconds)
     
+    if budget is not None:
+        packed = pack_context(result.hits, query, budget, unit=budget_unit)
+        return asdict(packed)
+
     # Convert to dict for JSON serialization
     return {
         "hits": [
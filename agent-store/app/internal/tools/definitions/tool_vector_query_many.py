@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from app.contracts.spec_tools import (
+    ToolContract,
+    ToolResponseSpec,
+    ToolInputSchema,
+    JsonSchemaProperty,
+    JsonType,
+)
+from app.internal.tools.registry import InternalToolDef, register_internal_tool
+from app.internal.services.service_vectors import VectorService
+from app.internal.services.service_vectors_async import AsyncVectorService
+from app.contracts.contract_vectors import VectorMultiQueryRequest, VectorQueryResponse
+from app.internal.store.repository_vectors import VectorRepository
+
+
+# Define the tool contract
+VECTOR_QUERY_MANY_CONTRACT = ToolContract(
+    schema_version="jsonschema-2020-12",
+    input_schema=ToolInputSchema(
+        type="object",
+        properties={
+            "collections": JsonSchemaProperty(
+                type="array",  # type: JsonType
+                description="The vector collections to search together, e.g. several knowledge bases",
+                items=JsonSchemaProperty(type="string", minLength=1),
+                x_static=True,
+            ),
+            "query": JsonSchemaProperty(
+                type="string",  # type: JsonType
+                description="The query text for semantic similarity search",
+                minLength=1,
+            ),
+            "n_results": JsonSchemaProperty(
+                type="integer",  # type: JsonType
+                description="Number of results to return across all collections",
+                minimum=1,
+                maximum=100,
+                default=5,
+                x_static=True,
+            ),
+        },
+        required=["collections", "query"],
+        additionalProperties=False,
+    ),
+    tags=["vector", "search", "semantic", "similarity"],
+    examples=[
+        {
+            "collections": ["product_docs", "billing_policy", "known_issues"],
+            "query": "refund after downgrading the plan",
+            "n_results": 5,
+        },
+    ],
+    read_only=True,
+    idempotent=True,
+    cache_ttl_seconds=300,
+)
+
+# Define the response schema
+VECTOR_QUERY_MANY_RESPONSE = ToolResponseSpec(
+    schema={
+        "type": "object",
+        "properties": {
+            "hits": {
+                "type": "array",
+                "description": "Best matches over all collections, closest first",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "collection": {"type": "string"},
+                        "id": {"type": "string"},
+                        "document": {"type": "string"},
+                        "metadata": {"type": "object"},
+                        "distance": {"type": ["number", "null"]},
+                    },
+                },
+            },
+        },
+    },
+    format="json",
+)
+
+
+async def vector_query_many_impl(
+    collections: List[str],
+    query: str,
+    n_results: int = 5,
+    **kwargs,
+) -> Dict[str, Any]:
+    """
+    Query several vector collections at once and merge the matches.
+
+    :param collections: Names of the collections to query
+    :param query: Query text for similarity search
+    :param n_results: Number of results to return overall (1-100, default 5)
+    :return: Dictionary with query results, each hit tagged with its collection
+    """
+    from app.internal.store import db_vector
+
+    client = db_vector.get_client()
+    repo = VectorRepository(
+        client,
+        registry=db_vector.get_collection_registry(client),
+        query_cache=db_vector.get_query_cache(),
+    )
+    # The per-collection queries run concurrently on the vector executor.
+    svc = AsyncVectorService(VectorService(repo))
+
+    req = VectorMultiQueryRequest(collections=collections, query=query, n_results=n_results)
+    result: VectorQueryResponse = await svc.query_many(req, cache_ttl=VECTOR_QUERY_MANY_CONTRACT.cache_ttl_seconds)
+
+    return {
+        "hits": [
+            {
+                "collection": hit.collection,
+                "id": hit.id,
+                "document": hit.document,
+                "metadata": hit.metadata,
+                "distance": hit.distance,
+            }
+            for hit in result.hits
+        ],
+    }
+
+
+# Create and register the tool definition
+VECTOR_QUERY_MANY_TOOL = InternalToolDef(
+    key="vector_query_many",
+    contract=VECTOR_QUERY_MANY_CONTRACT,
+    response=VECTOR_QUERY_MANY_RESPONSE,
+    fn=vector_query_many_impl,
+)
+
+register_internal_tool(VECTOR_QUERY_MANY_TOOL)
@@ -1,3 +1,5 @@
+import asyncio
+from typing import Optional
 from contextlib import asynccontextmanager
 
 from fastapi.responses import JSONResponse
@@ -6,9 +8,13 @@ from fastapi import FastAPI, Request
 from fastmcp import FastMCP
 
 from .config.server_config import server_config
+from .config.vector_config import vector_config
 from .internal.store import db, db_vector
+from .internal.services import service_vector_migration, service_vectors_async, vector_chunking
+from .internal.services.service_vector_warmup import VectorWarmup
+from .internal.store.repository_vectors import VectorRepository
 
-from .api.routers import tools, agents, chats, messages, vectors
+from .api.routers import tools, agents, chats, messages, vectors, health
 from .internal.mcp.tool_compiler import ToolCompiler
 from .internal.mcp.tool_engine import McpToolEngine
 
@@ -27,10 +33,12 @@ def build_mcp() -> FastMCP:
     mcp = FastMCP("agent-store")
     return mcp
 
-def create_app(*, engine=None) -> FastAPI:
+def create_app(*, engine=None, vector_backend: Optional[str] = None) -> FastAPI:
     """
-    App factory. In tests, pass a SQLite in-memory engine.
+    App factory. In tests, pass a SQLite in-memory engine and optionally
+    vector_backend="memory" (defaults to [tool.vectors] backend).
     """
+    backend = vector_backend or vector_config.get("backend", db_vector.BACKEND)
     logger.info("Setting up database engine.")
     if engine is not None:
         db.set_engine(engine)
@@ -45,14 +53,47 @@ def create_app(*, engine=None) -> FastAPI:
         async with mcp_app.lifespan(mcp_app):
             logger.info("Initializing databases")
             db.init_db()
-            vector_client = db_vector.init_chroma()
+            vector_client = db_vector.init_vector_backend(
+                backend,
+                persistent=vector_config.get("persistent", db_vector.USE_PERSISTENT),
+                path=vector_config.get("persist-path", db_vector.CHROMA_PATH),
+            )
+            # Hashed embeddings are cheaper than a cache lookup.
+            if backend != "memory" and vector_config.get("embedding-cache-path"):
+                logger.info("Loading embedding cache")
+                db_vector.init_embedding_cache(vector_config["embedding-cache-path"])
+            db_vector.init_embedding_models(vector_config.get("embedding-models", {}))
+            db_vector.set_flat_index(
+                vector_config.get("flat-max-records", db_vector.FLAT_MAX_RECORDS),
+                vector_config.get("flat-dtype", db_vector.FLAT_DTYPE),
+            )
+            db_vector.set_snapshot_path(vector_config.get("snapshot-path", db_vector.SNAPSHOT_PATH))
             logger.info("Setting application state")
             app.state.tool_engine = McpToolEngine(mcp, compiler)
             app.state.mcp_app = mcp_app
             app.state.vector_client = vector_client
+            app.state.vector_executor = service_vectors_async.init_vector_executor()
+            service_vectors_async.init_query_coalescer()
+            vector_chunking.init_chunk_pool()
             logger.info("Syncing MCP Tools")
             await app.state.tool_engine.sync_all_enabled()
+            # Warm up in the background: liveness is up right away,
+            # readiness (/health/ready) waits for the warmup to finish.
+            vector_repo = VectorRepository(
+                vector_client,
+                registry=db_vector.get_collection_registry(vector_client),
+                query_cache=db_vector.get_query_cache(),
+            )
+            swept = vector_repo.sweep_collections()
+            if swept:
+                logger.info("Dropped collections left by interrupted migrations or restores: %s", swept)
+            app.state.vector_warmup = VectorWarmup(vector_config.get("warmup-collections", []))
+            warmup = asyncio.create_task(app.state.vector_warmup.start(app.state.vector_executor, vector_repo))
             yield
+            warmup.cancel()
+            service_vector_migration.shutdown_vector_migrations()
+            service_vectors_async.shutdown_vector_executor()
+            vector_chunking.shutdown_chunk_pool()
 
     app = FastAPI(title="agent-store", lifespan=lifespan)
     logger.info("Registering middlewares")
@@ -71,6 +112,7 @@ def create_app(*, engine=None) -> FastAPI:
     app.include_router(chats.router)
     app.include_router(messages.router)
     app.include_router(vectors.router)
+    app.include_router(health.router)
     
     logger.info("Mounting MCP server")
     app.mount("/", mcp_app)
@@ -1,3 +1,5 @@
+import uuid
+
 from fastmcp import Client
 import pytest
 import httpx
@@ -5,6 +7,29 @@ from asgi_lifespan import LifespanManager
 from sqlalchemy.pool import StaticPool
 from sqlmodel import SQLModel, create_engine
 
+# Deterministic embeddings so vector tests never download Chroma's default model.
+from app.internal.store.vector_backend import HashEmbeddingFunction
+
+
+@pytest.fixture(autouse=True)
+def hash_embeddings(monkeypatch):
+    from app.config.vector_config import vector_config
+    from app.internal.store import db_vector
+    # Never touch the on-disk embedding cache of the real model.
+    monkeypatch.delitem(vector_config, "embedding-cache-path", raising=False)
+    fn = HashEmbeddingFunction()
+    db_vector.set_embedding_function(fn)
+    yield fn
+    db_vector.set_embedding_function(None)
+    db_vector.set_embedding_cache(None)
+    db_vector.set_embedding_models({})
+
+
+@pytest.fixture()
+def collection_name():
+    """Unique collection name; Chroma's in-memory clients share state per process."""
+    return f"test_{uuid.uuid4().hex[:12]}"
+
 
 @pytest.fixture()
 def test_engine():
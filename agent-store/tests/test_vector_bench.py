@@ -0,0 +1,71 @@
+"""Tests for the exact vs. ANN benchmark harness."""
+import json
+
+import chromadb
+import numpy as np
+import pytest
+
+from app.bench.vector_recall import build_synthetic_collection, exact_top_k, main, recall_at_k, run_benchmark
+from app.internal.store import db_vector
+from app.internal.store.collection_aliases import CollectionAliases
+from app.internal.store.repository_vectors import VectorRepository
+
+
+class TestVectorBenchmark:
+    """Tests for recall and latency reporting."""
+
+    def test_exact_top_k_matches_sorting(self):
+        rng = np.random.default_rng(1)
+        matrix = rng.normal(size=(50, 8)).astype(np.float32)
+        queries = rng.normal(size=(3, 8)).astype(np.float32)
+
+        for space in ("l2", "ip", "cosine"):
+            top = exact_top_k(matrix, queries, 5, space)
+            if space == "l2":
+                expected = np.argsort(((queries[:, None, :] - matrix[None]) ** 2).sum(-1), axis=1)[:, :5]
+            elif space == "ip":
+                expected = np.argsort(-(queries @ matrix.T), axis=1)[:, :5]
+            else:
+                unit = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+                expected = np.argsort(-(queries @ unit.T), axis=1)[:, :5]
+            assert top.tolist() == expected.tolist()
+
+    def test_recall_at_k(self):
+        assert recall_at_k([["a", "b"], ["c", "d"]], [["a", "x"], ["d", "c"]]) == 0.75
+
+    def test_small_collection_has_full_recall(self, collection_name):
+        repo = VectorRepository(chromadb.Client())
+        build_synthetic_collection(repo, collection_name, 200, 16, seed=3)
+        queries = np.random.default_rng(4).normal(size=(20, 16)).astype(np.float32)
+
+        report = run_benchmark(repo, collection_name, queries, k=5, concurrency=[1, 2])
+
+        assert report["records"] == 200 and report["dim"] == 16
+        assert [level["concurrency"] for level in report["levels"]] == [1, 2]
+        for level in report["levels"]:
+            assert level["recall_at_k"] == 1.0
+            assert level["queries"] == 20
+            assert 0 < level["p50_ms"] <= level["p95_ms"] <= level["p99_ms"]
+
+    def test_command_runs_offline_on_synthetic_data(self, capsys):
+        assert main(["--synthetic", "300", "--dim", "8", "--sample", "10", "--concurrency", "1", "--json"]) == 0
+
+        report = json.loads(capsys.readouterr().out)
+        assert report["records"] == 300
+        assert report["levels"][0]["recall_at_k"] > 0.9
+
+    def test_unknown_collection_is_an_error_not_created(self, collection_name, tmp_path, capsys):
+        with pytest.raises(SystemExit):
+            main(["--path", str(tmp_path), "--collection", collection_name])
+
+        assert f"no collection '{collection_name}'" in capsys.readouterr().err
+        assert collection_name not in [c.name for c in chromadb.PersistentClient(path=str(tmp_path)).list_collections()]
+
+    def test_collection_alias_resolves_from_the_store_directory(self, collection_name, tmp_path, capsys):
+        repo = VectorRepository(chromadb.PersistentClient(path=str(tmp_path)))
+        build_synthetic_collection(repo, f"{collection_name}_v1", 50, 8)
+        CollectionAliases(tmp_path / db_vector.ALIASES_FILE).set(collection_name, f"{collection_name}_v1")
+
+        assert main(["--path", str(tmp_path), "--collection", collection_name, "--sample", "5", "--concurrency", "1", "--json"]) == 0
+
+        assert json.loads(capsys.readouterr().out)["records"] == 50
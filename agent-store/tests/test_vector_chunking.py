@@ -0,0 +1,28 @@
+"""Unit tests for server-side document chunking."""
+from concurrent.futures import ProcessPoolExecutor
+
+from app.internal.services.vector_chunking import INLINE_CHARS, chunk_text, chunk_texts
+
+
+class TestChunking:
+    """Tests for server-side document chunking."""
+
+    def test_char_chunks_overlap_and_keep_words_whole(self):
+        text = " ".join(f"w{i:03d}" for i in range(200))
+
+        spans = chunk_text(text, size=100, overlap=20)
+
+        assert spans[0][0] == 0 and spans[-1][1] == len(text)
+        for (_, prev_end), (start, end) in zip(spans, spans[1:]):
+            assert prev_end - 20 <= start < prev_end
+            assert end - start <= 100
+        for start, end in spans[:-1]:
+            assert text[end - 1] == " "
+
+    def test_pool_matches_inline_chunking(self):
+        texts = ["lorem ipsum " * (INLINE_CHARS // 12 + 1), "short text"]
+
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            pooled = chunk_texts(texts, size=500, overlap=50, pool=pool)
+
+        assert pooled == [chunk_text(t, size=500, overlap=50) for t in texts]
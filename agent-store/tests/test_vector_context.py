@@ -0,0 +1,48 @@
+"""Unit tests for budgeted context packing of query hits."""
+from app.contracts.contract_vectors import VectorQueryHit
+from app.internal.services.vector_context import ELLIPSIS, pack_context
+
+
+def hit(id, document, distance=0.1, **metadata):
+    return VectorQueryHit(collection="kb", id=id, document=document, metadata=metadata, distance=distance)
+
+
+class TestContextPacking:
+    """Tests for packing hits into a character budget."""
+
+    def test_short_hits_are_packed_whole_in_rank_order(self):
+        hits = [hit("a", "alpha doc"), hit("b", "beta doc", distance=0.2)]
+
+        packed = pack_context(hits, "alpha", budget=500)
+
+        assert packed.ids == ["a", "b"] and not packed.truncated and not packed.dropped
+        assert packed.context.index("alpha doc") < packed.context.index("beta doc")
+        assert packed.used == len(packed.context) <= 500
+
+    def test_long_document_is_trimmed_to_the_query_terms(self):
+        filler = " ".join(f"filler{i}" for i in range(300))
+        document = f"{filler} the refund window is thirty days {filler}"
+
+        packed = pack_context([hit("policy", document)], "refund window", budget=600)
+
+        assert packed.truncated == ["policy"]
+        assert "refund window is thirty days" in packed.context
+        assert packed.context.count(ELLIPSIS) == 2
+        assert packed.used <= 600
+
+    def test_repeated_metadata_is_shown_once(self):
+        hits = [hit("a", "one", source="wiki", page=1), hit("b", "two", source="wiki", page=2)]
+
+        packed = pack_context(hits, "one", budget=500)
+
+        assert packed.context.count("source: wiki") == 1
+        assert "page: 1" in packed.context and "page: 2" in packed.context
+
+    def test_hits_over_budget_are_dropped(self):
+        hits = [hit(f"doc_{i}", "word " * 200) for i in range(5)]
+
+        packed = pack_context(hits, "word", budget=700)
+
+        assert packed.ids and packed.dropped
+        assert packed.ids + packed.dropped == [f"doc_{i}" for i in range(5)]
+        assert packed.used <= 700
@@ -0,0 +1,181 @@
+"""Unit tests for the vector service layer."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.contracts.contract_vectors import VectorCreate, VectorMigrationCreate, VectorQueryRequest
+from app.internal.services.errors import ValidationError
+from app.internal.services.query_coalescer import QueryCoalescer
+from app.internal.services.service_vector_migration import VectorMigrations
+from app.internal.services.service_vector_warmup import VectorWarmup
+from app.internal.services.service_vectors import VectorService
+from app.internal.services.service_vectors_async import AsyncVectorService, VectorExecutor
+from app.internal.store.collection_registry import CollectionRegistry
+from app.internal.store.repository_vectors import VectorRepository
+from app.internal.store.vector_backend import MemoryBackend
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestVectorExecutor:
+    """Tests for the bounded vector thread pool."""
+
+    async def test_blocking_calls_do_not_block_the_event_loop(self):
+        executor = VectorExecutor(max_workers=2, max_pending=2)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        task = asyncio.create_task(ticker())
+        await executor.run(time.sleep, 0.1)
+        task.cancel()
+        executor.shutdown()
+
+        assert ticks >= 5
+
+    async def test_admission_is_bounded_and_observable(self):
+        executor = VectorExecutor(max_workers=1, max_pending=2)
+        release = threading.Event()
+
+        calls = [asyncio.create_task(executor.run(release.wait)) for _ in range(4)]
+        await asyncio.sleep(0.05)
+        stats = executor.stats()
+        release.set()
+        await asyncio.gather(*calls)
+        executor.shutdown()
+
+        assert (stats["running"], stats["queued"], stats["waiting"]) == (1, 1, 2)
+        assert executor.stats()["completed"] == 4
+
+
+class TestQueryCoalescer:
+    """Tests for micro-batching of concurrent queries."""
+
+    @pytest.fixture
+    def vector_service(self, hash_embeddings, collection_name):
+        client = MemoryBackend()
+        repo = VectorRepository(client, registry=CollectionRegistry(client, embedding_function=hash_embeddings))
+        svc = VectorService(repo)
+        svc.create_many(
+            [
+                VectorCreate(id=f"doc_{i}", collection=collection_name, document=f"alpha{i} beta{i % 4}")
+                for i in range(12)
+            ]
+        )
+        return svc
+
+    async def test_concurrent_queries_share_one_batch(self, vector_service, collection_name):
+        executor = VectorExecutor(max_workers=2, max_pending=8)
+        coalescer = QueryCoalescer(window_ms=20, max_batch=16)
+        svc = AsyncVectorService(vector_service, executor=executor, coalescer=coalescer)
+        texts = ["alpha1", "alpha5 beta1", "alpha7", "alpha1"]
+
+        results = await asyncio.gather(
+            *(svc.query(VectorQueryRequest(collection=collection_name, query=t, n_results=1 + i)) for i, t in enumerate(texts))
+        )
+        executor.shutdown()
+
+        assert coalescer.stats()["batches"] == 1
+        assert [len(r.hits) for r in results] == [1, 2, 3, 4]
+        for text, result in zip(texts, results):
+            single = vector_service.query(VectorQueryRequest(collection=collection_name, query=text, n_results=len(result.hits)))
+            # Ties may come back in any order, so compare the distances.
+            assert [h.distance for h in result.hits] == pytest.approx([h.distance for h in single.hits])
+
+    async def test_hybrid_queries_batch_only_with_the_same_n_results(self, vector_service, collection_name):
+        executor = VectorExecutor(max_workers=2, max_pending=8)
+        coalescer = QueryCoalescer(window_ms=20, max_batch=16)
+        svc = AsyncVectorService(vector_service, executor=executor, coalescer=coalescer)
+        reqs = [
+            VectorQueryRequest(collection=collection_name, query=text, n_results=n, retrieval="hybrid")
+            for text, n in [("alpha1", 2), ("alpha5 beta1", 2), ("alpha7", 5)]
+        ]
+
+        results = await asyncio.gather(*(svc.query(req) for req in reqs))
+        executor.shutdown()
+
+        assert coalescer.stats()["batches"] == 2
+        for req, result in zip(reqs, results):
+            assert [h.id for h in result.hits] == [h.id for h in vector_service.query(req).hits]
+
+    async def test_full_batch_flushes_before_window(self, vector_service, collection_name):
+        executor = VectorExecutor(max_workers=1, max_pending=4)
+        coalescer = QueryCoalescer(window_ms=10_000, max_batch=2)
+        svc = AsyncVectorService(vector_service, executor=executor, coalescer=coalescer)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                svc.query(VectorQueryRequest(collection=collection_name, query="alpha2")),
+                svc.query(VectorQueryRequest(collection=collection_name, query="alpha3")),
+            ),
+            timeout=5,
+        )
+        executor.shutdown()
+
+        assert all(r.hits for r in results)
+
+
+class TestVectorWarmup:
+    """Tests for the startup warmup of hot collections."""
+
+    async def test_aliases_are_warmed_through_their_target(self, hash_embeddings, collection_name):
+        client = MemoryBackend()
+        repo = VectorRepository(client, registry=CollectionRegistry(client, embedding_function=hash_embeddings))
+        target = f"{collection_name}.v2"
+        repo.create_vectors(target, [VectorCreate(id="a", collection=target, document="alpha")])
+        repo.create_vectors(collection_name + "_other", [
+            VectorCreate(id="b", collection=collection_name + "_other", document="beta"),
+        ])
+        repo.swap_alias(collection_name, target)
+
+        configured, everything = VectorWarmup([collection_name, "missing_collection"]), VectorWarmup(["*"])
+        configured.run(repo)
+        everything.run(repo)
+
+        assert list(configured.results) == [collection_name] and configured.skipped == ["missing_collection"]
+        assert sorted(everything.results) == [collection_name, collection_name + "_other"]
+        assert everything.results[collection_name]["count"] == 1
+
+class TestVectorMigrations:
+    """Tests for background collection migrations."""
+
+    async def test_cancelling_during_the_swap_keeps_the_live_target(self, hash_embeddings, collection_name, monkeypatch):
+        client = MemoryBackend()
+        repo = VectorRepository(client, registry=CollectionRegistry(client, embedding_function=hash_embeddings))
+        repo.create_vectors(collection_name, [
+            VectorCreate(id=f"doc_{i}", collection=collection_name, document=f"alpha{i}") for i in range(6)
+        ])
+        executor = VectorExecutor(max_workers=2, max_pending=2)
+        migrations = VectorMigrations()
+        release, finish = threading.Event(), repo.finish_migration
+
+        def slow_finish(*args, **kwargs):
+            release.wait(5)
+            return finish(*args, **kwargs)
+
+        monkeypatch.setattr(repo, "finish_migration", slow_finish)
+        state = await migrations.start(AsyncVectorService(VectorService(repo), executor), collection_name, VectorMigrationCreate())
+        for _ in range(200):
+            if migrations.get(state.id).status not in ("copying", "catching_up"):
+                break
+            await asyncio.sleep(0.01)
+        assert migrations.get(state.id).status == "swapping"
+
+        with pytest.raises(ValidationError):
+            await migrations.cancel(state.id)
+        job = migrations._job(state.id)
+        job.task.cancel()  # as on shutdown
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await job.task
+        executor.shutdown()
+
+        assert migrations.get(state.id).status == "swapped"
+        assert repo.registry.resolve(collection_name) == state.target
+        assert repo.collection_info(collection_name).count == 6
@@ -0,0 +1,615 @@
+"""Unit tests for the vector store layer (repository, registry, caches)."""
+import threading
+
+import chromadb
+import numpy as np
+import pytest
+from chromadb.errors import NotFoundError as ChromaNotFoundError, UniqueConstraintError
+
+from app.cli.vector_snapshot import main as snapshot_main
+from app.contracts.contract_vectors import VectorCreate, VectorDeleteRequest, VectorIndexConfig, VectorQueryRequest
+from app.internal.services.errors import ValidationError
+from app.internal.services.service_vectors import VectorService
+from app.internal.store.collection_aliases import CollectionAliases
+from app.internal.store.collection_registry import CollectionRegistry
+from app.internal.store.db_vector import ALIASES_FILE
+from app.internal.store.dedup_index import MinHashIndex, minhash
+from app.internal.store.embedding_cache import CachedEmbeddingFunction, EmbeddingCache, embedding_namespace
+from app.internal.store.flat_index import FlatCollection
+from app.internal.store.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+from app.internal.store.mmr import mmr_select
+from app.internal.store.query_cache import QueryResultCache
+from app.internal.store.repository_vectors import DuplicateIdError, VectorRepository
+from app.internal.store.vector_backend import HashEmbeddingFunction, MemoryBackend, VectorBackend, VectorCollection
+
+
+@pytest.fixture
+def chroma_client():
+    return chromadb.Client()
+
+
+@pytest.fixture(params=["chroma", "memory"])
+def backend(request, chroma_client):
+    """Repository-level tests run against both backends."""
+    return chroma_client if request.param == "chroma" else MemoryBackend()
+
+
+@pytest.fixture
+def registry(backend, hash_embeddings):
+    return CollectionRegistry(backend, embedding_function=hash_embeddings)
+
+
+@pytest.fixture
+def repo(backend, registry):
+    return VectorRepository(backend, registry=registry)
+
+
+def items(collection: str, count: int) -> list[VectorCreate]:
+    return [
+        VectorCreate(id=f"doc_{i}", collection=collection, document=f"document {i} text", metadata={"n": i})
+        for i in range(count)
+    ]
+
+
+class TestCollectionRegistry:
+    """Tests for the collection handle cache."""
+
+    def test_repeated_lookups_hit_the_cache(self, repo, registry, collection_name):
+        """Only the first access resolves the collection."""
+        repo.create_vectors(collection_name, items(collection_name, 3))
+        repo.read_vector(collection_name, "doc_1")
+        repo.collection_info(collection_name)
+
+        assert registry.stats() == {
+            "size": 1, "hits": 2, "misses": 1, "invalidations": 0, "flat": 0, "promotions": 0,
+        }
+
+    def test_delete_collection_invalidates_handle(self, repo, registry, collection_name):
+        """A deleted collection is re-resolved (and recreated) on next access."""
+        repo.create_vectors(collection_name, items(collection_name, 3))
+
+        repo.delete_collection(collection_name)
+
+        assert registry.stats()["invalidations"] == 1
+        assert repo.collection_info(collection_name).count == 0
+        assert registry.stats()["misses"] == 2
+
+
+class TestVectorBackend:
+    """Tests for the backend protocol and the in-memory backend."""
+
+    def test_backends_satisfy_the_protocol(self, chroma_client, collection_name):
+        memory = MemoryBackend()
+        for backend in (chroma_client, memory):
+            assert isinstance(backend, VectorBackend)
+            assert isinstance(backend.get_or_create_collection(collection_name), VectorCollection)
+
+    def test_memory_backend_lifecycle(self):
+        backend = MemoryBackend()
+        backend.create_collection("c", configuration={"hnsw": {"space": "cosine"}})
+
+        with pytest.raises(UniqueConstraintError):
+            backend.create_collection("c")
+        backend.delete_collection("c")
+        with pytest.raises(ChromaNotFoundError):
+            backend.get_collection("c")
+        assert backend.list_collections() == []
+
+    @pytest.mark.parametrize("selector", [{"where": {}}, {"where_document": {}}, {"ids": []}])
+    def test_empty_delete_selectors_are_rejected(self, repo, collection_name, selector):
+        repo.create_vectors(collection_name, items(collection_name, 3))
+
+        with pytest.raises(ValidationError):
+            VectorService(repo).delete_many(VectorDeleteRequest(collection=collection_name, **selector))
+
+        assert repo.collection_info(collection_name).count == 3
+
+
+class TestQueryResultCache:
+    """Tests for the TTL + generation based query result cache."""
+
+    @pytest.fixture
+    def cached_repo(self, backend, registry):
+        return VectorRepository(backend, registry=registry, query_cache=QueryResultCache())
+
+    def test_repeated_query_is_served_from_cache(self, cached_repo, collection_name):
+        cached_repo.create_vectors(collection_name, items(collection_name, 3))
+        req = VectorQueryRequest(collection=collection_name, query="document 1", n_results=2)
+
+        first = cached_repo.query(req, cache_ttl=60)
+        second = cached_repo.query(req, cache_ttl=60)
+
+        assert second is first
+        assert cached_repo.stats()["query_cache"]["hits"] == 1
+
+    def test_write_invalidates_cached_results(self, cached_repo, collection_name):
+        cached_repo.create_vectors(collection_name, items(collection_name, 3))
+        req = VectorQueryRequest(collection=collection_name, query="document 1", n_results=5)
+        before = cached_repo.query(req, cache_ttl=60)
+
+        cached_repo.delete_vector(collection_name, "doc_1")
+        after = cached_repo.query(req, cache_ttl=60)
+
+        assert len(before.hits) == 3
+        assert [h.id for h in after.hits if h.id == "doc_1"] == []
+
+    def test_expired_entries_are_not_served(self, monkeypatch):
+        cache = QueryResultCache()
+        now = [100.0]
+        monkeypatch.setattr("app.internal.store.query_cache.time.monotonic", lambda: now[0])
+
+        cache.put("key", "value", ttl_seconds=5)
+        now[0] += 10
+
+        assert cache.get("key") is None
+
+
+class TestEmbeddingCache:
+    """Tests for the disk-backed embedding cache."""
+
+    def test_cached_texts_skip_the_embedding_function(self, tmp_path, hash_embeddings):
+        calls = []
+
+        def counting(texts):
+            calls.append(list(texts))
+            return hash_embeddings(texts)
+
+        fn = CachedEmbeddingFunction(hash_embeddings, EmbeddingCache(tmp_path, "test-model"))
+        fn.inner = counting
+
+        first = fn(["alpha beta", "gamma"])
+        second = fn(["gamma", "alpha beta", "delta"])
+
+        assert calls == [["alpha beta", "gamma"], ["delta"]]
+        np.testing.assert_allclose(second[1], first[0])
+
+    def test_cache_survives_reopen(self, tmp_path, hash_embeddings):
+        texts = [f"text {i}" for i in range(1500)]
+        EmbeddingCache(tmp_path, "test-model").put_many(texts, hash_embeddings(texts))
+
+        reopened = EmbeddingCache(tmp_path, "test-model")
+        found = reopened.get_many(["text 1499", "unknown"])
+
+        assert reopened.stats()["entries"] == 1500
+        np.testing.assert_allclose(found[0], hash_embeddings(["text 1499"])[0])
+        assert found[1] is None
+
+    def test_namespace_follows_the_embedding_function_config(self):
+        assert embedding_namespace(HashEmbeddingFunction(64)) == embedding_namespace(HashEmbeddingFunction(64))
+        assert embedding_namespace(HashEmbeddingFunction(64)) != embedding_namespace(HashEmbeddingFunction(32))
+        assert embedding_namespace(HashEmbeddingFunction(64)).startswith("test-hash-")
+
+    def test_cache_with_another_dimension_is_cleared(self, tmp_path):
+        EmbeddingCache(tmp_path, "model").put_many(["stale"], HashEmbeddingFunction(32)(["stale"]))
+
+        fn = CachedEmbeddingFunction(HashEmbeddingFunction(64), EmbeddingCache(tmp_path, "model"))
+        fn(["fresh"])
+
+        assert fn.cache.dim == 64
+        assert len(fn(["stale"])[0]) == 64
+
+
+class TestScan:
+    """Tests for paging through a whole collection."""
+
+    def test_scan_pages_cover_every_record_once(self, repo, collection_name):
+        repo.create_vectors(collection_name, items(collection_name, 7))
+
+        pages = list(repo.scan(collection_name, include=["documents", "embeddings"], page_size=3))
+
+        assert [len(page["ids"]) for page in pages] == [3, 3, 1]
+        assert sorted(id for page in pages for id in page["ids"]) == sorted(f"doc_{i}" for i in range(7))
+        assert all(len(page["embeddings"]) == len(page["documents"]) == len(page["ids"]) for page in pages)
+
+
+class TestSnapshot:
+    """Tests for binary snapshots and restores."""
+
+    def test_restore_reproduces_records_embeddings_and_settings(self, repo, collection_name, tmp_path):
+        repo.create_collection(collection_name, VectorIndexConfig(space="ip", search_ef=40), metadata={"team": "kb"})
+        repo.create_vectors(collection_name, items(collection_name, 7))
+
+        manifest = repo.snapshot_collection(collection_name, tmp_path / "snap", page_size=3)
+        restored = repo.restore_collection(tmp_path / "snap", f"{collection_name}_copy", batch_size=2)
+
+        assert manifest.count == restored.count == 7
+        assert restored.metadata["team"] == "kb" and restored.metadata["hnsw:space"] == "ip"
+        assert restored.metadata["hnsw:search_ef"] == 40
+        include = ["documents", "metadatas", "embeddings"]
+        before = repo._collection(collection_name).get(ids=["doc_5"], include=include)
+        after = repo._collection(f"{collection_name}_copy").get(ids=["doc_5"], include=include)
+        assert after["documents"] == before["documents"] and after["metadatas"] == before["metadatas"]
+        assert np.array_equal(after["embeddings"], before["embeddings"])
+        with pytest.raises(FileExistsError):
+            repo.snapshot_collection(collection_name, tmp_path / "snap")
+
+    def test_command_saves_and_restores_a_persistent_collection(self, collection_name, hash_embeddings, tmp_path, capsys):
+        store = str(tmp_path / "chroma")
+        client = chromadb.PersistentClient(path=store)
+        repo = VectorRepository(client, registry=CollectionRegistry(client, embedding_function=hash_embeddings))
+        repo.create_vectors(collection_name, items(collection_name, 5))
+
+        assert snapshot_main(["--path", store, "save", collection_name, str(tmp_path / "snap")]) == 0
+        assert snapshot_main(["--path", store, "restore", str(tmp_path / "snap"), "--replace"]) == 0
+
+        assert "restored 5 records" in capsys.readouterr().out
+        aliases = CollectionAliases(tmp_path / "chroma" / ALIASES_FILE)
+        reopened = VectorRepository(client, registry=CollectionRegistry(client, aliases=aliases))
+        assert reopened.collection_info(collection_name).count == 5
+
+    def test_failed_replace_keeps_the_existing_collection(self, repo, collection_name, tmp_path):
+        repo.create_vectors(collection_name, items(collection_name, 4))
+        repo.snapshot_collection(collection_name, tmp_path / "snap")
+        repo.create_vector(collection_name, VectorCreate(id="newer", collection=collection_name, document="newer"))
+        (tmp_path / "snap" / "ids.jsonl").write_text("truncated\n")
+
+        with pytest.raises(ValueError):
+            repo.restore_collection(tmp_path / "snap", collection_name, replace=True)
+
+        assert repo.collection_info(collection_name).count == 5
+        assert repo.aliases() == {}
+
+    def test_replace_points_the_name_at_the_restored_collection(self, repo, collection_name, tmp_path):
+        repo.create_vectors(collection_name, items(collection_name, 4))
+        repo.snapshot_collection(collection_name, tmp_path / "snap")
+        repo.create_vector(collection_name, VectorCreate(id="newer", collection=collection_name, document="newer"))
+
+        restored = repo.restore_collection(tmp_path / "snap", collection_name, replace=True)
+
+        assert restored.count == 4 and repo.collection_info(collection_name).count == 4
+        assert collection_name not in repo.collection_names()
+        assert repo.aliases()[collection_name].startswith(f"{collection_name}.r")
+
+
+    def test_writes_during_the_replace_swap_wait_for_the_restored_collection(self, repo, collection_name, tmp_path, monkeypatch):
+        repo.create_vectors(collection_name, items(collection_name, 4))
+        repo.snapshot_collection(collection_name, tmp_path / "snap")
+        write = threading.Thread(target=repo.create_vector, args=(
+            collection_name, VectorCreate(id="held", collection=collection_name, document="held write"),
+        ))
+        swap = repo.swap_alias
+
+        def swap_with_a_write_pending(alias, target):
+            write.start()
+            write.join(0.1)
+            assert write.is_alive()
+            return swap(alias, target)
+
+        monkeypatch.setattr(repo, "swap_alias", swap_with_a_write_pending)
+        repo.restore_collection(tmp_path / "snap", collection_name, replace=True)
+        write.join(5)
+
+        assert repo.find_ids(collection_name, ids=["held"]) == ["held"]
+        assert repo.collection_info(collection_name).count == 5
+
+class TestAliases:
+    """Tests for collection aliases and the migration copy helpers."""
+
+    def test_alias_swap_moves_reads_writes_and_cached_queries(self, repo, collection_name):
+        repo.create_vectors(collection_name, items(collection_name, 3))
+        target = f"{collection_name}.v2"
+        repo.create_migration_target(collection_name, target, VectorIndexConfig(space="ip"))
+        for page in repo.scan(collection_name):
+            assert not repo.copy_records(target, page)
+        repo.create_vector(collection_name, VectorCreate(id="late", collection=collection_name, document="late write"))
+        req = VectorQueryRequest(collection=collection_name, query="document 1 text", n_results=10)
+        before = repo.query(req, cache_ttl=60)
+
+        assert repo.reconcile_records(collection_name, target) == 1
+        assert repo.swap_alias(collection_name, target) == collection_name
+        repo.create_vector(collection_name, VectorCreate(id="after", collection=collection_name, document="after swap"))
+
+        assert repo.registry.resolve(collection_name) == target
+        assert repo.collection_info(collection_name).metadata["hnsw:space"] == "ip"
+        assert len(before.hits) == 4 and len(repo.query(req, cache_ttl=60).hits) == 5
+        assert repo.find_ids(target, ids=["after"]) == ["after"]
+        repo.delete_collection(collection_name, resolve=False)
+        assert repo.collection_exists(collection_name)
+        repo.delete_collection(collection_name)
+        assert repo.aliases() == {} and not repo.collection_exists(target)
+
+    def test_write_between_catch_up_and_swap_reaches_the_new_collection(self, repo, collection_name):
+        repo.create_vectors(collection_name, items(collection_name, 3))
+        target = f"{collection_name}.v2"
+        repo.create_migration_target(collection_name, target, VectorIndexConfig())
+        for page in repo.scan(collection_name):
+            assert not repo.copy_records(target, page)
+        caught_up = repo.registry.generation(collection_name)
+
+        repo.create_vector(collection_name, VectorCreate(id="late", collection=collection_name, document="late write"))
+
+        assert repo.finish_migration(collection_name, target, caught_up) == 1
+        assert repo.find_ids(collection_name, ids=["late"]) == ["late"]
+
+    def test_writes_during_the_swap_wait_and_go_to_the_new_collection(self, repo, backend, collection_name):
+        repo.create_vectors(collection_name, items(collection_name, 3))
+        target = f"{collection_name}.v2"
+        repo.create_migration_target(collection_name, target, VectorIndexConfig())
+        write = threading.Thread(target=repo.create_vector, args=(
+            collection_name, VectorCreate(id="held", collection=collection_name, document="held write"),
+        ))
+
+        with repo.registry.frozen(collection_name):
+            write.start()
+            write.join(0.1)
+            assert write.is_alive()
+            repo.swap_alias(collection_name, target)
+        write.join(5)
+
+        assert repo.find_ids(target, ids=["held"]) == ["held"]
+        assert backend.get_collection(collection_name).get(ids=["held"])["ids"] == []
+
+    def test_startup_sweep_drops_what_a_restart_cut_short(self, backend, hash_embeddings, collection_name, tmp_path):
+        def reopen():
+            aliases = CollectionAliases(tmp_path / ALIASES_FILE)
+            return VectorRepository(backend, registry=CollectionRegistry(
+                backend, embedding_function=hash_embeddings, aliases=aliases,
+            ))
+
+        repo = reopen()
+        repo.create_vectors(collection_name, items(collection_name, 3))
+        target = f"{collection_name}.m0123abcd"
+        repo.create_migration_target(collection_name, target, VectorIndexConfig())
+        for page in repo.scan(collection_name):
+            assert not repo.copy_records(target, page)
+        repo.finish_migration(collection_name, target, repo.registry.generation(collection_name))
+        abandoned = f"{collection_name}.r4567cdef"
+        repo.create_vectors(abandoned, items(abandoned, 1))
+
+        restarted = reopen()
+        assert restarted.registry.aliases.retired() == [collection_name]
+        dropped = restarted.sweep_collections()
+
+        assert {collection_name, abandoned} <= set(dropped)  # the chroma client is shared between tests
+        assert restarted.registry.aliases.retired() == [] and restarted.aliases() == {collection_name: target}
+        assert restarted.collection_info(collection_name).count == 3
+        assert not restarted.collection_exists(abandoned)
+        assert restarted.sweep_collections() == []
+
+    def test_migration_target_embeds_with_its_own_model(self, backend, hash_embeddings, collection_name):
+        registry = CollectionRegistry(backend, embedding_function=hash_embeddings, embedding_functions={
+            "wide": HashEmbeddingFunction(96),
+        })
+        repo = VectorRepository(backend, registry=registry)
+        repo.create_vectors(collection_name, items(collection_name, 3))
+        target = f"{collection_name}.v2"
+        repo.create_migration_target(collection_name, target, VectorIndexConfig(), "wide")
+        for page in repo.scan(collection_name):
+            assert not repo.copy_records(target, page)
+        req = VectorQueryRequest(collection=collection_name, query="document 1 text", n_results=1, mmr=0.5)
+
+        # Until the swap the source is queried with its own (64-dim) function.
+        assert repo.query(req).hits[0].id == "doc_1"
+        assert repo.dimension(collection_name) == 64 and repo.dimension(target) == 96
+        repo.swap_alias(collection_name, target)
+        assert registry.embedding_model(collection_name) == "wide"
+        assert repo.query(req).hits[0].id == "doc_1"
+        assert registry.embed_queries(collection_name, ["document"]).shape == (1, 96)
+        with pytest.raises(ValueError):
+            registry.create(f"{collection_name}.v3", embedding_model="narrow")
+
+
+class TestLexicalRetrieval:
+    """Tests for the BM25 index and lexical/hybrid query modes."""
+
+    def test_identifiers_are_indexed_whole_and_by_parts(self):
+        assert tokenize("Mobile app v2.4.1: see INV-2024-0042") == [
+            "mobile", "app", "v2.4.1", "v2", "4", "1", "see", "inv-2024-0042", "inv", "2024", "0042",
+        ]
+
+    def test_bm25_ranks_rare_terms_and_forgets_removed_docs(self):
+        index = BM25Index()
+        index.add(["a", "b", "c"], ["error E_CONN_RESET on sync", "sync error", "sync works"])
+
+        assert [id for id, _ in index.search("e_conn_reset sync", 3)] == ["a", "b", "c"]
+        index.remove(["a"])
+        assert [id for id, _ in index.search("e_conn_reset", 3)] == []
+
+    def test_reciprocal_rank_fusion_rewards_agreement(self):
+        assert reciprocal_rank_fusion([["x", "y", "z"], ["y", "w"]])[:2] == ["y", "x"]
+
+    def test_hybrid_query_finds_exact_identifier_and_tracks_writes(self, repo, collection_name):
+        """The BM25 index is built on first use and kept current by later writes."""
+        repo.create_vectors(collection_name, items(collection_name, 20))
+        repo.create_vector(collection_name, VectorCreate(
+            id="known_issue", collection=collection_name, document="push delayed in mobile app v2.4.1",
+        ))
+        req = VectorQueryRequest(collection=collection_name, query="v2.4.1", n_results=3, retrieval="hybrid")
+
+        assert repo.query(req).hits[0].id == "known_issue"
+
+        repo.delete_vector(collection_name, "known_issue")
+        repo.create_vector(collection_name, VectorCreate(
+            id="fixed", collection=collection_name, document="fixed in v2.4.1", metadata={"n": 99},
+        ))
+        lexical = repo.query(req.model_copy(update={"retrieval": "lexical", "where": {"n": {"$gte": 50}}}))
+
+        assert [(h.id, h.distance, h.metadata) for h in lexical.hits] == [("fixed", None, {"n": 99})]
+
+    def test_skipped_adds_leave_the_index_alone(self, repo, collection_name):
+        """Adds of stored ids write nothing, so they must not reach the BM25 index either."""
+        repo.create_vectors(collection_name, items(collection_name, 3))
+        req = VectorQueryRequest(collection=collection_name, query="quokka", n_results=3, retrieval="lexical")
+        assert repo.query(req).hits == []
+
+        failures = repo.create_vectors(collection_name, [VectorCreate(id="doc_1", collection=collection_name, document="quokka")])
+        with pytest.raises(DuplicateIdError):
+            repo.create_vector(collection_name, VectorCreate(id="doc_2", collection=collection_name, document="quokka"))
+
+        assert [i for i, _ in failures] == [0]
+        assert repo.query(req).hits == []
+
+
+class TestMMR:
+    """Tests for maximal marginal relevance re-ranking."""
+
+    def test_near_duplicates_are_skipped(self):
+        query = np.array([1.0, 0.0, 0.0])
+        candidates = np.array([[1.0, 0.1, 0.0], [1.0, 0.11, 0.0], [0.7, 0.0, 0.7], [0.0, 1.0, 0.0]])
+
+        assert mmr_select(query, candidates, 2, lambda_mult=1.0) == [0, 1]
+        assert mmr_select(query, candidates, 2, lambda_mult=0.5) == [0, 2]
+        assert sorted(mmr_select(query, candidates, 10)) == [0, 1, 2, 3]
+
+    def test_query_option_reranks_candidates(self, repo, collection_name):
+        """With mmr, duplicates of the best hit give way to other documents."""
+        docs = ["alpha beta"] * 4 + ["alpha gamma", "alpha delta"]
+        repo.create_vectors(collection_name, [
+            VectorCreate(id=f"doc_{i}", collection=collection_name, document=d) for i, d in enumerate(docs)
+        ])
+        req = VectorQueryRequest(collection=collection_name, query="alpha beta", n_results=3)
+
+        plain = repo.query(req)
+        diverse = repo.query(req.model_copy(update={"mmr": 0.3}))
+
+        assert [h.document for h in plain.hits] == ["alpha beta"] * 3
+        assert [h.document for h in diverse.hits][0] == "alpha beta"
+        assert {h.document for h in diverse.hits[1:]} == {"alpha gamma", "alpha delta"}
+        assert all(h.distance is not None for h in diverse.hits)
+
+
+class TestFlatIndex:
+    """Tests for the in-process flat index and its promotion to Chroma."""
+
+    WHERES = [
+        {"n": 3},
+        {"n": {"$gte": 2}},
+        {"kind": {"$ne": "a"}},
+        {"kind": {"$in": ["a", "b"]}},
+        {"flag": True},
+        {"$or": [{"n": {"$lt": 2}}, {"kind": "b"}]},
+        {"$and": [{"n": {"$gt": 0}}, {"kind": {"$nin": ["a"]}}]},
+    ]
+
+    @staticmethod
+    def fill(col, count: int = 8):
+        rng = np.random.default_rng(0)
+        col.add(
+            ids=[f"id_{i}" for i in range(count)],
+            embeddings=rng.normal(size=(count, 6)).astype(np.float32),
+            documents=[f"doc {i}" for i in range(count)],
+            metadatas=[
+                {"n": i, **({"kind": "ab"[i % 2]} if i % 3 else {}), **({"flag": True} if i == 4 else {"flag": 1})}
+                for i in range(count)
+            ],
+        )
+
+    @pytest.mark.parametrize("space", ["l2", "cosine", "ip"])
+    def test_results_match_chroma(self, chroma_client, collection_name, space):
+        flat = FlatCollection("flat")
+        flat.modify(configuration={"hnsw": {"space": space}})
+        chroma = chroma_client.create_collection(collection_name, configuration={"hnsw": {"space": space}})
+        self.fill(flat)
+        self.fill(chroma)
+        query = np.random.default_rng(1).normal(size=(2, 6)).astype(np.float32)
+
+        for where in [None, *self.WHERES]:
+            expected = chroma.query(query_embeddings=query, n_results=3, where=where)
+            got = flat.query(query_embeddings=query, n_results=3, where=where)
+            assert got["ids"] == expected["ids"], where
+            assert np.allclose(got["distances"][0], expected["distances"][0], atol=1e-4)
+            assert sorted(flat.get(where=where)["ids"]) == sorted(chroma.get(where=where)["ids"]), where
+
+    def test_update_delete_and_float16(self):
+        flat = FlatCollection("flat", dtype="float16")
+        self.fill(flat)
+
+        flat.update(ids=["id_1", "missing"], metadatas=[{"kind": None, "extra": "x"}, {"n": 1}])
+        flat.delete(where={"n": {"$lt": 2}, "extra": {"$ne": "x"}})
+
+        assert flat.count() == 7
+        assert flat.get(ids=["id_1"])["metadatas"] == [{"n": 1, "flag": 1, "extra": "x"}]
+        stored = flat.get(ids=["id_5"], include=["embeddings"])["embeddings"][0]
+        original = np.random.default_rng(0).normal(size=(8, 6)).astype(np.float32)[5]
+        assert np.allclose(stored, original, atol=1e-2)
+        assert flat.query(query_embeddings=[original], n_results=1)["ids"] == [["id_5"]]
+
+    def test_collection_is_promoted_past_threshold(self, chroma_client, hash_embeddings, collection_name):
+        registry = CollectionRegistry(chroma_client, embedding_function=hash_embeddings, flat_max_records=5)
+        repo = VectorRepository(chroma_client, registry=registry)
+        repo.create_vectors(collection_name, items(collection_name, 4))
+        assert repo.collection_exists(collection_name)
+        assert collection_name not in [c.name for c in chroma_client.list_collections()]
+        flat = registry.get(collection_name)
+
+        repo.create_vectors(collection_name, items(collection_name, 8))
+
+        assert registry.stats()["promotions"] == 1
+        assert chroma_client.get_collection(collection_name).count() == 8
+        assert flat.count() == 8  # a stale flat handle forwards to Chroma
+        hits = repo.query(VectorQueryRequest(collection=collection_name, query="document 6 text", n_results=1)).hits
+        assert [(h.id, h.metadata) for h in hits] == [("doc_6", {"n": 6})]
+
+
+    def test_failed_promotion_keeps_the_batch_and_retries(self, chroma_client, hash_embeddings, collection_name, monkeypatch):
+        registry = CollectionRegistry(chroma_client, embedding_function=hash_embeddings, flat_max_records=5)
+        promote, failures = registry._promote, [RuntimeError("chroma unavailable")]
+
+        def flaky(flat):
+            if failures:
+                raise failures.pop()
+            return promote(flat)
+
+        monkeypatch.setattr(registry, "_promote", flaky)
+        repo = VectorRepository(chroma_client, registry=registry)
+
+        assert repo.create_vectors(collection_name, items(collection_name, 8)) == []
+        assert registry.get(collection_name).pending_promotion
+        assert registry.get(collection_name).count() == 8
+
+        repo.create_vectors(collection_name, items(collection_name, 9)[8:])
+
+        assert registry.stats()["promotions"] == 1
+        assert chroma_client.get_collection(collection_name).count() == 9
+
+class TestNearDuplicates:
+    """Tests for the MinHash/LSH near-duplicate index."""
+
+    BASE = (
+        "Known issues: Slack integration intermittent failures for workspaces with custom enterprise "
+        "routing. Workaround: reconnect the Slack integration and use the webhook fallback. Push "
+        "notifications on Android 14 are delayed in mobile app v2.4.1."
+    )
+
+    def test_similar_documents_are_found_and_forgotten(self):
+        index = MinHashIndex()
+        index.add(["old", "other"], [self.BASE, "Refunds for annual plans are prorated within 30 days."])
+        revised = self.BASE.replace("v2.4.1", "v2.4.2")
+
+        match = index.nearest(minhash(revised), 0.7)
+        assert match is not None and match[0] == "old" and match[1] > 0.7
+        assert index.nearest(minhash(revised), 0.7, exclude="old") is None
+        assert index.nearest(minhash("create a project board for the design team"), 0.5) is None
+
+        index.remove(["old"])
+        assert index.nearest(minhash(self.BASE), 0.7) is None
+        assert len(index) == 1
+
+    def test_lookup_only_compares_rows_from_shared_buckets(self):
+        index = MinHashIndex()
+        unrelated = [f"ticket {i} asks about invoice {i * 7} and seat count {i % 13}" for i in range(500)]
+        index.add([f"t{i}" for i in range(500)], unrelated)
+        index.add(["old", "calendar"], [self.BASE, "Calendar sync takes up to ten minutes for shared calendars."])
+        probe = minhash(self.BASE.replace("v2.4.1", "v2.4.2"))
+
+        assert index.candidates(probe) == ["old"]
+
+        index.add(["old"], ["Refunds for annual plans are prorated within 30 days."])
+        assert index.candidates(probe) == []
+        index.add(["new"], [self.BASE])
+        index.remove(["t0", "new"])
+        assert index.candidates(probe) == []
+        assert index.nearest(minhash(unrelated[1]), 0.9) == ("t1", 1.0)
+
+    def test_repository_matches_stored_and_earlier_items(self, repo, collection_name):
+        repo.create_vectors(collection_name, [VectorCreate(id="kb_1", collection=collection_name, document=self.BASE)])
+        batch = [
+            VectorCreate(id="kb_1", collection=collection_name, document=self.BASE),
+            VectorCreate(id="kb_2", collection=collection_name, document=self.BASE + " Fixed soon."),
+            VectorCreate(id="new_1", collection=collection_name, document="Calendar sync takes up to ten minutes."),
+            VectorCreate(id="new_2", collection=collection_name, document="calendar sync takes up to ten minutes."),
+        ]
+
+        matches = repo.find_near_duplicates(collection_name, batch, 0.8)
+
+        assert [m and m[0] for m in matches] == [None, "kb_1", None, "new_1"]
@@ -0,0 +1,682 @@
+import json
+
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+
+def vector_payload(collection: str, count: int, prefix: str = "doc") -> list[dict]:
+    return [
+        {
+            "id": f"{prefix}_{i}",
+            "collection": collection,
+            "document": f"{prefix} number {i} about topic {i % 3}",
+            "metadata": {"topic": i % 3},
+        }
+        for i in range(count)
+    ]
+
+
+async def test_bulk_create_writes_all_items_in_batches(app, async_client, collection_name):
+    """
+    Bulk ingest groups items and writes them in several batches.
+    """
+    # ARRANGE
+    payload = vector_payload(collection_name, 25)
+
+    # ACT
+    res = await async_client.post("/vectors/create", params={"batch_size": 10}, json=payload)
+
+    # ASSERT
+    assert res.status_code == 200, res.text
+    assert res.json() == {"ok": True, "created": 25, "failed": []}
+    assert app.state.vector_client.get_collection(collection_name).count() == 25
+
+
+async def test_bulk_create_reports_item_failures_without_aborting(async_client, collection_name):
+    """
+    Invalid and duplicate items are reported per item; the rest is written.
+    """
+    # ARRANGE
+    payload = vector_payload(collection_name, 3)
+    payload.append({"id": "empty", "collection": collection_name, "document": "   "})
+    payload.append(dict(payload[0]))
+
+    # ACT
+    res = await async_client.post("/vectors/create", json=payload)
+
+    # ASSERT
+    assert res.status_code == 200, res.text
+    body = res.json()
+    assert body["ok"] is False
+    assert body["created"] == 3
+    assert [(f["index"], f["id"]) for f in body["failed"]] == [(3, "empty"), (4, "doc_0")]
+
+
+async def test_bulk_create_upsert_overwrites_existing(app, async_client, collection_name):
+    """
+    With upsert=true, re-ingesting the same ids replaces their documents.
+    """
+    # ARRANGE
+    await async_client.post("/vectors/create", json=vector_payload(collection_name, 5))
+    updated = vector_payload(collection_name, 5)
+    for item in updated:
+        item["document"] = "replaced " + item["document"]
+
+    # ACT
+    res = await async_client.post("/vectors/create", params={"upsert": True}, json=updated)
+
+    # ASSERT
+    assert res.json()["created"] == 5
+    stored = app.state.vector_client.get_collection(collection_name).get(ids=["doc_0"])
+    assert stored["documents"] == ["replaced doc number 0 about topic 0"]
+
+
+async def test_bulk_create_reports_existing_ids_as_conflicts(app, async_client, collection_name):
+    """
+    Without upsert, ids that are already stored fail per item and keep their record.
+    """
+    # ARRANGE
+    await async_client.post("/vectors/create", json=vector_payload(collection_name, 2))
+    payload = vector_payload(collection_name, 3)
+    payload[0]["document"] = "should not replace doc_0"
+
+    # ACT
+    res = await async_client.post("/vectors/create", json=payload)
+
+    # ASSERT
+    body = res.json()
+    assert body["ok"] is False and body["created"] == 1
+    assert [(f["index"], f["id"]) for f in body["failed"]] == [(0, "doc_0"), (1, "doc_1")]
+    assert "already exists" in body["failed"][0]["error"]
+    stored = app.state.vector_client.get_collection(collection_name).get(ids=["doc_0"])
+    assert stored["documents"] == ["doc number 0 about topic 0"]
+
+
+async def test_ndjson_ingest_streams_progress_and_errors(app, async_client, collection_name):
+    """
+    NDJSON ingest writes valid lines in batches and reports bad lines by line number.
+    """
+    # ARRANGE
+    lines = [json.dumps(item) for item in vector_payload(collection_name, 7)]
+    lines.insert(2, "{not json")
+    lines.insert(5, json.dumps({"id": "x", "collection": collection_name}))
+    body = "\n".join(lines) + "\n"
+
+    # ACT
+    res = await async_client.post(
+        "/vectors/ingest",
+        params={"batch_size": 3},
+        content=body,
+        headers={"content-type": "application/x-ndjson"},
+    )
+
+    # ASSERT
+    assert res.status_code == 200, res.text
+    events = [json.loads(line) for line in res.text.splitlines()]
+    errors = [e for e in events if e["event"] == "error"]
+    assert [e["line"] for e in errors] == [3, 6]
+    assert [e for e in events if e["event"] == "progress"][-1]["created"] == 7
+    assert events[-1] == {"event": "done", "received": 9, "created": 7, "failed": 2}
+    assert app.state.vector_client.get_collection(collection_name).count() == 7
+
+
+async def test_ingest_stream_reports_broken_connection_as_disconnect():
+    """
+    A send failing with OSError mid-stream surfaces as ClientDisconnect, as it does in Starlette.
+    """
+    # ARRANGE
+    from starlette.requests import ClientDisconnect
+    from app.api.routers.vectors import DuplexStreamingResponse
+
+    async def body():
+        yield b"{}\n"
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            raise OSError("connection reset")
+
+    response = DuplexStreamingResponse(body(), media_type="application/x-ndjson")
+
+    # ACT / ASSERT
+    with pytest.raises(ClientDisconnect):
+        await response({"type": "http", "asgi": {"spec_version": "2.4"}}, None, send)
+
+
+async def test_delete_collection_and_stats(async_client, collection_name):
+    """
+    Collections can be dropped; the handle registry reports its counters.
+    """
+    # ARRANGE
+    await async_client.post("/vectors/create", json=vector_payload(collection_name, 2))
+
+    # ACT
+    info = await async_client.get(f"/vectors/collections/{collection_name}")
+    deleted = await async_client.delete(f"/vectors/collections/{collection_name}")
+    missing = await async_client.delete(f"/vectors/collections/{collection_name}")
+    stats = await async_client.get("/vectors/stats")
+
+    # ASSERT
+    assert info.json()["count"] == 2
+    assert deleted.status_code == 204
+    assert missing.status_code == 404
+    assert stats.json()["collections"]["hits"] >= 1
+
+
+async def test_vector_query_tool_runs_on_vector_executor(app, async_client, collection_name):
+    """
+    The vector_query internal tool offloads to the vector executor and returns hits.
+    """
+    # ARRANGE
+    from app.internal.tools.definitions.tool_vector_query import vector_query_impl
+    await async_client.post("/vectors/create", json=vector_payload(collection_name, 6))
+    completed = app.state.vector_executor.stats()["completed"]
+
+    # ACT
+    result = await vector_query_impl(collection=collection_name, query="doc number 4", n_results=2)
+
+    # ASSERT
+    assert len(result["hits"]) == 2
+    assert all(hit["collection"] == collection_name for hit in result["hits"])
+    assert app.state.vector_executor.stats()["completed"] == completed + 1
+
+
+async def test_query_response_shapes(async_client, collection_name):
+    """
+    Queries can return flat hits, grouped hits or columnar arrays with selected fields.
+    """
+    # ARRANGE
+    await async_client.post("/vectors/create", json=vector_payload(collection_name, 6))
+    base = {"collection": collection_name, "query": ["doc number 1", "topic 2"], "n_results": 3}
+
+    # ACT
+    legacy = (await async_client.post("/vectors/query", json=base)).json()
+    flat = (await async_client.post("/vectors/query", json={**base, "shape": "flat", "include": ["distances"]})).json()
+    grouped = (await async_client.post("/vectors/query", json={**base, "shape": "grouped"})).json()
+    columnar = (
+        await async_client.post("/vectors/query", json={**base, "shape": "columnar", "include": ["ids", "distances"]})
+    ).json()
+
+    # ASSERT
+    assert len(legacy["hits"]) == 6 and len(legacy["grouped"]) == 2
+    assert set(flat) == {"hits"} and len(flat["hits"]) == 6
+    assert set(flat["hits"][0]) == {"collection", "id", "distance"}
+    assert set(grouped) == {"grouped"} and [len(g) for g in grouped["grouped"]] == [3, 3]
+    assert set(columnar) == {"columns"}
+    assert set(columnar["columns"]) == {"ids", "distances"}
+    assert columnar["columns"]["ids"] == [[h["id"] for h in g] for g in legacy["grouped"]]
+
+
+async def test_bulk_patch_merges_metadata_and_reports_missing(app, async_client, collection_name):
+    """
+    Bulk patch merges metadata (None deletes a key), replaces documents and reports unknown ids.
+    """
+    # ARRANGE
+    await async_client.post("/vectors/create", json=vector_payload(collection_name, 4))
+    payload = {
+        "collection": collection_name,
+        "items": [
+            {"id": "doc_0", "metadata": {"tag": "billing"}},
+            {"id": "doc_1", "metadata": {"topic": None, "tag": "login"}},
+            {"id": "doc_2", "document": "rewritten"},
+            {"id": "nope", "metadata": {"tag": "x"}},
+        ],
+    }
+
+    # ACT
+    res = await async_client.patch("/vectors/bulk", json=payload)
+
+    # ASSERT
+    assert res.status_code == 200, res.text
+    assert res.json() == {"ok": False, "updated": 3, "missing": ["nope"], "failed": []}
+    stored = app.state.vector_client.get_collection(collection_name).get(ids=["doc_0", "doc_1", "doc_2"])
+    by_id = dict(zip(stored["ids"], zip(stored["documents"], stored["metadatas"])))
+    assert by_id["doc_0"][1] == {"topic": 0, "tag": "billing"}
+    assert by_id["doc_1"][1] == {"tag": "login"}
+    assert by_id["doc_2"] == ("rewritten", {"topic": 2})
+
+
+async def test_single_patch_route(async_client, collection_name):
+    """
+    PATCH /vectors applies a single patch and 404s for unknown ids.
+    """
+    # ARRANGE
+    await async_client.post("/vectors/create", json=vector_payload(collection_name, 1))
+
+    # ACT
+    ok = await async_client.patch("/vectors", json={"id": "doc_0", "collection": collection_name, "metadata": {"a": 1}})
+    missing = await async_client.patch("/vectors", json={"id": "nope", "collection": collection_name, "metadata": {"a": 1}})
+
+    # ASSERT
+    assert ok.status_code == 200, ok.text
+    assert missing.status_code == 404
+
+
+async def test_delete_by_ids_and_by_filter(app, async_client, collection_name):
+    """
+    Deletion removes many ids or everything matching a filter, and reports the count.
+    """
+    # ARRANGE
+    await async_client.post("/vectors/create", json=vector_payload(collection_name, 9))
+
+    # ACT
+    by_ids = await async_client.request(
+        "DELETE", "/vectors", json={"collection": collection_name, "ids": ["doc_0", "doc_1", "missing"]}
+    )
+    by_filter = await async_client.request(
+        "DELETE", "/vectors", json={"collection": collection_name, "where": {"topic": {"$gte": 1}}}
+    )
+    unbounded = await async_client.request("DELETE", "/vectors", json={"collection": collection_name})
+    empty = [
+        await async_client.request("DELETE", "/vectors", json={"collection": collection_name, **selector})
+        for selector in ({"where": {}}, {"where_document": {}}, {"ids": []})
+    ]
+
+    # ASSERT
+    assert by_ids.json() == {"deleted": 2}
+    assert by_filter.json() == {"deleted": 5}
+    assert unbounded.status_code == 422
+    assert [res.status_code for res in empty] == [422, 422, 422]
+    remaining = app.state.vector_client.get_collection(collection_name).get()["ids"]
+    assert sorted(remaining) == ["doc_3", "doc_6"]
+
+
+async def test_document_ingest_chunks_server_side(app, async_client, collection_name):
+    """
+    Whole documents are chunked with stable ids and parent metadata; re-ingesting
+    a shorter version drops the chunks it no longer has.
+    """
+    # ARRANGE
+    long_doc = " ".join(f"word{i}" for i in range(300))
+    payload = {
+        "documents": [
+            {"id": "manual", "collection": collection_name, "document": long_doc, "metadata": {"kind": "manual"}},
+            {"id": "blank", "collection": collection_name, "document": "   "},
+        ],
+        "chunking": {"size": 400, "overlap": 50},
+    }
+
+    # ACT
+    first = await async_client.post("/vectors/documents", json=payload)
+    payload["documents"] = [{"id": "manual", "collection": collection_name, "document": long_doc[:500]}]
+    second = await async_client.post("/vectors/documents", json=payload)
+    bad = await async_client.post(
+        "/vectors/documents", json={"documents": [], "chunking": {"size": 10, "overlap": 10}}
+    )
+
+    # ASSERT
+    body = first.json()
+    assert body["ok"] is False and body["documents"] == 1
+    assert [f["id"] for f in body["failed"]] == ["blank"]
+    assert body["chunks"] > 3
+    assert second.json()["chunks"] == 2
+    assert bad.status_code == 422
+
+    stored = app.state.vector_client.get_collection(collection_name).get(include=["documents", "metadatas"])
+    assert sorted(stored["ids"]) == ["manual#0", "manual#1"]
+    for doc, meta in zip(stored["documents"], stored["metadatas"]):
+        assert meta["parent_id"] == "manual" and meta["chunk_count"] == 2
+        assert long_doc[meta["chunk_start"]:meta["chunk_end"]] == doc
+
+
+async def test_vector_query_tool_supports_hybrid_retrieval(async_client, collection_name):
+    """
+    The vector_query tool can rank by BM25 + embeddings to find exact codes.
+    """
+    # ARRANGE
+    from app.internal.tools.definitions.tool_vector_query import vector_query_impl
+
+    payload = vector_payload(collection_name, 10)
+    payload.append({"id": "invoice", "collection": collection_name, "document": "refund for invoice INV-7781"})
+    await async_client.post("/vectors/create", json=payload)
+
+    # ACT
+    result = await vector_query_impl(collection=collection_name, query="INV-7781", n_results=3, retrieval="hybrid")
+
+    # ASSERT
+    assert result["hits"][0]["id"] == "invoice"
+
+
+async def test_vector_query_tool_supports_mmr(async_client, collection_name):
+    """
+    The vector_query tool can re-rank with MMR, dropping duplicate hits.
+    """
+    # ARRANGE
+    from app.internal.tools.definitions.tool_vector_query import vector_query_impl
+
+    docs = ["reset your password"] * 3 + ["reset two factor codes"]
+    await async_client.post("/vectors/create", json=[
+        {"id": f"doc_{i}", "collection": collection_name, "document": d} for i, d in enumerate(docs)
+    ])
+
+    # ACT
+    result = await vector_query_impl(collection=collection_name, query="reset your password", n_results=2, mmr=0.3)
+
+    # ASSERT
+    assert [h["document"] for h in result["hits"]] == ["reset your password", "reset two factor codes"]
+
+
+async def test_precomputed_embeddings_for_ingest_and_query(app, async_client, collection_name):
+    """
+    Precomputed embeddings are stored as given and can be queried directly;
+    dimensions are validated against the collection.
+    """
+    # ARRANGE
+    payload = [
+        {"id": "x", "collection": collection_name, "document": "east", "embedding": [1.0, 0.0, 0.0]},
+        {"id": "y", "collection": collection_name, "document": "north", "embedding": [0.0, 1.0, 0.0]},
+        {"id": "z", "collection": collection_name, "document": "short", "embedding": [0.0, 1.0]},
+    ]
+
+    # ACT
+    created = await async_client.post("/vectors/create", json=payload)
+    query = await async_client.post("/vectors/query", json={
+        "collection": collection_name,
+        "query_embeddings": [[0.0, 0.9, 0.1], [0.9, 0.0, 0.1]],
+        "n_results": 1,
+    })
+    wrong_dim = await async_client.post("/vectors/query", json={
+        "collection": collection_name, "query_embeddings": [[1.0, 0.0]],
+    })
+    both = await async_client.post("/vectors/query", json={
+        "collection": collection_name, "query": "east", "query_embeddings": [[1.0, 0.0, 0.0]],
+    })
+
+    # ASSERT
+    body = created.json()
+    assert body["created"] == 2
+    assert [(f["id"], f["error"]) for f in body["failed"]] == [("z", "embedding has dimension 2, expected 3")]
+    assert [[hit["id"] for hit in group] for group in query.json()["grouped"]] == [["y"], ["x"]]
+    assert wrong_dim.status_code == 422
+    assert both.status_code == 422
+    stored = app.state.vector_client.get_collection(collection_name).get(ids=["x"], include=["embeddings"])
+    assert list(stored["embeddings"][0]) == [1.0, 0.0, 0.0]
+
+
+async def test_readiness_is_gated_on_vector_warmup(app, async_client, collection_name):
+    """
+    /health/ready answers 503 until the warmup of the hot collections is done.
+    """
+    # ARRANGE
+    from app.api.deps import get_vector_repository
+    from app.internal.services.service_vector_warmup import VectorWarmup
+
+    await async_client.post("/vectors/create", json=vector_payload(collection_name, 3))
+    warmup = VectorWarmup([collection_name, "missing_collection"])
+    app.state.vector_warmup = warmup
+
+    # ACT
+    live = await async_client.get("/health/live")
+    before = await async_client.get("/health/ready")
+    await warmup.start(app.state.vector_executor, get_vector_repository(app.state.vector_client))
+    after = await async_client.get("/health/ready")
+
+    # ASSERT
+    assert live.status_code == 200
+    assert before.status_code == 503
+    assert after.status_code == 200
+    status = after.json()["warmup"]
+    assert status["collections"][collection_name]["count"] == 3
+    assert status["skipped"] == ["missing_collection"]
+    assert status["errors"] == {}
+
+
+async def test_collection_hnsw_settings_create_and_tune(async_client, collection_name):
+    """
+    Collections can be created with HNSW settings, tuned later, and report
+    the active values in their metadata.
+    """
+    # ARRANGE
+    payload = {
+        "collection": collection_name,
+        "index": {"space": "cosine", "construction_ef": 200, "search_ef": 40, "M": 32},
+        "metadata": {"team": "support"},
+    }
+
+    # ACT
+    created = await async_client.post("/vectors/collections", json=payload)
+    duplicate = await async_client.post("/vectors/collections", json=payload)
+    tuned = await async_client.patch(f"/vectors/collections/{collection_name}", json={"search_ef": 120})
+    fixed = await async_client.patch(f"/vectors/collections/{collection_name}", json={"space": "l2"})
+    missing = await async_client.patch("/vectors/collections/no_such_collection", json={"search_ef": 10})
+    info = await async_client.get(f"/vectors/collections/{collection_name}")
+
+    # ASSERT
+    assert created.status_code == 201
+    assert created.json()["metadata"]["hnsw:search_ef"] == 40
+    assert duplicate.status_code == 409
+    assert tuned.status_code == 200
+    assert fixed.status_code == 422
+    assert missing.status_code == 404
+    metadata = info.json()["metadata"]
+    assert metadata["team"] == "support"
+    assert (metadata["hnsw:space"], metadata["hnsw:construction_ef"], metadata["hnsw:M"]) == ("cosine", 200, 32)
+    assert metadata["hnsw:search_ef"] == 120
+
+
+async def test_memory_backend_serves_the_vector_api(test_engine, collection_name):
+    """
+    create_app(vector_backend="memory") runs the vector API without Chroma.
+    """
+    # ARRANGE
+    import httpx
+    from asgi_lifespan import LifespanManager
+
+    from app.internal.store.vector_backend import MemoryBackend
+    from app.main import create_app
+
+    app = create_app(engine=test_engine, vector_backend="memory")
+
+    async with LifespanManager(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # ACT
+            created = await client.post("/vectors/create", json=vector_payload(collection_name, 6))
+            query = await client.post("/vectors/query", json={
+                "collection": collection_name, "query": "doc number 4 about topic 1", "n_results": 2,
+                "where": {"topic": 1},
+            })
+
+    # ASSERT
+    assert created.status_code == 200
+    assert isinstance(app.state.vector_client, MemoryBackend)
+    assert app.state.vector_client.get_collection(collection_name).count() == 6
+    assert [hit["id"] for hit in query.json()["hits"]] == ["doc_4", "doc_1"]
+
+
+async def test_multi_collection_query_merges_a_global_top_k(async_client, collection_name):
+    """
+    One query over several collections returns the best hits overall, each
+    tagged with its collection; the tool does the same in one call.
+    """
+    # ARRANGE
+    from app.internal.tools.definitions.tool_vector_query_many import vector_query_many_impl
+
+    docs, billing = f"{collection_name}_docs", f"{collection_name}_billing"
+    await async_client.post("/vectors/create", json=[
+        {"id": "d1", "collection": docs, "document": "reset your password from the login page"},
+        {"id": "d2", "collection": docs, "document": "create a project board"},
+    ])
+    await async_client.post("/vectors/create", json=[
+        {"id": "b1", "collection": billing, "document": "refunds for annual plans"},
+        {"id": "b2", "collection": billing, "document": "password reset does not change billing"},
+    ])
+
+    # ACT
+    res = await async_client.post("/vectors/query/multi", json={
+        "collections": [docs, billing], "query": "password reset", "n_results": 3,
+    })
+    columnar = await async_client.post("/vectors/query/multi", json={
+        "collections": [docs, billing], "query": "password reset", "n_results": 2,
+        "shape": "columnar", "include": ["ids"],
+    })
+    missing = await async_client.post("/vectors/query/multi", json={
+        "collections": [docs, "no_such_collection"], "query": "password",
+    })
+    tool = await vector_query_many_impl(collections=[billing, docs], query="annual refunds", n_results=1)
+
+    # ASSERT
+    assert res.status_code == 200
+    hits = res.json()["hits"]
+    assert {(h["collection"], h["id"]) for h in hits[:2]} == {(docs, "d1"), (billing, "b2")}
+    assert [h["distance"] for h in hits] == sorted(h["distance"] for h in hits)
+    assert set(columnar.json()["columns"]) == {"ids", "collections"}
+    assert sorted(columnar.json()["columns"]["collections"][0]) == sorted([docs, billing])
+    assert missing.status_code == 404
+    assert [(h["collection"], h["id"]) for h in tool["hits"]] == [(billing, "b1")]
+
+
+async def test_ingest_dedup_rejects_or_merges_near_duplicates(app, async_client, collection_name):
+    """
+    With dedup, near-identical documents are collapsed and reported: rejected
+    ones are not written, merged ones overwrite the record they duplicate.
+    """
+    # ARRANGE
+    issues = (
+        "Known issues: mobile app v2.4.1 push notifications are delayed on Android 14. "
+        "Workaround: disable battery optimization for the TaskFlow app. Calendar sync may "
+        "take three to ten minutes to show new events."
+    )
+    await async_client.post("/vectors/create", json=[
+        {"id": "support_known_issues_2025_01_10", "collection": collection_name, "document": issues},
+    ])
+    rerun = [
+        {"id": "support_known_issues_2025_01_17", "collection": collection_name, "document": issues + " Updated."},
+        {"id": "support_billing_policy_v1", "collection": collection_name, "document": "Refunds within 7 days."},
+    ]
+
+    # ACT
+    rejected = await async_client.post("/vectors/create", params={"dedup": "reject"}, json=rerun)
+    merged = await async_client.post(
+        "/vectors/create", params={"dedup": "merge", "dedup_threshold": 0.8}, json=rerun[:1],
+    )
+
+    # ASSERT
+    assert rejected.status_code == 200
+    body = rejected.json()
+    assert body["created"] == 1
+    assert [(d["index"], d["id"], d["duplicate_of"]) for d in body["collapsed"]] == [
+        (0, "support_known_issues_2025_01_17", "support_known_issues_2025_01_10"),
+    ]
+    assert merged.json()["collapsed"][0]["duplicate_of"] == "support_known_issues_2025_01_10"
+    col = app.state.vector_client.get_collection(collection_name)
+    stored = col.get(ids=["support_known_issues_2025_01_10"])
+    assert col.count() == 2
+    assert stored["documents"] == [issues + " Updated."]
+
+
+async def test_vector_query_tool_packs_hits_into_a_budget(async_client, collection_name):
+    """
+    With a budget the vector_query tool returns one packed context instead of hits.
+    """
+    # ARRANGE
+    from app.internal.tools.definitions.tool_vector_query import vector_query_impl
+
+    await async_client.post("/vectors/create", json=vector_payload(collection_name, 10))
+
+    # ACT
+    result = await vector_query_impl(collection=collection_name, query="doc number 4", n_results=10, budget=300)
+
+    # ASSERT
+    assert set(result) == {"context", "ids", "truncated", "dropped", "used"}
+    assert result["ids"] and len(result["context"]) == result["used"] <= 300
+    assert len(result["ids"]) + len(result["dropped"]) == 10
+
+
+async def test_scan_streams_every_record_as_ndjson(async_client, collection_name):
+    """
+    A collection scan streams one NDJSON record per vector, paged from the store.
+    """
+    # ARRANGE
+    await async_client.post("/vectors/create", json=vector_payload(collection_name, 7))
+
+    # ACT
+    res = await async_client.get(
+        f"/vectors/collections/{collection_name}/records", params={"page_size": 3, "embeddings": True},
+    )
+    missing = await async_client.get("/vectors/collections/no_such_collection/records")
+
+    # ASSERT
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in res.text.splitlines()]
+    assert sorted(r["id"] for r in records) == [f"doc_{i}" for i in range(7)]
+    by_id = {r["id"]: r for r in records}
+    assert by_id["doc_4"]["document"] == "doc number 4 about topic 1"
+    assert by_id["doc_4"]["metadata"] == {"topic": 1}
+    assert len({len(r["embedding"]) for r in records}) == 1
+    assert missing.status_code == 404
+
+
+async def test_snapshot_and_restore_collection(app, async_client, collection_name, tmp_path):
+    """
+    A collection snapshot restores under a new name without re-embedding; names are checked.
+    """
+    # ARRANGE
+    from app.api.deps import get_snapshot_path
+
+    app.dependency_overrides[get_snapshot_path] = lambda: str(tmp_path)
+    await async_client.post("/vectors/create", json=vector_payload(collection_name, 6))
+
+    # ACT
+    saved = await async_client.post(f"/vectors/collections/{collection_name}/snapshots", json={"name": "kb"})
+    again = await async_client.post(f"/vectors/collections/{collection_name}/snapshots", json={"name": "kb"})
+    listed = await async_client.get("/vectors/snapshots")
+    exists = await async_client.post("/vectors/snapshots/kb/restore")
+    restored = await async_client.post("/vectors/snapshots/kb/restore", json={"collection": f"{collection_name}_copy"})
+    missing = await async_client.post("/vectors/snapshots/nope/restore")
+    invalid = await async_client.post(f"/vectors/collections/{collection_name}/snapshots", json={"name": "../x"})
+    query = await async_client.post("/vectors/query", json={
+        "collection": f"{collection_name}_copy", "query": "doc number 4 about topic 1", "n_results": 1,
+    })
+    app.dependency_overrides.pop(get_snapshot_path)
+
+    # ASSERT
+    assert saved.status_code == 201 and saved.json()["count"] == 6
+    assert again.status_code == 409
+    assert [s["name"] for s in listed.json()] == ["kb"]
+    assert exists.status_code == 409
+    assert restored.status_code == 201 and restored.json()["count"] == 6
+    assert missing.status_code == 404
+    assert invalid.status_code == 422
+    assert query.json()["hits"][0]["id"] == "doc_4"
+
+
+async def test_migration_re_embeds_and_swaps_the_collection_name(async_client, collection_name):
+    """
+    A migration copies into a new collection with new settings, then the name moves over to it.
+    """
+    # ARRANGE
+    import asyncio
+
+    await async_client.post("/vectors/create", json=vector_payload(collection_name, 12))
+
+    # ACT
+    started = await async_client.post(
+        f"/vectors/collections/{collection_name}/migrations",
+        json={"index": {"space": "ip"}, "batch_size": 5, "grace_seconds": 0},
+    )
+    migration = started.json()
+    for _ in range(200):
+        migration = (await async_client.get(f"/vectors/migrations/{migration['id']}")).json()
+        if migration["status"] not in ("copying", "catching_up", "swapping", "swapped"):
+            break
+        await asyncio.sleep(0.01)
+    info = await async_client.get(f"/vectors/collections/{collection_name}")
+    aliases = await async_client.get("/vectors/aliases")
+    query = await async_client.post("/vectors/query", json={
+        "collection": collection_name, "query": "doc number 4 about topic 1", "n_results": 1,
+    })
+    missing = await async_client.post("/vectors/collections/no_such_collection/migrations")
+    unknown_model = await async_client.post(
+        f"/vectors/collections/{collection_name}/migrations", json={"embedding_model": "no_such_model"},
+    )
+
+    # ASSERT
+    assert started.status_code == 202 and started.json()["total"] == 12
+    assert migration["status"] == "completed" and migration["copied"] == 12
+    assert info.json()["count"] == 12 and info.json()["metadata"]["hnsw:space"] == "ip"
+    assert aliases.json() == {collection_name: migration["target"]}
+    assert query.json()["hits"][0]["id"] == "doc_4"
+    assert missing.status_code == 404
+    assert unknown_model.status_code == 422